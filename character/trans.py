@@ -1,16 +1,26 @@
+import argparse
+import hashlib
 import json
 import sys
 import re
-from typing import Dict, Any, List, Optional
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 import os
 
-# 尝试导入 mysql-connector-python，如果失败则提示安装
+# 尝试导入 mysql-connector-python，未安装时仍可作为模块导入（例如供 SQLite 导入器复用扁平化逻辑）
 try:
     import mysql.connector
     from mysql.connector import Error
 except ImportError:
-    print("Error: mysql-connector-python is not installed. Please install it using 'pip install mysql-connector-python'")
-    sys.exit(1)
+    mysql = None
+    Error = Exception
+
+# 武器目录与 src_test 共用（src_test.domain.weapon_catalog 不依赖第三方库）
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+from src_test.domain.weapon_catalog import get_weapon_catalog  # noqa: E402
 
 # 定义技能名称到数据库列名的映射
 SKILL_MAP = {
@@ -39,6 +49,35 @@ SKILL_MAP = {
 }
 
 
+# players 表的列（不含 skills，技能单独写入 skills 表）
+PLAYER_COLUMNS = [
+    'id', 'year', 'max_skill', 'max_hobby_skill', 'name', 'age', 'sex', 'language',
+    'birth_place', 'live_place', 'strength', 'constitution', 'size', 'dexterity',
+    'appearance', 'education', 'intelligence', 'willpower', 'luck', 'damage_bonus',
+    'build', 'movement', 'hit_points', 'magic_points', 'sanity', 'occupation_id',
+    'cash_amount', 'assets_amount', 'credit_rating_spend', 'weapons',
+    'equipments', 'personal_description', 'beliefs', 'traits', 'significant_people',
+    'meaningful_locations', 'treasured_possessions', 'injuries', 'phobias', 'encounters',
+    'mythos', 'relationships', 'face_image_path', 'notes'
+]
+
+# skills 表的技能列（skill_001 ~ skill_108）
+SKILL_COLUMNS = sorted(SKILL_MAP.values())
+
+# 技能存储布局，与 src_test 的 SKILLS_LAYOUT 配置一致：
+# wide 只写 skills 表；sparse 时同时写 skill_values 表（每个非空技能一行，skill_id 为列序号 1 ~ 108），
+# 否则按稀疏布局读取的服务会看到旧的或缺失的技能
+SKILLS_LAYOUTS = ('wide', 'sparse')
+# 通过 src_test 的配置读取（会加载 src_test/.env），未安装 python-dotenv 时只读取环境变量
+try:
+    from src_test.config.settings import SKILLS_LAYOUT as DEFAULT_SKILLS_LAYOUT  # noqa: E402
+except ImportError:
+    DEFAULT_SKILLS_LAYOUT = os.getenv('SKILLS_LAYOUT', 'wide').strip().lower()
+
+SKILL_VALUES_DELETE_SQL = "DELETE FROM `skill_values` WHERE `player_id` = %s"
+SKILL_VALUES_INSERT_SQL = "INSERT INTO `skill_values` (`player_id`, `skill_id`, `value`) VALUES (%s, %s, %s)"
+
+
 def normalize_skill_name(name: str) -> str:
     """标准化技能名称，移除括号内的额外信息"""
     return name.split('(')[0].strip()
@@ -116,47 +155,10 @@ def flatten_json_data(data: Dict[str, Any]) -> Dict[str, Any]:
         flat_data['credit_rating_spend'] = data['credit'].get('crSpend')
 
     flat_data['skills'] = data.get('skills')
-    weapons = data.get('weapons')
-    # 定义武器名称到weapon_XXX ID的映射
-    weapon_map = {
-        "徒手格斗": "weapon_000", "弓箭": "weapon_001", "指虎": "weapon_002", "长鞭": "weapon_003",
-        "燃烧的火炬": "weapon_004", "电锯": "weapon_005", "包皮铁棍": "weapon_006", "大型棍状物": "weapon_007",
-        "十字弩": "weapon_008", "绞具": "weapon_010", "斧头": "weapon_011", "大型刀具": "weapon_012",
-        "中型刀具": "weapon_013", "小型刀": "weapon_014", "220v通电导线": "weapon_015", "催泪瓦斯": "weapon_016",
-        "抛出的石块": "weapon_018", "苦无": "weapon_019", "矛": "weapon_020", "掷矛": "weapon_021",
-        "大型剑": "weapon_022", "中型剑": "weapon_023", "轻剑": "weapon_024", "电棍": "weapon_025",
-        "泰瑟枪": "weapon_026", "伐木斧": "weapon_027", "燧发枪": "weapon_029", ".22短口自动手枪": "weapon_030",
-        ".25短口手枪(单管)": "weapon_031", ".32自动手枪": "weapon_032", ".32or7.65mm自动手枪": "weapon_033",
-        ".357Magnum左轮手枪": "weapon_034", ".38or9mm左轮手枪": "weapon_035", "贝雷塔M9": "weapon_037",
-        "格洛克179mm自动手枪": "weapon_038", ".41左轮手枪": "weapon_040", ".44马格南左轮手枪": "weapon_041",
-        ".45左轮手枪": "weapon_042", ".45自动手枪": "weapon_043", ".58斯普林菲尔德步枪": "weapon_045",
-        ".22杠杆式步枪": "weapon_046", ".30卡宾枪": "weapon_047", ".45马提尼·亨利步枪": "weapon_048",
-        "加兰德M1、M2步枪": "weapon_050", "SKS半自动步枪": "weapon_051", ".303(7.7mm)李恩菲尔德": "weapon_052",
-        ".30-06(7.62mm)栓式枪机步枪": "weapon_053", ".30-06(7.62mm)半自动步枪": "weapon_054",
-        ".444(莫兰上校气动步枪)": "weapon_055", "猎象枪(双管)": "weapon_056", "16号霰弹枪(双管)": "weapon_058",
-        "12号霰弹枪": "weapon_059", "12号泵动霰弹枪": "weapon_060", "12号半自动霰弹枪": "weapon_061",
-        "削短12号双管霰弹枪": "weapon_062", "10号霰弹枪(双管)": "weapon_063", "12号贝里尼M3(折叠式枪托)": "weapon_064",
-        "12号SPAS(折叠式)": "weapon_065", "AK-47orAKM": "weapon_066", "AK-74": "weapon_067", "巴雷特M82": "weapon_068",
-        "FNFALLightAutomatic": "weapon_069", "GalilAssale": "weapon_070", "M16A2": "weapon_071", "M4": "weapon_072",
-        "SteyrAUG": "weapon_073", "巴雷特M70/90": "weapon_074", "贝格曼MP181/MP2811": "weapon_075",
-        "Heckler & Koch MP5": "weapon_076", "蝎式冲锋枪": "weapon_078", "汤普森冲锋枪": "weapon_079",
-        "乌兹微型": "weapon_080", "M1882加特林机枪": "weapon_081", "M1918式勃朗宁自动步枪": "weapon_082",
-        "M1917A1式勃朗宁重机枪": "weapon_083", "布伦式轻机枪": "weapon_084", "刘易斯式轻机枪": "weapon_085",
-        "Minigun": "weapon_086", "FNMinimi5.56mm轻机枪": "weapon_087", "维克斯MK1式机枪": "weapon_088",
-        "燃烧瓶": "weapon_089", "信号枪": "weapon_090", "M79榴弹发射器": "weapon_091", "土制炸药": "weapon_092",
-        "冲锋枪": "weapon_093", "管状炸弹": "weapon_094", "塑胶炸弹(C4)": "weapon_095", "手榴弹": "weapon_096",
-        "81mm迫击炮": "weapon_097", "75mm野战炮": "weapon_098", "120mm坦克炮(稳定)": "weapon_099",
-        "5英寸舰载炮(稳定)": "weapon_100", "反步兵地雷": "weapon_101", "阔剑地雷": "weapon_102",
-        "火焰喷射器": "weapon_103", "轻型反坦克武器": "weapon_104"
-    }
 
     weapons = data.get('weapons')
     if weapons and isinstance(weapons, list):
-        weapon_ids = []
-        for weapon in weapons:
-            name = weapon.get('name', '')
-            if name in weapon_map:
-                weapon_ids.append(weapon_map[name])
+        weapon_ids = get_weapon_catalog().resolve_ids(weapon.get('name', '') for weapon in weapons)
         flat_data['weapons'] = json.dumps(weapon_ids) if weapon_ids else None
     else:
         flat_data['weapons'] = None
@@ -184,16 +186,7 @@ def flatten_json_data(data: Dict[str, Any]) -> Dict[str, Any]:
 
 def generate_players_insert(flat_data: Dict[str, Any]) -> str:
     """生成players表的INSERT语句"""
-    columns = [
-        'id', 'year', 'max_skill', 'max_hobby_skill', 'name', 'age', 'sex', 'language',
-        'birth_place', 'live_place', 'strength', 'constitution', 'size', 'dexterity',
-        'appearance', 'education', 'intelligence', 'willpower', 'luck', 'damage_bonus',
-        'build', 'movement', 'hit_points', 'magic_points', 'sanity', 'occupation_id',
-        'cash_amount', 'assets_amount', 'credit_rating_spend', 'weapons',
-        'equipments', 'personal_description', 'beliefs', 'traits', 'significant_people',
-        'meaningful_locations', 'treasured_possessions', 'injuries', 'phobias', 'encounters',
-        'mythos', 'relationships', 'face_image_path', 'notes'
-    ]
+    columns = PLAYER_COLUMNS
 
     # 确保 'skills' 键不包含在 players 表的插入数据中
     player_data = {k: v for k, v in flat_data.items() if k != 'skills'}
@@ -205,33 +198,404 @@ def generate_players_insert(flat_data: Dict[str, Any]) -> str:
 
 def generate_skills_insert(flat_data: Dict[str, Any]) -> str:
     """生成skills表的INSERT语句"""
-    skill_values = {col: 'NULL' for col in SKILL_MAP.values()}
+    values_by_column = skill_values(flat_data)
+
+    columns = ['id'] + SKILL_COLUMNS
+    values = [to_sql_value(flat_data.get('id'))] + [to_sql_value(values_by_column[col]) for col in SKILL_COLUMNS]
+
+    return f"INSERT INTO `skills` (`{ '`, `'.join(columns) }`) VALUES ({ ', '.join(values) });"
+
+
+def generate_skill_values_sql(flat_data: Dict[str, Any]) -> List[str]:
+    """生成 skill_values 表的语句：先删除该角色的全部技能行，再写入非空技能"""
+    player_id = to_sql_value(flat_data.get('id'))
+    statements = [f"DELETE FROM `skill_values` WHERE `player_id` = {player_id};"]
+    rows = sparse_skill_rows(skill_row(flat_data))
+    if rows:
+        values = ', '.join(f"({player_id}, {number}, {to_sql_value(value)})" for _, number, value in rows)
+        statements.append(f"INSERT INTO `skill_values` (`player_id`, `skill_id`, `value`) VALUES {values};")
+    return statements
+
+
+def to_param_value(value: Any) -> Any:
+    """将Python值转换为参数化查询的参数（dict/list 序列化为 JSON）"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def player_row(flat_data: Dict[str, Any]) -> Tuple:
+    """按 PLAYER_COLUMNS 顺序生成 players 表的一行参数"""
+    return tuple(to_param_value(flat_data.get(col)) for col in PLAYER_COLUMNS)
+
 
-    if 'skills' in flat_data and flat_data['skills']:
+def skill_values(flat_data: Dict[str, Any]) -> Dict[str, Any]:
+    """从扁平化数据中提取 {技能列名: 数值}，未填写的技能为 None"""
+    values = {col: None for col in SKILL_COLUMNS}
+    if flat_data.get('skills'):
         for skill_group in flat_data['skills']:
             for skill in skill_group:
                 norm_name = normalize_skill_name(skill.get('name', ''))
                 if norm_name in SKILL_MAP:
-                    col_name = SKILL_MAP[norm_name]
-                    skill_values[col_name] = to_sql_value(skill.get('pts'))
+                    values[SKILL_MAP[norm_name]] = skill.get('pts')
+    return values
 
-    columns = ['id'] + sorted(skill_values.keys())
-    values = [to_sql_value(flat_data.get('id'))] + [skill_values[key] for key in sorted(skill_values.keys())]
 
-    return f"INSERT INTO `skills` (`{ '`, `'.join(columns) }`) VALUES ({ ', '.join(values) });"
+def skill_row(flat_data: Dict[str, Any]) -> Tuple:
+    """按 ['id'] + SKILL_COLUMNS 顺序生成 skills 表的一行参数"""
+    values = skill_values(flat_data)
+    return (flat_data.get('id'),) + tuple(values[col] for col in SKILL_COLUMNS)
+
+
+def sparse_skill_rows(skill: Tuple) -> List[Tuple]:
+    """将 skill_row 的结果转换为 skill_values 表的行 [(player_id, skill_id, value), ...]，跳过未填写的技能"""
+    return [(skill[0], number, value) for number, value in enumerate(skill[1:], 1) if value is not None]
+
+
+def skill_values_operations(skill: Tuple) -> List[Tuple[str, Tuple]]:
+    """生成重写某个角色 skill_values 行的 (SQL, 参数) 列表（供 sync_directory 使用）"""
+    return [(SKILL_VALUES_DELETE_SQL, (skill[0],))] + [(SKILL_VALUES_INSERT_SQL, row) for row in sparse_skill_rows(skill)]
+
+
+def generate_upsert_sql(table: str, columns: List[str]) -> str:
+    """生成参数化的 INSERT ... ON DUPLICATE KEY UPDATE 语句（供 executemany 使用）"""
+    column_sql = ', '.join(f'`{col}`' for col in columns)
+    placeholders = ', '.join(['%s'] * len(columns))
+    updates = ', '.join(f'`{col}` = VALUES(`{col}`)' for col in columns if col != 'id')
+    return f"INSERT INTO `{table}` ({column_sql}) VALUES ({placeholders}) ON DUPLICATE KEY UPDATE {updates}"
+
+
+def connect(db_config: Dict[str, Any]):
+    """按 database.json 的配置连接数据库"""
+    return mysql.connector.connect(
+        host=db_config['db_host'],
+        user=db_config['db_user'],
+        password=db_config['db_password'],
+        database=db_config['db_name'],
+        port=db_config['db_port']
+    )
+
+
+def load_db_config() -> Dict[str, Any]:
+    """读取脚本目录下的 database.json"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    db_config_path = os.path.join(script_dir, 'database.json')
+
+    try:
+        with open(db_config_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error reading database config file '{db_config_path}': {e}")
+        sys.exit(1)
+
+
+def parse_player_file(json_file: str) -> Tuple[str, Optional[Tuple], Optional[Tuple], Optional[str]]:
+    """
+    读取并扁平化一个角色卡文件（在进程池中执行）
+
+    :return: (文件路径, players 行, skills 行, 错误信息)
+    """
+    try:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            flat_data = flatten_json_data(json.load(f))
+        return json_file, player_row(flat_data), skill_row(flat_data), None
+    except Exception as e:
+        return json_file, None, None, str(e)
+
+
+def list_json_files(directory: str) -> List[str]:
+    """列出目录下的所有角色卡 JSON 文件（跳过 . 开头的文件，如同步清单）"""
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.endswith('.json') and not name.startswith('.')
+    ]
+
+
+def parse_player_files(json_files: List[str], workers: Optional[int] = None) -> Iterator[Tuple]:
+    """用进程池并行解析角色卡文件，按输入顺序产出 parse_player_file 的结果"""
+    if workers == 1 or len(json_files) < 2:
+        yield from map(parse_player_file, json_files)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(json_files) // ((workers or os.cpu_count() or 1) * 4))
+        yield from executor.map(parse_player_file, json_files, chunksize=chunksize)
+
+
+def bulk_import(db_config: Dict[str, Any], directory: str, batch_size: int = 100,
+                workers: Optional[int] = None, skills_layout: str = DEFAULT_SKILLS_LAYOUT) -> Dict[str, Any]:
+    """
+    批量导入目录下的所有角色卡
+
+    文件在进程池中解析，按批用 executemany 写入，每批一个事务；
+    已存在的角色卡按主键覆盖（upsert），可重复执行。
+
+    :param batch_size: 每个事务写入的角色卡数
+    :param workers: 解析进程数，默认为 CPU 核数
+    :param skills_layout: 技能存储布局，sparse 时同时重写 skill_values 表
+    :return: 导入统计
+    """
+    json_files = list_json_files(directory)
+    total = len(json_files)
+    players_sql = generate_upsert_sql('players', PLAYER_COLUMNS)
+    skills_sql = generate_upsert_sql('skills', ['id'] + SKILL_COLUMNS)
+
+    imported, failed = 0, []
+    start = time.perf_counter()
+    conn = connect(db_config)
+    cursor = conn.cursor()
+
+    def write_batch(players: List[Tuple], skills: List[Tuple]):
+        nonlocal imported
+        try:
+            cursor.executemany(players_sql, players)
+            cursor.executemany(skills_sql, skills)
+            if skills_layout == 'sparse':
+                cursor.executemany(SKILL_VALUES_DELETE_SQL, [(skill[0],) for skill in skills])
+                sparse_rows = [row for skill in skills for row in sparse_skill_rows(skill)]
+                if sparse_rows:
+                    cursor.executemany(SKILL_VALUES_INSERT_SQL, sparse_rows)
+            conn.commit()
+            imported += len(players)
+        except Error as e:
+            conn.rollback()
+            failed.extend((row[0], str(e)) for row in players)
+        elapsed = time.perf_counter() - start
+        done = imported + len(failed)
+        print(f"[{done}/{total}] imported {imported}, failed {len(failed)}, "
+              f"{done / elapsed if elapsed else 0:.1f} files/s")
+
+    try:
+        players, skills = [], []
+        for json_file, player, skill, error in parse_player_files(json_files, workers):
+            if error:
+                failed.append((json_file, error))
+                continue
+            players.append(player)
+            skills.append(skill)
+            if len(players) >= batch_size:
+                write_batch(players, skills)
+                players, skills = [], []
+        if players:
+            write_batch(players, skills)
+    finally:
+        cursor.close()
+        conn.close()
+
+    elapsed = time.perf_counter() - start
+    for name, error in failed:
+        print(f"Failed: {name}: {error}")
+    print(f"Imported {imported}/{total} characters in {elapsed:.2f}s "
+          f"({imported / elapsed if elapsed else 0:.1f} files/s)")
+    return {'total': total, 'imported': imported, 'failed': failed, 'seconds': elapsed}
+
+
+# 增量同步清单的默认文件名（保存在角色卡目录下）
+MANIFEST_NAME = '.trans_manifest.json'
+# 清单格式版本：2 起每个文件只记录内容哈希和角色ID
+MANIFEST_VERSION = 2
+
+
+def file_hash(path: str) -> str:
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_path: str) -> Dict[str, Any]:
+    """读取同步清单，不存在或损坏时返回空清单"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if isinstance(manifest.get('files'), dict):
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {'version': MANIFEST_VERSION, 'files': {}}
+
+
+def save_manifest(manifest_path: str, manifest: Dict[str, Any]):
+    """写入同步清单（先写临时文件再替换，避免中断时损坏）"""
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+
+def same_value(old: Any, new: Any) -> bool:
+    """比较数据库中的值与角色卡中的值（数据库可能返回数值类型，角色卡中为字符串）"""
+    if old == new:
+        return True
+    return old is not None and new is not None and str(old) == str(new)
+
+
+def changed_columns(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """返回 new 中与 old 不同的列"""
+    return {col: value for col, value in new.items() if col != 'id' and not same_value(old.get(col), value)}
+
+
+def generate_update_sql(table: str, columns: List[str]) -> str:
+    """生成只更新指定列的参数化 UPDATE 语句"""
+    set_sql = ', '.join(f'`{col}` = %s' for col in columns)
+    return f"UPDATE `{table}` SET {set_sql} WHERE `id` = %s"
+
+
+def fetch_row(cursor, table: str, columns: List[str], player_id: Any) -> Optional[Dict[str, Any]]:
+    """读取数据库中某个角色的当前行，不存在时返回 None"""
+    column_sql = ', '.join(f'`{col}`' for col in columns)
+    cursor.execute(f"SELECT {column_sql} FROM `{table}` WHERE `id` = %s", (player_id,))
+    row = cursor.fetchone()
+    return dict(zip(columns, row)) if row is not None else None
+
+
+def delete_player_operations(player_id: Any, skills_layout: str) -> List[Tuple[str, Tuple]]:
+    """生成删除某个角色全部行的 (SQL, 参数) 列表"""
+    operations = []
+    if skills_layout == 'sparse':
+        operations.append((SKILL_VALUES_DELETE_SQL, (player_id,)))
+    operations.append(("DELETE FROM `skills` WHERE `id` = %s", (player_id,)))
+    operations.append(("DELETE FROM `players` WHERE `id` = %s", (player_id,)))
+    return operations
+
+
+def sync_directory(db_config: Dict[str, Any], directory: str, manifest_path: Optional[str] = None,
+                   workers: Optional[int] = None, dry_run: bool = False,
+                   skills_layout: str = DEFAULT_SKILLS_LAYOUT) -> Dict[str, Any]:
+    """
+    增量同步目录下的角色卡
+
+    清单只记录每个文件的内容哈希和角色ID（不保存角色卡内容）。
+    只重新解析哈希变化或新增的文件，并与数据库中的当前行比较：
+    行已存在时只 UPDATE 实际变化的列，不存在时 upsert 整行。
+    文件被删除或角色ID变化时删除旧ID的行。
+    全部语句在一个事务中执行，提交成功后才更新清单。
+
+    :param manifest_path: 清单路径，默认为目录下的 .trans_manifest.json
+    :param dry_run: 只打印将同步的角色和将删除的旧行，不连接数据库、不写清单
+    :param skills_layout: 技能存储布局，sparse 时技能有变化的角色同时重写 skill_values 行
+    :return: 同步统计
+    """
+    manifest_path = manifest_path or os.path.join(directory, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    entries = manifest['files']
+
+    json_files = list_json_files(directory)
+    hashes = {}
+    changed_files = []
+    for json_file in json_files:
+        name = os.path.basename(json_file)
+        hashes[name] = file_hash(json_file)
+        if entries.get(name, {}).get('hash') != hashes[name]:
+            changed_files.append(json_file)
+
+    players_upsert = generate_upsert_sql('players', PLAYER_COLUMNS)
+    skills_upsert = generate_upsert_sql('skills', ['id'] + SKILL_COLUMNS)
+    removed = sorted(set(entries) - set(hashes))
+    stats = {'total': len(json_files), 'unchanged': len(json_files) - len(changed_files),
+             'inserted': 0, 'updated': 0, 'columns': 0, 'deleted': 0, 'failed': [], 'removed': removed}
+    new_entries: Dict[str, Dict[str, Any]] = {}
+    parsed = []
+    for json_file, player, skill, error in parse_player_files(changed_files, workers):
+        if error:
+            stats['failed'].append((json_file, error))
+            continue
+        name = os.path.basename(json_file)
+        new_entries[name] = {'hash': hashes[name], 'id': player[0]}
+        parsed.append((name, player, skill))
+
+    # 源文件已删除或角色ID已变化、且不再被任何角色卡使用的旧ID
+    current_ids = {entry.get('id') for name, entry in entries.items() if name in hashes and name not in new_entries}
+    current_ids.update(entry['id'] for entry in new_entries.values())
+    stale = {}
+    for name, entry in entries.items():
+        old_id = entry.get('id')
+        if old_id is not None and old_id not in current_ids and (name not in hashes or name in new_entries):
+            stale.setdefault(old_id, f"{name} removed" if name not in hashes
+                             else f"id in {name} changed to {new_entries[name]['id']}")
+
+    conn = None if dry_run else connect(db_config)
+    cursor = conn.cursor() if conn is not None else None
+
+    def execute(operations: List[Tuple[str, Tuple]]):
+        if cursor is not None:
+            for sql, params in operations:
+                cursor.execute(sql, params)
+
+    try:
+        for old_id, reason in stale.items():
+            print(f"delete {old_id}: {reason}")
+            execute(delete_player_operations(old_id, skills_layout))
+            stats['deleted'] += 1
+
+        for name, player, skill in parsed:
+            players = dict(zip(PLAYER_COLUMNS, player))
+            skills = dict(zip(['id'] + SKILL_COLUMNS, skill))
+            if cursor is None:
+                print(f"sync players/skills {players['id']} ({name})")
+                continue
+
+            current = fetch_row(cursor, 'players', PLAYER_COLUMNS, players['id'])
+            if current is None:
+                execute([(players_upsert, player), (skills_upsert, skill)])
+                if skills_layout == 'sparse':
+                    execute(skill_values_operations(skill))
+                stats['inserted'] += 1
+                continue
+
+            for table, columns, new_row, upsert in (
+                    ('players', PLAYER_COLUMNS, players, (players_upsert, player)),
+                    ('skills', ['id'] + SKILL_COLUMNS, skills, (skills_upsert, skill))):
+                old_row = current if table == 'players' else fetch_row(cursor, table, columns, new_row['id'])
+                if old_row is None:
+                    execute([upsert])
+                    diff = new_row
+                else:
+                    diff = changed_columns(old_row, new_row)
+                    if diff:
+                        print(f"update {table} {new_row['id']}: {', '.join(diff)}")
+                        execute([(generate_update_sql(table, list(diff)), tuple(diff.values()) + (new_row['id'],))])
+                        stats['columns'] += len(diff)
+                if diff and table == 'skills' and skills_layout == 'sparse':
+                    execute(skill_values_operations(skill))
+            stats['updated'] += 1
+
+        if conn is not None:
+            conn.commit()
+    except Error:
+        if conn is not None:
+            conn.rollback()
+        raise
+    finally:
+        if conn is not None:
+            cursor.close()
+            conn.close()
+
+    if not dry_run:
+        entries.update(new_entries)
+        for name in removed:
+            entries.pop(name, None)
+        # 旧版清单中保存的整行数据不再保留
+        manifest['files'] = {name: {'hash': entry.get('hash'), 'id': entry.get('id')}
+                             for name, entry in entries.items()}
+        manifest['version'] = MANIFEST_VERSION
+        save_manifest(manifest_path, manifest)
+
+    for name, error in stats['failed']:
+        print(f"Failed: {name}: {error}")
+    print(f"Sync: {stats['total']} files, {stats['unchanged']} unchanged, {stats['inserted']} inserted, "
+          f"{stats['updated']} updated ({stats['columns']} columns), {stats['deleted']} deleted, "
+          f"{len(removed)} removed from manifest")
+    return stats
 
 
 def execute_sql(db_config: Dict[str, Any], sql_statements: List[str]):
     """连接到数据库并执行SQL语句"""
     conn = None
     try:
-        conn = mysql.connector.connect(
-            host=db_config['db_host'],
-            user=db_config['db_user'],
-            password=db_config['db_password'],
-            database=db_config['db_name'],
-            port=db_config['db_port']
-        )
+        conn = connect(db_config)
         cursor = conn.cursor()
 
         for statement in sql_statements:
@@ -253,23 +617,44 @@ def execute_sql(db_config: Dict[str, Any], sql_statements: List[str]):
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python trans.py <json_file>")
+    parser = argparse.ArgumentParser(description="Import COC character JSON files into MySQL")
+    parser.add_argument('path', help="character JSON file, or a directory for bulk import")
+    parser.add_argument('--batch-size', type=int, default=100, help="characters per transaction in bulk mode")
+    parser.add_argument('--workers', type=int, default=None, help="parser processes in bulk/sync mode")
+    parser.add_argument('--sync', action='store_true',
+                        help="incremental sync of a directory: only changed files and changed columns are written")
+    parser.add_argument('--manifest', default=None, help=f"sync manifest path (default <dir>/{MANIFEST_NAME})")
+    parser.add_argument('--dry-run', action='store_true', help="print sync changes without writing")
+    parser.add_argument('--skills-layout', choices=SKILLS_LAYOUTS, default=DEFAULT_SKILLS_LAYOUT,
+                        help="skills storage layout; sparse also writes skill_values (default: $SKILLS_LAYOUT or wide)")
+    args = parser.parse_args()
+    if args.skills_layout not in SKILLS_LAYOUTS:
+        parser.error(f"unknown skills layout: {args.skills_layout}")
+    if args.dry_run and not args.sync:
+        parser.error("--dry-run is only supported together with --sync")
+
+    if args.sync and args.dry_run:
+        sync_directory(None, args.path, args.manifest, workers=args.workers, dry_run=True,
+                       skills_layout=args.skills_layout)
+        return
+
+    if mysql is None:
+        print("Error: mysql-connector-python is not installed. Please install it using 'pip install mysql-connector-python'")
         sys.exit(1)
 
-    json_file = sys.argv[1]
+    db_config = load_db_config()
 
-    # 获取脚本所在的目录
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    db_config_path = os.path.join(script_dir, 'database.json')
+    if args.sync:
+        sync_directory(db_config, args.path, args.manifest, workers=args.workers,
+                       skills_layout=args.skills_layout)
+        return
 
-    try:
-        with open(db_config_path, 'r', encoding='utf-8') as f:
-            db_config = json.load(f)
-    except Exception as e:
-        print(f"Error reading database config file '{db_config_path}': {e}")
-        sys.exit(1)
+    if os.path.isdir(args.path):
+        bulk_import(db_config, args.path, batch_size=args.batch_size, workers=args.workers,
+                    skills_layout=args.skills_layout)
+        return
 
+    json_file = args.path
     try:
         with open(json_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
@@ -283,6 +668,8 @@ def main():
         generate_players_insert(flat_data),
         generate_skills_insert(flat_data)
     ]
+    if args.skills_layout == 'sparse':
+        sql_statements.extend(generate_skill_values_sql(flat_data))
 
     execute_sql(db_config, sql_statements)
 
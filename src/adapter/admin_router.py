@@ -0,0 +1,55 @@
+"""
+COC 管理接口路由
+提供数据库查询统计与慢查询日志，用于定位对话轮次中的数据库耗时；
+以及每轮提示词各组成部分的 token 估算，用于决定提示词的精简方向
+"""
+
+from fastapi import APIRouter
+import sys
+import os
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from util.query_stats import query_stats
+from util.prompt_profiler import prompt_profiler
+
+router = APIRouter(prefix="/admin", tags=["管理接口"])
+
+
+@router.get('/db/stats')
+def get_db_stats():
+    """获取按 SQL 模板统计的耗时直方图、行数、错误数及连接获取耗时"""
+    return {'success': True, 'data': query_stats.snapshot()}
+
+
+@router.get('/db/slow-queries')
+def get_slow_queries():
+    """获取慢查询日志（最新的在前）"""
+    return {'success': True, 'data': query_stats.slow_queries()}
+
+
+@router.post('/db/reset')
+def reset_db_stats():
+    """清空数据库查询统计"""
+    query_stats.reset()
+    return {'success': True, 'message': '数据库统计已清空'}
+
+
+@router.get('/prompt/tokens')
+def get_prompt_tokens():
+    """获取提示词各组成部分（基础提示词、场景守则、剧本内容、工具定义、对话历史）的 token 分布"""
+    return {'success': True, 'data': prompt_profiler.snapshot()}
+
+
+@router.get('/prompt/tokens/{thread_id}')
+def get_thread_prompt_tokens(thread_id: str):
+    """获取某个记忆线程逐轮的提示词 token 记录"""
+    return {'success': True, 'data': prompt_profiler.thread_turns(thread_id)}
+
+
+@router.post('/prompt/reset')
+def reset_prompt_tokens():
+    """清空提示词 token 记录"""
+    prompt_profiler.reset()
+    return {'success': True, 'message': '提示词统计已清空'}
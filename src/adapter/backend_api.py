@@ -16,6 +16,7 @@ sys.path.insert(0, src_dir)
 from adapter.player_router import router as player_router
 from adapter.chat_router import router as chat_router
 from adapter.auth_router import router as auth_router
+from adapter.admin_router import router as admin_router
 
 app = FastAPI(
     title="COC Backend API",
@@ -35,6 +36,7 @@ app.add_middleware(
 app.include_router(player_router)
 app.include_router(chat_router)
 app.include_router(auth_router)
+app.include_router(admin_router)
 
 
 @app.get('/health')
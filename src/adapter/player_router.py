@@ -14,6 +14,15 @@ from agent.dice.model import DataContainer
 
 router = APIRouter(prefix="/api", tags=["玩家数据"])
 
+# /api/player 摘要需要的字段（不读取背景描述、装备等大字段）
+PLAYER_SUMMARY_FIELDS = [
+    'id', 'name', 'age', 'sex',
+    'strength', 'constitution', 'size', 'dexterity', 'appearance',
+    'education', 'intelligence', 'willpower', 'luck',
+    'hit_points', 'magic_points', 'sanity',
+    'damage_bonus', 'build', 'movement', 'occupation_id'
+]
+
 # 数据库连接实例
 db = DataContainer()
 
@@ -29,13 +38,12 @@ def get_all_chinese_names():
 def get_player(player_id: str):
     """获取玩家基本信息"""
     try:
-        sql = f"SELECT * FROM players WHERE id = '{player_id}'"
-        results = db._execute_query(sql)
+        player_fields = db.get_fields(player_id, PLAYER_SUMMARY_FIELDS)
 
-        if not results:
+        if player_fields is None:
             raise HTTPException(status_code=404, detail='未找到该调查员')
 
-        player = results[0]
+        player = player_fields.model_dump()
         con = player.get('constitution', 0) or 0
         siz = player.get('size', 0) or 0
         pow_val = player.get('willpower', 0) or 0
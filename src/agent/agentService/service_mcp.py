@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Sequence
 import uuid
 import os
 import dice.roll as roll
@@ -9,23 +9,44 @@ import sys
 src_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, src_dir)
 from util.load_txt_with_keyword import TxtKeywordSearch
+from util.passage_retrieval import PassageIndex
+from util.prompt_profiler import normalize_prompt
 
 # 获取项目根目录下的scenes文件夹
 PROJECT_ROOT = os.path.dirname(src_dir)
 DEFAULT_SCENES_DIR = os.path.join(PROJECT_ROOT, "scenes")
 
+# 剧本片段检索的默认值：每轮只放入与对话相关的片段（token 预算为估算值，0 表示始终放入完整剧本）
+# 可用环境变量 SCENE_RETRIEVAL_TOP_K / SCENE_RETRIEVAL_TOKEN_BUDGET 覆盖（创建 ThreadManager 时读取）
+SCENE_RETRIEVAL_TOP_K = 4
+SCENE_RETRIEVAL_TOKEN_BUDGET = 1500
+
+
+def _env_int(name: str, default: int) -> int:
+    """读取整型环境变量，未设置或格式错误时使用默认值"""
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        print(f"环境变量 {name} 格式错误，使用默认值 {default}")
+        return default
+
 
 # 场景信息数据类
 class SceneInfo:
     """存储场景信息"""
-    def __init__(self, scene_name: str, thread_id: str, prompt: str):
+    def __init__(self, scene_name: str, thread_id: str, prompt: str,
+                 scene_content: str = "", passages: Optional[PassageIndex] = None):
         self.scene_name = scene_name
         self.thread_id = thread_id
         self.prompt = prompt
+        self.scene_content = scene_content
+        # 剧本片段索引（进入场景时建立一次）
+        self.passages = passages
 
 
+# 提示词模板在导入时去除代码缩进一次（只处理模板本身，剧本内容原样放入），以换行结尾便于拼接
 # 基础提示词模板（不含退出场景工具，用于主线程）
-BASE_PROMPT = """
+BASE_PROMPT = normalize_prompt("""
             你是一个克苏鲁神话角色扮演游戏(CoC)的智能游戏主持人(GM)。
 
             如有需要，使用以下mcp工具来协助玩家：
@@ -46,16 +67,16 @@ BASE_PROMPT = """
 
             4. **进入新场景 请调用"new_scene"工具**:
             - 当剧本涉及到进入新场景时，根据玩家选择的调查方向调用new_scene，传入的参数为场景名称
-            """
+            """) + "\n"
 
 # 退出场景工具说明（仅用于子场景）
-EXIT_SCENE_TOOL = """
+EXIT_SCENE_TOOL = normalize_prompt("""
             5. **退出当前场景 请调用"exit_scene工具"：
             - 当场景探索完成或玩家要求离开时，请调用 exit_scene 工具返回上一个场景。
-            """
+            """) + "\n"
 
 # 场景指导说明
-SCENE_GUIDANCE = """
+SCENE_GUIDANCE = normalize_prompt("""
             在场景中，请遵循以下守则：
             - 你是一名游戏的主持人
             - 将玩家视为参与该剧本的调查员，而不是剧本外拥有上帝视角的人，根据剧本内容引导玩家，不要一次性给出太多信息，给玩家的信息应当是玩家作为剧本的调查员亲身看到的，听到的，接触到的信息
@@ -63,7 +84,7 @@ SCENE_GUIDANCE = """
             - 专注于描述当前场景的氛围和细节，使玩家身临其境，引导玩家探索场景中的线索，根据玩家的行动推进剧情，已经推进完成或错过的剧情不要再次进行
             - 理解玩家的意图并选择合适的工具
             - 拒绝玩家进行上帝视角的操作（拒绝玩家直接询问还没进行到的剧情，玩家的技能，属性检定必须调用工具，不能跳过检定工具直接要求检定成功）
-            """
+            """) + "\n"
 
 # 完整场景提示词（含退出场景工具）
 SCENE_PROMPT = BASE_PROMPT + EXIT_SCENE_TOOL + SCENE_GUIDANCE
@@ -77,17 +98,43 @@ def get_scene_prompt(scene: str, scene_content: str) -> str:
     :param scene_content: 从txt文件读取的场景内容
     :return: 完整的场景提示词
     """
-    return SCENE_PROMPT + f"""
-            当前场景：{scene}
+    return SCENE_PROMPT + get_scene_section(scene, scene_content)
+
+
+def get_scene_section(scene: str, scene_content: str) -> str:
+    """场景提示词中的剧本部分（剧本内容原样放入，不做缩进处理）"""
+    return f"\n当前场景：{scene}\n\n【场景剧本内容】\n{scene_content}\n"
+
+
+def get_main_prompt(main_content: str) -> str:
+    """
+    根据主线剧本内容生成主线程提示词（不含退出场景工具）
+
+    :param main_content: 主线剧本内容
+    :return: 主线程提示词
+    """
+    return BASE_PROMPT + SCENE_GUIDANCE + get_main_section(main_content)
+
+
+def get_main_section(main_content: str) -> str:
+    """主线程提示词中的剧本部分（剧本内容原样放入，不做缩进处理）"""
+    return f"\n【主线剧本内容】\n{main_content}\n"
+
 
-            【场景剧本内容】
-            {scene_content}
-            """
+# 只放入部分剧本片段时附加的说明
+EXCERPT_NOTE = "（以下为与当前对话最相关的剧本片段，其余部分已省略）\n"
 
 
 # 全局状态管理器（使用栈管理嵌套场景）
 class ThreadManager:
-    def __init__(self, scenes_dir: str = None):
+    def __init__(self, scenes_dir: str = None, retrieval_top_k: Optional[int] = None,
+                 retrieval_token_budget: Optional[int] = None):
+        """
+        :param scenes_dir: 场景文件夹
+        :param retrieval_top_k: 每轮放入提示词的相关剧本片段数，默认读取环境变量 SCENE_RETRIEVAL_TOP_K
+        :param retrieval_token_budget: 剧本片段的估算 token 预算，<= 0 时始终放入完整剧本，
+                                       默认读取环境变量 SCENE_RETRIEVAL_TOKEN_BUDGET
+        """
         if scenes_dir is None:
             scenes_dir = DEFAULT_SCENES_DIR
         self.main_thread_id = str(uuid.uuid4())
@@ -98,6 +145,15 @@ class ThreadManager:
         self.scenes_dir = scenes_dir
         # txt搜索器
         self.txt_search = TxtKeywordSearch(scenes_dir)
+        if retrieval_top_k is None:
+            retrieval_top_k = _env_int("SCENE_RETRIEVAL_TOP_K", SCENE_RETRIEVAL_TOP_K)
+        if retrieval_token_budget is None:
+            retrieval_token_budget = _env_int("SCENE_RETRIEVAL_TOKEN_BUDGET", SCENE_RETRIEVAL_TOKEN_BUDGET)
+        self.retrieval_top_k = retrieval_top_k
+        self.retrieval_token_budget = retrieval_token_budget
+        # 主线剧本内容及其片段索引
+        self.main_content: Optional[str] = None
+        self.main_passages: Optional[PassageIndex] = None
         # 加载主线程提示词
         self.main_prompt = self._load_main_prompt()
 
@@ -112,11 +168,10 @@ class ThreadManager:
         try:
             with open(main_prompt_file, 'r', encoding='utf-8') as f:
                 content = f.read()
+            self.main_content = content
+            self.main_passages = PassageIndex(content)
             # 主线程使用 BASE_PROMPT + SCENE_GUIDANCE（不含退出场景工具）
-            return BASE_PROMPT + SCENE_GUIDANCE + f"""
-            【主线剧本内容】
-            {content}
-            """
+            return get_main_prompt(content)
         except FileNotFoundError:
             return SCENE_PROMPT
 
@@ -189,7 +244,7 @@ class ThreadManager:
         new_prompt = get_scene_prompt(scene, scene_content)
 
         # 创建场景信息并压入栈
-        scene_info = SceneInfo(scene, new_thread_id, new_prompt)
+        scene_info = SceneInfo(scene, new_thread_id, new_prompt, scene_content, PassageIndex(scene_content))
         self.scene_stack.append(scene_info)
 
         # 更新当前线程ID
@@ -219,11 +274,63 @@ class ThreadManager:
             self.current_thread_id = self.main_thread_id
             return (exited_scene.scene_name, "主线程", self.main_thread_id)
 
-    def get_current_prompt(self) -> str:
-        """获取当前应使用的提示词"""
+    def get_current_prompt(self, query: Optional[str] = None, history: Sequence[str] = ()) -> str:
+        """
+        获取当前应使用的提示词
+
+        :param query: 玩家最新的消息，提供时只放入与之相关的剧本片段
+        :param history: 近期的对话内容（辅助检索，权重低于最新消息）
+        :return: 提示词
+        """
+        return "".join(self.get_prompt_components(query, history).values())
+
+    def get_prompt_components(self, query: Optional[str] = None,
+                              history: Sequence[str] = ()) -> Dict[str, str]:
+        """
+        获取当前提示词的各组成部分（按拼接顺序），用于按部分统计 token
+
+        :param query: 玩家最新的消息
+        :param history: 近期的对话内容
+        :return: 组成部分名称 -> 文本，拼接后即为 get_current_prompt() 的结果
+        """
         if self.scene_stack:
-            return self.scene_stack[-1].prompt
-        return self.main_prompt
+            scene_info = self.scene_stack[-1]
+            excerpt = self._select_excerpt(scene_info.passages, query, history)
+            return {
+                'base_prompt': BASE_PROMPT,
+                'exit_scene_tool': EXIT_SCENE_TOOL,
+                'scene_guidance': SCENE_GUIDANCE,
+                'scene_content': get_scene_section(
+                    scene_info.scene_name, scene_info.scene_content if excerpt is None else excerpt),
+            }
+
+        if self.main_content is None:
+            # 未找到主线剧本时主线程使用完整场景提示词
+            return {
+                'base_prompt': BASE_PROMPT,
+                'exit_scene_tool': EXIT_SCENE_TOOL,
+                'scene_guidance': SCENE_GUIDANCE,
+            }
+
+        excerpt = self._select_excerpt(self.main_passages, query, history)
+        return {
+            'base_prompt': BASE_PROMPT,
+            'scene_guidance': SCENE_GUIDANCE,
+            'scene_content': get_main_section(self.main_content if excerpt is None else excerpt),
+        }
+
+    def _select_excerpt(self, passages: Optional[PassageIndex], query: Optional[str],
+                        history: Sequence[str]) -> Optional[str]:
+        """
+        按检索结果选出剧本片段
+
+        :return: 片段内容；未启用检索、没有查询或剧本未超出预算时返回 None（使用完整剧本）
+        """
+        if (passages is None or query is None or self.retrieval_token_budget <= 0
+                or passages.total_tokens <= self.retrieval_token_budget):
+            return None
+        return EXCERPT_NOTE + passages.excerpt(query, history, top_k=self.retrieval_top_k,
+                                               token_budget=self.retrieval_token_budget)
 
 
 class McpService:
@@ -249,14 +356,12 @@ class McpService:
         """
         if self.thread_manager is None:
             # 兼容旧逻辑：直接返回场景内容
+            # 找到第一个命中文件即停止，只计算第一处匹配
             search = TxtKeywordSearch(DEFAULT_SCENES_DIR)
-            results = search.search_files(scene, recursive=True)
+            hit = search.search_first(scene, recursive=True)
             drama = ""
-            for result in results:
-                if result['matches']:
-                    match = result['matches'][0]
-                    drama = match
-                    break
+            if hit is not None and hit.match_count:
+                drama = hit.match(0)
             return drama
 
         # 使用线程管理器进入场景
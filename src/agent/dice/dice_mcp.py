@@ -4,7 +4,7 @@ from typing import Dict, Any, Optional
 
 # Adjust imports to be absolute from the project structure
 import dice.roll as roll
-from dice.model import model
+from dice.model import model, PLAYER_COLUMNS
 # from nonebot_plugin_orangedice import message # message is for formatting, not needed in core logic
 
 class DiceService:
@@ -54,23 +54,20 @@ class DiceService:
         """
         target_value = "0"
         if target_value == "0":
-            # 1. 获取 Pydantic 对象
-            player_obj = model.get_user_card(user_id)
-            skill_obj = model.get_skill_card(user_id)
-            
-            # 2. 将对象转换为字典（model_dump 是 Pydantic V2 的标准方法）
-            card_data = player_obj.model_dump()
-            skill_data = skill_obj.model_dump()
-            
-            # 3. 获取转换后的英文 ID（例如 "力量" -> "strength"）
+            # 1. 获取转换后的英文 ID（例如 "力量" -> "strength"）
             attribute_id = model.get_id(attribute_name)
-            
-            # 4. 现在 card_data 是字典了，可以使用 'in' 进行判断
-            if attribute_id in card_data and card_data[attribute_id] is not None:
-                target_value = card_data[attribute_id]
-            elif attribute_id in skill_data and skill_data[attribute_id] is not None:
-                target_value = skill_data[attribute_id]
-            else:
+
+            # 2. 属性只查询 players 表的对应列，列不存在或为空时再查询技能表
+            target_value = None
+            if attribute_id in PLAYER_COLUMNS:
+                player_fields = model.get_fields(user_id, [attribute_id])
+                if player_fields is not None:
+                    target_value = getattr(player_fields, attribute_id)
+            if target_value is None:
+                skill_data = model.get_skill_card(user_id).model_dump()
+                target_value = skill_data.get(attribute_id)
+
+            if target_value is None:
                 # 如果都没有找到，设为默认值（CoC 默认通常是 0 或 1）
                 target_value = 0
 
@@ -107,12 +104,13 @@ class DiceService:
         :param failure_penalty: 检定失败时理智惩罚的骰子表达式, 例如 "1d6"。
         :return: 包含检定结果、SAN值变化的详细字典。
         """
-        player_obj = model.get_user_card(user_id)
-        card_data = player_obj.model_dump()
         san_id = model.get_id("理智")
-        if san_id is None:
+        if san_id is None or san_id not in PLAYER_COLUMNS:
             return {"success": False, "error": "角色卡中未找到理智属性"}
-        current_san = card_data[san_id]
+        player_fields = model.get_fields(user_id, [san_id])
+        if player_fields is None or getattr(player_fields, san_id) is None:
+            return {"success": False, "error": "未找到该用户的角色卡。"}
+        current_san = getattr(player_fields, san_id)
 
         messages,roll_result = roll.roll("1d100")
         is_success = roll_result <= current_san
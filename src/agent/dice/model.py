@@ -7,13 +7,19 @@ import json
 import os
 import pymysql
 from pydantic import BaseModel, Field, ConfigDict, create_model, field_validator
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Union, Tuple, Type
+from functools import lru_cache
 from decimal import Decimal
 from enum import Enum
 from enum import Enum
 from dotenv import load_dotenv
 from pathlib import Path
 import pymysql
+import sys
+
+# 添加 src 目录到路径以导入 util
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from util.query_stats import query_stats
 
 
 class SexEnum(str, Enum):
@@ -97,6 +103,39 @@ class COCPlayerModel(BaseModel):
         return v
 
 
+# players 表的全部列名
+PLAYER_COLUMNS: Tuple[str, ...] = tuple(COCPlayerModel.model_fields)
+
+
+class PlayerFieldsBase(BaseModel):
+    """角色卡部分字段模型的基类（按列投影读取时使用，所有字段均可选）"""
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator('weapons', 'equipments', 'notes', 'skills', mode='before', check_fields=False)
+    @classmethod
+    def decode_json_string(cls, v: Any) -> Any:
+        if isinstance(v, str):
+            try:
+                return json.loads(v)
+            except (json.JSONDecodeError, TypeError):
+                return v
+        return v
+
+
+@lru_cache(maxsize=None)
+def partial_player_model(fields: Tuple[str, ...]) -> Type[PlayerFieldsBase]:
+    """获取只包含指定字段的轻量角色卡模型（按字段组合缓存）"""
+    unknown = [field for field in fields if field not in COCPlayerModel.model_fields]
+    if unknown:
+        raise ValueError(f"未知的角色卡字段: {', '.join(unknown)}")
+
+    field_definitions = {
+        field: (Optional[COCPlayerModel.model_fields[field].annotation], None)
+        for field in fields
+    }
+    return create_model('COCPlayerFields', __base__=PlayerFieldsBase, **field_definitions)
+
+
 class ChineseNameModel(BaseModel):
     """技能 ID 与中文名称对应模型"""
     model_config = ConfigDict(from_attributes=True)
@@ -158,17 +197,25 @@ class DataContainer:
         if not all([self.host, self.user, self.mysql_pw, self.db, self.port]):
             raise ValueError("数据库配置不完整，请检查 .env 文件")
 
+        # 慢查询阈值（毫秒）和慢查询日志条数，可选
+        try:
+            query_stats.configure(float(os.getenv('DB_SLOW_QUERY_MS', query_stats.slow_threshold_ms)),
+                                  int(os.getenv('DB_SLOW_LOG_SIZE', query_stats.slow_log_size)))
+        except ValueError:
+            print("DB_SLOW_QUERY_MS 或 DB_SLOW_LOG_SIZE 格式错误，使用默认值")
+
     def _get_connection(self):
         """统一获取数据库连接的逻辑"""
-        return pymysql.connect(
-            host=self.host,
-            user=self.user,
-            password=self.mysql_pw,
-            db=self.db,
-            port=int(self.port),
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor  # 关键：返回字典格式
-        )
+        with query_stats.measure_acquire():
+            return pymysql.connect(
+                host=self.host,
+                user=self.user,
+                password=self.mysql_pw,
+                db=self.db,
+                port=int(self.port),
+                charset='utf8mb4',
+                cursorclass=pymysql.cursors.DictCursor  # 关键：返回字典格式
+            )
 
     def _execute_query(self, sql_query: str) -> List[Dict[str, Any]]:
         """执行 SQL 查询并返回字典列表"""
@@ -176,8 +223,11 @@ class DataContainer:
             connection = self._get_connection()
             try:
                 with connection.cursor() as cursor:
-                    cursor.execute(sql_query)
-                    return cursor.fetchall()  # 返回的是 [{}, {}]
+                    with query_stats.measure(sql_query) as measurement:
+                        cursor.execute(sql_query)
+                        rows = cursor.fetchall()  # 返回的是 [{}, {}]
+                        measurement.rows = len(rows)
+                    return rows
             finally:
                 connection.close()
         except Exception as e:
@@ -190,7 +240,8 @@ class DataContainer:
             connection = self._get_connection()
             try:
                 with connection.cursor() as cursor:
-                    cursor.execute(sql_query)
+                    with query_stats.measure(sql_query) as measurement:
+                        measurement.rows = cursor.execute(sql_query)
                 connection.commit()
                 return True
             except Exception as e:
@@ -215,6 +266,24 @@ class DataContainer:
         # 如果没查到，返回带 ID 的默认模型
         return COCPlayerModel(id=user_id)
     
+    def get_fields(self, user_id: str, fields: List[str]) -> Optional[PlayerFieldsBase]:
+        """
+        只读取玩家卡片的指定字段，例如 get_fields(user_id, ["sanity"])
+        :param user_id: 玩家ID
+        :param fields: players 表列名列表
+        :return: 只包含指定字段的轻量模型，未找到玩家时返回 None
+        """
+        columns = tuple(dict.fromkeys(fields))
+        model_cls = partial_player_model(columns)
+
+        column_sql = ', '.join(f"`{column}`" for column in columns)
+        sql_query = f"SELECT {column_sql} FROM players WHERE id = '{user_id}'"
+        results = self._execute_query(sql_query)
+
+        if results:
+            return model_cls.model_validate(results[0])
+        return None
+
     def set_user_card(self, user_id: str, update_data: dict) -> bool:
         """
         动态更新玩家卡片信息
@@ -9,6 +9,7 @@ from pydantic import BaseModel, Field
 from langchain.messages import HumanMessage, AIMessage, SystemMessage
 from langchain.agents.middleware import dynamic_prompt, ModelRequest
 from langgraph.checkpoint.memory import InMemorySaver
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from typing import Optional, Dict, Any
 
 # 导入骰子服务
@@ -19,6 +20,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 
 # 从 service_mcp 导入场景管理相关类
 from src.agent.agentService.service_mcp import ThreadManager, McpService
+# 与 admin_router 使用同一模块路径（src 已由 service_mcp 加入 sys.path），共享同一个记录器
+from util.prompt_profiler import prompt_profiler
 
 # 加载环境变量
 load_dotenv(override=True)
@@ -121,11 +124,75 @@ def exit_scene() -> str:
     return mcp_service.exit_scene()
 
 
+# 参与剧本片段检索的近期历史消息数
+RETRIEVAL_HISTORY_MESSAGES = 4
+
+
+def _message_text(message) -> str:
+    """提取消息中的文本内容（内容为列表时拼接其中的字符串和 text 块）"""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    texts = []
+    for part in content:
+        if isinstance(part, str):
+            texts.append(part)
+        elif isinstance(part, dict):
+            texts.append(part.get("text", ""))
+    return " ".join(text for text in texts if text)
+
+
+# 工具定义（JSON schema）文本缓存：工具名称 -> 序列化后的定义
+_tool_schema_cache: Dict[str, str] = {}
+
+
+def _tool_schema_text(tools) -> str:
+    """获取发送给模型的工具定义文本（用于估算 token）"""
+    texts = []
+    for item in tools or ():
+        name = getattr(item, "name", None) or str(item)
+        text = _tool_schema_cache.get(name)
+        if text is None:
+            try:
+                text = json.dumps(convert_to_openai_tool(item), ensure_ascii=False)
+            except Exception:
+                text = str(item)
+            _tool_schema_cache[name] = text
+        texts.append(text)
+    return "\n".join(texts)
+
+
 # 动态提示词中间件
 @dynamic_prompt
 def dynamic_system_prompt(request: ModelRequest) -> str:
-    """根据当前状态动态返回系统提示词"""
-    return thread_manager.get_current_prompt()
+    """
+    根据当前状态动态返回系统提示词（只放入与玩家最新消息和近期对话相关的剧本片段）
+
+    同时按组成部分估算本次调用的 token 数并记录到 prompt_profiler（以玩家最新消息区分轮次）
+    """
+    messages = [message for message in request.messages if isinstance(message, (HumanMessage, AIMessage))]
+    query = None
+    history = []
+    turn_key = None
+    for position in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[position], HumanMessage):
+            query = _message_text(messages[position])
+            # 同一条玩家消息之后的多次调用（工具调用后再次调用模型）属于同一轮
+            turn_key = messages[position].id or position
+            # 历史只取最新玩家消息之前的对话（之后的工具调用消息不计入，避免重复计算查询）
+            history = [_message_text(message)
+                       for message in messages[max(0, position - RETRIEVAL_HISTORY_MESSAGES):position]]
+            break
+
+    # 模板已在 service_mcp 导入时规整，剧本内容原样放入
+    components = thread_manager.get_prompt_components(query, history)
+    prompt = "".join(components.values())
+
+    profile = dict(components)
+    profile["tools"] = _tool_schema_text(request.tools)
+    profile["history"] = "\n".join(_message_text(message) for message in request.messages)
+    prompt_profiler.record(thread_manager.current_thread_id, profile, turn_key)
+    return prompt
 
 
 # 初始化模型
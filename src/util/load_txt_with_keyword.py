@@ -1,47 +1,237 @@
+import hashlib
 import os
 import re
-import json
-from typing import Dict, List, Any, Optional, Union
+import sys
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple, Union
+
+# 作为脚本直接运行时（python util/load_txt_with_keyword.py）将 src 目录加入路径
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from util.txt_index import BigramIndex
+from util.txt_line_index import LineIndex, LineIndexCache
+from util.txt_mmap_search import MmapKeywordSearch, ByteSearchResult, find_in_file
+from util.txt_search_result import KeywordHit, ConsoleReporter
+from util.txt_exporters import export_json_array, export_jsonl, export_markdown
+
+class DecodedTextCache:
+    """
+    已解码文本缓存
+
+    以文件路径为键，记录 (mtime, size, 编码偏好) 签名、检测到的编码和解码后的文本，
+    签名不变时再次读取只需一次 stat；超过容量时淘汰最久未使用的文件。
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Tuple, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str, signature: Tuple) -> Optional[Tuple[str, str]]:
+        """返回 (编码, 文本)，签名不一致或未缓存时返回None"""
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is None or entry[0] != signature:
+                return None
+            self._entries.move_to_end(file_path)
+            return entry[1], entry[2]
+
+    def put(self, file_path: str, signature: Tuple, encoding: str, text: str):
+        with self._lock:
+            self._entries[file_path] = (signature, encoding, text)
+            self._entries.move_to_end(file_path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class AnalysisCache:
+    """
+    文本分析结果缓存（元数据、场景结构），以内容哈希为键
+    """
+
+    def __init__(self, max_entries: int = 512, recent_keys: int = 8):
+        """
+        参数:
+            max_entries: 缓存的分析结果数
+            recent_keys: 记住最近几个文本对象的哈希（同一个文本对象连续取元数据、结构时只哈希一次）
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._recent_keys: "deque[Tuple[str, str]]" = deque(maxlen=recent_keys)
+        self._lock = threading.Lock()
+
+    def content_key(self, content: str) -> str:
+        """文本内容的哈希（按对象身份记住最近计算过的文本，避免重复哈希整个文件）"""
+        with self._lock:
+            for text, digest in self._recent_keys:
+                if text is content:
+                    return digest
+        digest = hashlib.blake2b(content.encode('utf-8', errors='surrogatepass'), digest_size=16).hexdigest()
+        with self._lock:
+            self._recent_keys.append((content, digest))
+        return digest
+
+    def get(self, kind: str, digest: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get((kind, digest))
+            if result is not None:
+                self._entries.move_to_end((kind, digest))
+            return result
+
+    def put(self, kind: str, digest: str, result: Dict[str, Any]):
+        with self._lock:
+            self._entries[(kind, digest)] = result
+            self._entries.move_to_end((kind, digest))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._recent_keys.clear()
+
+
+# 所有 TxtContentLoader 默认共享的缓存
+shared_text_cache = DecodedTextCache()
+shared_line_index_cache = LineIndexCache()
+shared_analysis_cache = AnalysisCache()
+
+# 对话模式（按优先级排列，与 analyze_scene_structure 结果中的 pattern 字段对应）
+DIALOGUE_PATTERNS = [
+    r'^(.*?)：',           # 中文冒号
+    r'^(.*?):',            # 英文冒号
+    r'^(.*?)「',           # 中文引号
+    r'^(.*?)"',            # 英文引号
+]
+
+# 一次匹配完成分类：前四个分支依次对应 DIALOGUE_PATTERNS，最后一个分支为指令行
+# 交替分支按顺序尝试，因此对话优先于指令，且对话模式的优先级与逐个 re.match 时相同
+_LINE_CLASSIFIER = re.compile(
+    r'^(?:(.*?)：|(.*?):|(.*?)「|(.*?)"|(?P<instruction>【|\[|\*|-|提示|(?i:note)|注意))'
+)
+
 
 class TxtContentLoader:
     """
     加载和解析包含关键字的txt文件内容
     """
 
-    def __init__(self, encoding_preferences=None):
+    def __init__(self, encoding_preferences=None, cache: Optional[DecodedTextCache] = shared_text_cache,
+                 analysis_cache: Optional[AnalysisCache] = shared_analysis_cache):
         """
         初始化加载器
 
         参数:
             encoding_preferences: 编码偏好列表，默认为['utf-8', 'gbk', 'gb2312', 'big5']
+            cache: 已解码文本缓存，默认使用进程内共享缓存，传入None则每次都重新读取
+            analysis_cache: 元数据和结构分析缓存，默认使用进程内共享缓存，传入None则直接计算（不计算摘要）
         """
         if encoding_preferences is None:
             encoding_preferences = ['utf-8', 'gbk', 'gb2312', 'big5']
         self.encoding_preferences = encoding_preferences
+        self.cache = cache
+        self.line_indexes = shared_line_index_cache
+        self.analysis_cache = analysis_cache
 
-    def read_txt_file(self, file_path: str) -> Optional[str]:
+    def line_index(self, content: str) -> LineIndex:
         """
-        读取txt文件，尝试多种编码
+        获取文本的行偏移/段落边界索引（同一文本只建立一次）
 
         参数:
-            file_path: txt文件路径
+            content: 文本内容
 
         返回:
-            文件内容字符串，如果读取失败则返回None
+            LineIndex实例
+        """
+        return self.line_indexes.get(content)
+
+    def _decode(self, file_path: str) -> Optional[Tuple[str, str]]:
         """
+        读取一次文件字节，按编码偏好依次尝试解码
+
+        返回:
+            (编码, 文本)，换行统一为\n；所有编码都失败时返回None
+        """
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        except Exception as e:
+            print(f"读取文件 {file_path} 失败: {e}")
+            return None
+
         for encoding in self.encoding_preferences:
             try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    return f.read()
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                print(f"读取文件 {file_path} 失败 ({encoding}): {e}")
+                text = data.decode(encoding)
+            except (UnicodeDecodeError, LookupError):
                 continue
+            # 与文本模式 open() 的通用换行处理保持一致
+            return encoding, text.replace('\r\n', '\n').replace('\r', '\n')
 
         print(f"无法用任何编码读取文件: {file_path}")
         return None
 
+    def load(self, file_path: str) -> Optional[Tuple[str, str]]:
+        """
+        读取文件并返回 (检测到的编码, 文本)，命中缓存时只需一次 stat
+
+        参数:
+            file_path: txt文件路径
+
+        返回:
+            (编码, 文本)，读取失败返回None
+        """
+        if self.cache is None:
+            return self._decode(file_path)
+
+        try:
+            stat = os.stat(file_path)
+        except OSError as e:
+            print(f"读取文件 {file_path} 失败: {e}")
+            return None
+
+        signature = (stat.st_mtime_ns, stat.st_size, tuple(self.encoding_preferences))
+        cached = self.cache.get(file_path, signature)
+        if cached is not None:
+            return cached
+
+        decoded = self._decode(file_path)
+        if decoded is not None:
+            self.cache.put(file_path, signature, *decoded)
+        return decoded
+
+    def detect_encoding(self, file_path: str) -> Optional[str]:
+        """
+        检测文件编码
+
+        参数:
+            file_path: txt文件路径
+
+        返回:
+            编码偏好列表中第一个能解码该文件的编码，失败返回None
+        """
+        decoded = self.load(file_path)
+        return decoded[0] if decoded else None
+
+    def read_txt_file(self, file_path: str) -> Optional[str]:
+        """
+        读取txt文件，尝试多种编码
+
+        参数:
+            file_path: txt文件路径
+
+        返回:
+            文件内容字符串，如果读取失败则返回None
+        """
+        decoded = self.load(file_path)
+        return decoded[1] if decoded else None
+
     def read_txt_file_lines(self, file_path: str) -> Optional[List[str]]:
         """
         读取txt文件为行列表
@@ -52,18 +242,8 @@ class TxtContentLoader:
         返回:
             文件行列表，如果读取失败则返回None
         """
-        for encoding in self.encoding_preferences:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    return f.readlines()
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                print(f"读取文件 {file_path} 失败 ({encoding}): {e}")
-                continue
-
-        print(f"无法用任何编码读取文件: {file_path}")
-        return None
+        content = self.read_txt_file(file_path)
+        return content.splitlines(keepends=True) if content is not None else None
 
     def extract_content_by_keyword(self, content: str, keyword: str,
                                    context_before: int = 3,
@@ -80,32 +260,25 @@ class TxtContentLoader:
         返回:
             匹配结果列表，每个结果包含行号、关键字和上下文
         """
-        lines = content.split('\n')
+        index = self.line_index(content)
         results = []
 
-        for i, line in enumerate(lines):
-            if keyword in line:
-                # 计算上下文范围
-                start_line = max(0, i - context_before)
-                end_line = min(len(lines), i + context_after + 1)
-
-                # 提取上下文
-                context_lines = lines[start_line:end_line]
-                context = '\n'.join(context_lines)
+        for i in index.find_lines(keyword):
+            # 计算上下文范围
+            start_line = max(0, i - context_before)
+            end_line = min(index.line_count, i + context_after + 1)
 
+            results.append({
+                'line_number': i + 1,
+                'line_content': index.line(i),
+                'context': index.lines_between(start_line, end_line),
                 # 获取段落（空行分隔）
-                paragraph = self.extract_paragraph(lines, i)
-
-                results.append({
-                    'line_number': i + 1,
-                    'line_content': line,
-                    'context': context,
-                    'paragraph': paragraph,
-                    'context_range': {
-                        'start_line': start_line + 1,
-                        'end_line': end_line + 1
-                    }
-                })
+                'paragraph': index.paragraph(i),
+                'context_range': {
+                    'start_line': start_line + 1,
+                    'end_line': end_line + 1
+                }
+            })
 
         return results
 
@@ -142,8 +315,18 @@ class TxtContentLoader:
             content: 文本内容
 
         返回:
-            元数据字典
+            元数据字典（相同内容只计算一次）
         """
+        if self.analysis_cache is None:
+            return self._extract_metadata(content)
+        digest = self.analysis_cache.content_key(content)
+        cached = self.analysis_cache.get('metadata', digest)
+        if cached is None:
+            cached = self._extract_metadata(content)
+            self.analysis_cache.put('metadata', digest, cached)
+        return dict(cached)
+
+    def _extract_metadata(self, content: str) -> Dict[str, Any]:
         metadata = {}
         lines = content.split('\n')[:20]  # 只检查前20行
 
@@ -189,63 +372,77 @@ class TxtContentLoader:
             content: 文本内容
 
         返回:
-            结构分析结果
+            结构分析结果（相同内容只分析一次，每次返回独立的副本，可以修改）
         """
+        if self.analysis_cache is None:
+            return self._analyze_scene_structure(content)
+        digest = self.analysis_cache.content_key(content)
+        cached = self.analysis_cache.get('structure', digest)
+        if cached is None:
+            cached = self._analyze_scene_structure(content)
+            self.analysis_cache.put('structure', digest, cached)
+        return dict(cached,
+                    speakers=list(cached['speakers']),
+                    dialogue_patterns=[dict(pattern) for pattern in cached['dialogue_patterns']])
+
+    def _analyze_scene_structure(self, content: str) -> Dict[str, Any]:
+        """单次遍历、每行一次正则匹配完成结构分析"""
         lines = content.split('\n')
-        analysis = {
-            'dialogue_lines': 0,
-            'description_lines': 0,
-            'instruction_lines': 0,
-            'speakers': set(),
-            'dialogue_patterns': []
-        }
-
-        # 对话模式正则表达式
-        dialogue_patterns = [
-            r'^(.*?)：',           # 中文冒号
-            r'^(.*?):',            # 英文冒号
-            r'^(.*?)「',           # 中文引号
-            r'^(.*?)"',            # 英文引号
-        ]
+        dialogue_lines = 0
+        description_lines = 0
+        instruction_lines = 0
+        speakers: Dict[str, None] = {}
+        dialogue_patterns = []
+        classify = _LINE_CLASSIFIER.match
 
         for line in lines:
             line_stripped = line.strip()
             if not line_stripped:
                 continue
 
-            # 检查是否为对话
-            is_dialogue = False
-            for pattern in dialogue_patterns:
-                match = re.match(pattern, line_stripped)
-                if match:
-                    speaker = match.group(1).strip()
-                    analysis['speakers'].add(speaker)
-                    analysis['dialogue_lines'] += 1
-                    is_dialogue = True
-
-                    # 记录对话模式
-                    analysis['dialogue_patterns'].append({
-                        'speaker': speaker,
-                        'content': line_stripped[len(speaker) + 1:].strip(),
-                        'pattern': pattern
-                    })
-                    break
+            match = classify(line_stripped)
+            if match is None:
+                description_lines += 1
+            elif match.lastgroup == 'instruction':
+                instruction_lines += 1
+            else:
+                group = match.lastindex
+                speaker = match.group(group).strip()
+                speakers[speaker] = None
+                dialogue_lines += 1
+                dialogue_patterns.append({
+                    'speaker': speaker,
+                    'content': line_stripped[len(speaker) + 1:].strip(),
+                    'pattern': DIALOGUE_PATTERNS[group - 1]
+                })
 
-            if not is_dialogue:
-                # 检查是否为指令（以特殊符号开头）
-                if line_stripped.startswith('【') or line_stripped.startswith('[') or \
-                   line_stripped.startswith('*') or line_stripped.startswith('-') or \
-                   line_stripped.lower().startswith('提示') or \
-                   line_stripped.lower().startswith('note') or \
-                   line_stripped.lower().startswith('注意'):
-                    analysis['instruction_lines'] += 1
-                else:
-                    analysis['description_lines'] += 1
+        return {
+            'dialogue_lines': dialogue_lines,
+            'description_lines': description_lines,
+            'instruction_lines': instruction_lines,
+            'speakers': list(speakers),
+            'dialogue_patterns': dialogue_patterns,
+            'total_lines': len(lines),
+        }
+
+
+def analyze_structure_file(file_path: str, encoding_preferences: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    在进程池中执行的结构分析（模块级函数，可被子进程序列化调用）
+    只传入文件路径，由子进程自行读取和解码，不在进程间传递文件内容
 
-        analysis['speakers'] = list(analysis['speakers'])
-        analysis['total_lines'] = len(lines)
+    参数:
+        file_path: 文件路径
+        encoding_preferences: 编码偏好列表（与调用方的加载器一致）
 
-        return analysis
+    返回:
+        结构分析结果，文件无法解码时返回None
+    """
+    loader = TxtContentLoader(encoding_preferences, cache=None, analysis_cache=None)
+    decoded = loader.load(file_path)
+    if decoded is None:
+        return None
+    return loader._analyze_scene_structure(decoded[1])
 
 
 class TxtKeywordSearch:
@@ -253,186 +450,435 @@ class TxtKeywordSearch:
     搜索包含关键字的txt文件并加载内容
     """
 
-    def __init__(self, folder_path: str, loader=None):
+    def __init__(self, folder_path: str, loader=None, use_index: bool = False, backend: str = 'text',
+                 reporter=None):
         """
         初始化搜索器
 
         参数:
             folder_path: 搜索的文件夹路径
             loader: TxtContentLoader实例
+            use_index: 是否使用二元组倒排索引（只处理索引命中的文件，而不是逐个扫描）
+            backend: 未使用索引时的扫描方式，'text' 解码后逐行查找，
+                     'mmap' 内存映射后按字节查找，命中结果的匹配信息也直接从字节片段计算；
+                     不是UTF-8的文件会提示并改为解码后查找（可先用 normalize_encoding 转码）
+            reporter: 结果报告器（如 ConsoleReporter），每找到一个文件调用一次 report()，默认不输出
         """
+        if backend not in ('text', 'mmap'):
+            raise ValueError(f"不支持的搜索后端: {backend}")
         self.folder_path = folder_path
         self.loader = loader if loader else TxtContentLoader()
+        self.use_index = use_index
+        self.backend = backend
+        self.index: Optional[BigramIndex] = None
+        self.mmap_search = MmapKeywordSearch(folder_path)
+        self.reporter = reporter
+
+    def search_bytes(self, keyword: str, recursive: bool = True) -> List[ByteSearchResult]:
+        """
+        按字节查找关键字，不解码文件内容
+
+        参数:
+            keyword: 查找的关键字
+            recursive: 是否递归搜索子文件夹
+
+        返回:
+            每个命中文件的 ByteSearchResult，命中行内容和上下文在访问时才读取
+        """
+        return self.mmap_search.search(keyword, recursive)
+
+    def build_index(self) -> BigramIndex:
+        """
+        建立或增量更新倒排索引
+
+        返回:
+            BigramIndex实例
+        """
+        if self.index is None:
+            self.index = BigramIndex(self.folder_path, self.loader)
+        self.index.refresh()
+        return self.index
+
+    def search_ranked(self, keywords: Union[str, List[str]], top_k: Optional[int] = None,
+                      require_all: bool = False) -> List[Dict[str, Any]]:
+        """
+        使用倒排索引进行多关键字查询，按 BM25 得分排序
+
+        参数:
+            keywords: 关键字或关键字列表（字符串按空白拆分）
+            top_k: 只返回前 k 个文件
+            require_all: 是否要求文件包含全部关键字
+
+        返回:
+            排序后的结果列表，包含文件路径、得分和每个关键字命中的行号
+        """
+        return self.build_index().search(keywords, top_k=top_k, require_all=require_all)
 
-    def search_files(self, keyword: str, recursive: bool = True) -> List[Dict[str, Any]]:
+    def search_files(self, keyword: str, recursive: bool = True, max_workers: int = 0) -> List[KeywordHit]:
         """
         搜索包含关键字的txt文件
 
         参数:
             keyword: 查找的关键字
             recursive: 是否递归搜索子文件夹
+            max_workers: 大于0时使用线程池并发读取和匹配（结果顺序与串行搜索相同）
 
         返回:
-            搜索结果列表，包含文件信息和匹配内容
+            KeywordHit 列表，内容、匹配上下文、元数据和结构分析在访问时才计算
         """
-        results = []
+        if max_workers > 0:
+            return list(self.iter_hits_parallel(keyword, recursive, max_workers=max_workers, ordered=True))
+        return list(self.iter_hits(keyword, recursive))
+
+    def search_first(self, keyword: str, recursive: bool = True) -> Optional[KeywordHit]:
+        """
+        返回第一个包含关键字的文件，找到后立即停止遍历
+
+        参数:
+            keyword: 查找的关键字
+            recursive: 是否递归搜索子文件夹
+
+        返回:
+            KeywordHit，未找到时返回None
+        """
+        return next(self.iter_hits(keyword, recursive), None)
 
+    def iter_hits(self, keyword: str, recursive: bool = True) -> Iterator[KeywordHit]:
+        """
+        逐个产生包含关键字的文件结果
+
+        参数:
+            keyword: 查找的关键字
+            recursive: 是否递归搜索子文件夹
+        """
         # 检查文件夹是否存在
         if not os.path.exists(self.folder_path):
             print(f"错误: 文件夹 '{self.folder_path}' 不存在")
-            return results
+            return
+
+        if self.use_index:
+            # 只处理索引中确认包含关键字的文件，命中行直接取自索引
+            found = self.build_index().find_lines(keyword)
+            for file_path in sorted(found):
+                if recursive or os.path.dirname(file_path) == os.path.normpath(self.folder_path):
+                    yield self._emit(KeywordHit(file_path, keyword,
+                                                [line_index for line_index, _ in found[file_path]],
+                                                self.loader))
+            return
 
         # 遍历文件
+        process = self._process_bytes if self.backend == 'mmap' else self._process_file
+        for file_path in self._iter_paths(recursive):
+            hit = process(file_path, keyword)
+            if hit is not None:
+                yield self._emit(hit)
+
+    def iter_hits_parallel(self, keyword: str, recursive: bool = True,
+                           max_workers: Optional[int] = None,
+                           max_in_flight: Optional[int] = None,
+                           ordered: bool = False,
+                           structure_workers: int = 0) -> Iterator[KeywordHit]:
+        """
+        并发搜索：文件读取和匹配分发到线程池，结果在完成后立即产生
+
+        同一时刻最多只有 max_in_flight 个文件在处理中，文件列表按需遍历，
+        内存占用与文件总数无关；调用方提前停止迭代时未开始的任务会被取消。
+
+        参数:
+            keyword: 查找的关键字
+            recursive: 是否递归搜索子文件夹
+            max_workers: 线程数，默认 min(32, CPU核数 + 4)
+            max_in_flight: 处理中文件数上限，默认线程数的4倍
+            ordered: 是否按遍历顺序产生结果（与 iter_hits 顺序相同），否则按完成顺序
+            structure_workers: 大于0时在进程池中分析命中文件的结构：命中结果产生后在调用方线程按文件路径提交，
+                               不阻塞搜索线程，结果随 KeywordHit.structure 返回
+        """
+        if not os.path.exists(self.folder_path):
+            print(f"错误: 文件夹 '{self.folder_path}' 不存在")
+            return
+
+        if self.use_index:
+            # 倒排索引已经直接给出命中文件，无需并发扫描
+            yield from self.iter_hits(keyword, recursive)
+            return
+
+        max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        max_in_flight = max(max_in_flight or max_workers * 4, 1)
+        paths = self._iter_paths(recursive)
+        pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='txt-search')
+        structure_pool = ProcessPoolExecutor(max_workers=structure_workers) if structure_workers > 0 else None
+        # 已提交结构分析的搜索任务
+        analyzed = set()
+
+        def submit_more(pending):
+            for file_path in paths:
+                future = pool.submit(self._locate, file_path, keyword)
+                if ordered:
+                    pending.append(future)
+                else:
+                    pending.add(future)
+                if len(pending) >= max_in_flight:
+                    break
+
+        def analyze(futures):
+            # 为已完成的搜索任务提交结构分析（只提交一次）
+            if structure_pool is None:
+                return
+            for future in futures:
+                if future in analyzed or not future.done() or future.cancelled() or future.exception() is not None:
+                    continue
+                analyzed.add(future)
+                hit = future.result()
+                if hit is not None:
+                    hit.structure_future = structure_pool.submit(
+                        analyze_structure_file, hit.file_path, self.loader.encoding_preferences)
+
+        exhausted = False
+        try:
+            if ordered:
+                pending = deque()
+                submit_more(pending)
+                while pending:
+                    head = pending.popleft()
+                    hit = head.result()
+                    submit_more(pending)
+                    # 按顺序等待队首时，后面已完成的文件也先提交结构分析
+                    analyze([head])
+                    analyze(pending)
+                    analyzed.discard(head)
+                    if hit is not None:
+                        yield self._emit(hit)
+            else:
+                pending = set()
+                submit_more(pending)
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    submit_more(pending)
+                    analyze(done)
+                    for future in done:
+                        analyzed.discard(future)
+                        hit = future.result()
+                        if hit is not None:
+                            yield self._emit(hit)
+            exhausted = True
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            if structure_pool is not None:
+                # 正常结束时等待已提交的结构分析完成；调用方提前停止时取消未开始的分析
+                structure_pool.shutdown(wait=True, cancel_futures=not exhausted)
+
+    def _iter_paths(self, recursive: bool) -> Iterator[str]:
+        """按遍历顺序产生文件夹中的txt文件路径"""
         if recursive:
             for root, dirs, files in os.walk(self.folder_path):
                 for file in files:
                     if file.endswith('.txt'):
-                        self._process_file(os.path.join(root, file), keyword, results)
+                        yield os.path.join(root, file)
         else:
             for file in os.listdir(self.folder_path):
                 if file.endswith('.txt'):
-                    self._process_file(os.path.join(self.folder_path, file), keyword, results)
+                    yield os.path.join(self.folder_path, file)
 
-        return results
+    def _locate(self, file_path: str, keyword: str) -> Optional[KeywordHit]:
+        """
+        并发搜索的工作函数（在线程池中执行，只定位命中行）
+
+        参数:
+            file_path: 文件路径
+            keyword: 关键字
+        """
+        if self.backend == 'mmap':
+            return self._process_bytes(file_path, keyword)
+        return self._process_file(file_path, keyword)
+
+    def _process_bytes(self, file_path: str, keyword: str) -> Optional[KeywordHit]:
+        """
+        mmap 后端处理单个文件：按字节查找，命中行号和匹配信息都来自映射的字节，不解码整个文件
 
-    def _process_file(self, file_path: str, keyword: str, results: List[Dict[str, Any]]):
+        参数:
+            file_path: 文件路径
+            keyword: 关键字
+
+        返回:
+            KeywordHit，不包含关键字或映射失败时返回None；文件不是UTF-8时改用 _process_file
+        """
+        try:
+            if not self.mmap_search.matches_encoding(file_path):
+                return self._process_file(file_path, keyword)
+            byte_hits = find_in_file(file_path, keyword, self.mmap_search.encoding)
+        except (OSError, ValueError) as e:
+            print(f"映射文件 {file_path} 失败: {e}")
+            return None
+        if not byte_hits:
+            return None
+        return KeywordHit.from_byte_hits(file_path, keyword, byte_hits, self.loader)
+
+    def _process_file(self, file_path: str, keyword: str) -> Optional[KeywordHit]:
         """
-        处理单个文件
+        处理单个文件：只定位命中行，不提取上下文、元数据和结构
 
         参数:
             file_path: 文件路径
             keyword: 关键字
-            results: 结果列表（会直接修改）
+
+        返回:
+            KeywordHit，文件读取失败或不包含关键字时返回None
         """
         content = self.loader.read_txt_file(file_path)
-        if content is None:
-            return
+        if content is None or keyword not in content:
+            return None
 
-        if keyword in content:
-            # 提取匹配信息
-            matches = self.loader.extract_content_by_keyword(content, keyword)
-
-            if matches:
-                # 提取元数据
-                metadata = self.loader.extract_metadata(content)
-
-                # 分析结构
-                structure = self.loader.analyze_scene_structure(content)
-
-                # 构建结果
-                result = {
-                    'file_path': file_path,
-                    'file_name': os.path.basename(file_path),
-                    'file_dir': os.path.dirname(file_path),
-                    'keyword': keyword,
-                    'matches': matches,
-                    'metadata': metadata,
-                    'structure': structure,
-                    'full_content': content  # 包含完整内容
-                }
-
-                results.append(result)
+        line_indexes = self.loader.line_index(content).find_lines(keyword)
+        if not line_indexes:
+            return None
+        return KeywordHit(file_path, keyword, line_indexes, self.loader)
 
-                # 打印摘要
-                self._print_summary(result)
+    def _emit(self, hit: KeywordHit) -> KeywordHit:
+        """在调用方线程中交给报告器输出"""
+        if self.reporter is not None:
+            self.reporter.report(hit)
+        return hit
 
-    def _print_summary(self, result: Dict[str, Any]):
+    def save_results(self, results: Iterable[Any], output_path: str, include_content: bool = True):
         """
-        打印结果摘要
+        将搜索结果保存为JSON文件（逐块写出，不在内存中拼接整个文档）
 
         参数:
-            result: 搜索结果
+            results: 搜索结果列表或迭代器（如 iter_hits 的返回值）
+            output_path: 输出文件路径
+            include_content: 是否包含每个文件的完整内容
         """
-        print(f"\n{'='*60}")
-        print(f"文件: {result['file_name']}")
-        print(f"路径: {result['file_path']}")
+        export_json_array(results, output_path, include_content=include_content)
 
-        if result['metadata'].get('title'):
-            print(f"标题: {result['metadata']['title']}")
-
-        print(f"包含关键字 '{result['keyword']}' {len(result['matches'])} 处")
+        print(f"\n结果已保存到: {output_path}")
 
-        for i, match in enumerate(result['matches'], 1):
-            print(f"\n匹配 {i} (第 {match['line_number']} 行):")
-            print(f"内容: {match['line_content']}")
-            print(f"上下文:")
-            print("-" * 40)
-            print(match['context'])
-            print("-" * 40)
+    def save_results_jsonl(self, results: Iterable[Any], output_path: str, include_content: bool = False) -> int:
+        """
+        将搜索结果保存为 JSON Lines 文件（每行一个文件的结果）
 
-        # 打印结构信息
-        if result['structure']['speakers']:
-            print(f"\n场景对话参与者: {', '.join(result['structure']['speakers'])}")
+        参数:
+            results: 搜索结果列表或迭代器
+            output_path: 输出文件路径
+            include_content: 是否包含每个文件的完整内容
 
-        print(f"\n统计:")
-        print(f"  总行数: {result['metadata']['total_lines']}")
-        print(f"  对话行: {result['structure']['dialogue_lines']}")
-        print(f"  描述行: {result['structure']['description_lines']}")
-        print(f"  指令行: {result['structure']['instruction_lines']}")
-        print('='*60)
+        返回:
+            写出的结果数
+        """
+        count = export_jsonl(results, output_path, include_content=include_content)
+        print(f"\n结果已保存到: {output_path}")
+        return count
 
-    def save_results(self, results: List[Dict[str, Any]], output_path: str):
+    def export_to_markdown(self, results: Iterable[Any], output_path: str):
         """
-        将搜索结果保存为JSON文件
+        将搜索结果导出为Markdown文档（逐个结果写出）
 
         参数:
-            results: 搜索结果列表
+            results: 搜索结果列表或迭代器
             output_path: 输出文件路径
         """
-        # 转换set为list以便JSON序列化
-        for result in results:
-            if isinstance(result.get('structure', {}).get('speakers'), set):
-                result['structure']['speakers'] = list(result['structure']['speakers'])
+        export_markdown(results, output_path, folder_path=self.folder_path)
+
+        print(f"\nMarkdown报告已保存到: {output_path}")
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+    def iter_library_records(self, recursive: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        逐个产生文件夹中每个txt文件的概况（编码、元数据、结构统计）
+        每个文件只读取一次，不写入已解码文本缓存和分析缓存，导出大型场景库不会挤出搜索用的缓存
 
-        print(f"\n结果已保存到: {output_path}")
+        参数:
+            recursive: 是否递归遍历子文件夹
+        """
+        if not os.path.exists(self.folder_path):
+            print(f"错误: 文件夹 '{self.folder_path}' 不存在")
+            return
 
-    def export_to_markdown(self, results: List[Dict[str, Any]], output_path: str):
+        loader = TxtContentLoader(self.loader.encoding_preferences, cache=None, analysis_cache=None)
+        for file_path in self._iter_paths(recursive):
+            decoded = loader.load(file_path)
+            if decoded is None:
+                yield {'file_path': file_path, 'file_name': os.path.basename(file_path), 'error': '无法解码'}
+                continue
+            encoding, content = decoded
+            structure = loader.analyze_scene_structure(content)
+            structure.pop('dialogue_patterns', None)
+            yield {
+                'file_path': file_path,
+                'file_name': os.path.basename(file_path),
+                'encoding': encoding,
+                'metadata': loader.extract_metadata(content),
+                'structure': structure,
+            }
+
+    def export_library(self, output_path: str, recursive: bool = True) -> int:
         """
-        将搜索结果导出为Markdown文档
+        导出整个场景库的概况（JSON Lines，逐个文件写出，内存占用与文件数无关）
 
         参数:
-            results: 搜索结果列表
             output_path: 输出文件路径
+            recursive: 是否递归遍历子文件夹
+
+        返回:
+            写出的文件数
         """
-        markdown_content = f"# 搜索结果报告\n\n"
-        markdown_content += f"**搜索关键字**: {results[0]['keyword'] if results else 'N/A'}\n\n"
-        markdown_content += f"**搜索文件夹**: {self.folder_path}\n\n"
-        markdown_content += f"**找到文件数**: {len(results)}\n\n"
+        count = export_jsonl(self.iter_library_records(recursive), output_path)
+        print(f"\n场景库概况已保存到: {output_path}（{count} 个文件）")
+        return count
 
-        for result in results:
-            markdown_content += f"## {result['file_name']}\n\n"
-            markdown_content += f"**路径**: `{result['file_path']}`\n\n"
 
-            if result['metadata'].get('title'):
-                markdown_content += f"**标题**: {result['metadata']['title']}\n\n"
+def normalize_encoding(folder_path: str, recursive: bool = True, dry_run: bool = False,
+                       loader: Optional[TxtContentLoader] = None) -> Dict[str, str]:
+    """
+    将文件夹中的txt文件统一转码为UTF-8（一次性操作，之后读取无需再尝试多种编码）
 
-            markdown_content += f"**包含关键字 '{result['keyword']}' {len(result['matches'])} 处**\n\n"
+    文件只做编码转换，换行符保持不变；写入临时文件后替换原文件。
 
-            for i, match in enumerate(result['matches'], 1):
-                markdown_content += f"### 匹配 {i} (第 {match['line_number']} 行)\n\n"
-                markdown_content += f"**内容**: `{match['line_content']}`\n\n"
-                markdown_content += f"**上下文**:\n\n```\n{match['context']}\n```\n\n"
+    参数:
+        folder_path: 文件夹路径
+        recursive: 是否包含子文件夹
+        dry_run: 只报告需要转码的文件，不修改
+        loader: TxtContentLoader实例（决定编码检测顺序）
 
-            markdown_content += f"**段落内容**:\n\n```\n{result['matches'][0]['paragraph'] if result['matches'] else 'N/A'}\n```\n\n"
+    返回:
+        {文件路径: 原编码}，只包含需要（或已经）转码的文件
+    """
+    loader = loader or TxtContentLoader(cache=None)
+    converted = {}
 
-            markdown_content += f"**结构分析**:\n\n"
-            markdown_content += f"- 总行数: {result['metadata']['total_lines']}\n"
-            markdown_content += f"- 对话行: {result['structure']['dialogue_lines']}\n"
-            markdown_content += f"- 描述行: {result['structure']['description_lines']}\n"
-            markdown_content += f"- 指令行: {result['structure']['instruction_lines']}\n"
+    if recursive:
+        paths = [os.path.join(root, name) for root, dirs, names in os.walk(folder_path) for name in names]
+    else:
+        paths = [os.path.join(folder_path, name) for name in os.listdir(folder_path)]
 
-            if result['structure']['speakers']:
-                markdown_content += f"- 参与者: {', '.join(result['structure']['speakers'])}\n"
+    for file_path in sorted(path for path in paths if path.endswith('.txt')):
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        encoding = None
+        for candidate in loader.encoding_preferences:
+            try:
+                text = data.decode(candidate)
+            except (UnicodeDecodeError, LookupError):
+                continue
+            encoding = candidate
+            break
 
-            markdown_content += "\n---\n\n"
+        if encoding is None:
+            print(f"无法识别编码，跳过: {file_path}")
+            continue
+        if encoding.replace('-', '').lower() in ('utf8', 'utf8sig') and not data.startswith(b'\xef\xbb\xbf'):
+            continue
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
+        converted[file_path] = encoding
+        if dry_run:
+            print(f"需要转码 ({encoding} -> utf-8): {file_path}")
+            continue
 
-        print(f"\nMarkdown报告已保存到: {output_path}")
+        tmp_path = file_path + '.utf8.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(text.lstrip('\ufeff').encode('utf-8'))
+        os.replace(tmp_path, file_path)
+        print(f"已转码 ({encoding} -> utf-8): {file_path}")
+
+    return converted
 
 
 def main():
@@ -446,8 +892,8 @@ def main():
     print(f"正在加载文件夹 '{folder_path}' 中包含关键字 '{keyword}' 的txt文件...")
     print("=" * 80)
 
-    # 创建搜索器
-    search = TxtKeywordSearch(folder_path)
+    # 创建搜索器（打印每个文件的摘要）
+    search = TxtKeywordSearch(folder_path, reporter=ConsoleReporter())
 
     # 搜索文件
     results = search.search_files(keyword, recursive=True)
@@ -508,4 +954,11 @@ def quick_search(folder_path, keyword, output_json=None, output_md=None):
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # python load_txt_with_keyword.py normalize <文件夹> [--dry-run]：将场景库统一转码为UTF-8
+    # python load_txt_with_keyword.py audit <文件夹> <输出.jsonl>：导出整个场景库的概况
+    if len(sys.argv) > 2 and sys.argv[1] == 'normalize':
+        normalize_encoding(sys.argv[2], dry_run='--dry-run' in sys.argv[3:])
+    elif len(sys.argv) > 3 and sys.argv[1] == 'audit':
+        TxtKeywordSearch(sys.argv[2]).export_library(sys.argv[3])
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,204 @@
+"""
+剧本片段检索
+将剧本按段落切分为片段，用字符二元组建立 BM25 倒排表，按玩家最新消息和近期对话
+选出相关片段放入提示词，并提供不依赖分词器的 token 估算（prompt_profiler 也使用）
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from util.txt_index import text_bigrams
+
+# 中日韩字符（大致每个字符一个 token）
+_CJK_PATTERN = re.compile(r'[　-〿㐀-䶿一-鿿豈-﫿＀-￯]')
+# 段落分隔：一个或多个空白行
+_PARAGRAPH_SPLIT = re.compile(r'\n[ \t　]*\n')
+# 查询中去除的标点和空白
+_QUERY_NOISE = re.compile(r'[\s\W_]+')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的 token 数（不依赖分词器）
+
+    中日韩字符按每字1个 token 计，其余字符按每4个字符1个 token 计。
+
+    参数:
+        text: 文本
+
+    返回:
+        估算的 token 数
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def split_passages(text: str, max_tokens: int = 300) -> List[str]:
+    """
+    将剧本按段落（空行分隔）切分为片段，超长段落再按行切分
+
+    参数:
+        text: 剧本文本
+        max_tokens: 单个片段的最大估算 token 数
+
+    返回:
+        片段列表（保持原文顺序，已去除首尾空白）
+    """
+    passages = []
+    for paragraph in _PARAGRAPH_SPLIT.split(text.replace('\r\n', '\n')):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            passages.append(paragraph)
+            continue
+
+        chunk: List[str] = []
+        chunk_tokens = 0
+        for line in paragraph.split('\n'):
+            line_tokens = estimate_tokens(line)
+            if chunk and chunk_tokens + line_tokens > max_tokens:
+                passages.append('\n'.join(chunk).strip())
+                chunk, chunk_tokens = [], 0
+            chunk.append(line)
+            chunk_tokens += line_tokens
+        if chunk:
+            passages.append('\n'.join(chunk).strip())
+    return [passage for passage in passages if passage]
+
+
+def query_terms(text: str) -> List[str]:
+    """将查询文本切分为二元组（去除标点和空白，分段切分避免跨标点的二元组）"""
+    terms = []
+    for segment in _QUERY_NOISE.split(text):
+        terms.extend(text_bigrams(segment))
+    return terms
+
+
+class PassageIndex:
+    """
+    单个剧本的片段级 BM25 索引（字符二元组，无需网络和分词器）
+
+    每个场景进入时建立一次，之后每轮对话按玩家最新消息和近期历史
+    选出相关片段，在 token 预算内按原文顺序拼接。
+    """
+
+    def __init__(self, text: str, max_passage_tokens: int = 300, k1: float = 1.2, b: float = 0.75):
+        """
+        建立索引
+
+        参数:
+            text: 剧本文本
+            max_passage_tokens: 单个片段的最大估算 token 数
+            k1, b: BM25 参数
+        """
+        self.passages = split_passages(text, max_passage_tokens)
+        self.passage_tokens = [estimate_tokens(passage) for passage in self.passages]
+        self.total_tokens = sum(self.passage_tokens)
+        self.k1 = k1
+        self.b = b
+        # 二元组 -> {片段序号: 出现次数}
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.lengths: List[int] = []
+        for position, passage in enumerate(self.passages):
+            terms = query_terms(passage)
+            self.lengths.append(len(terms))
+            for term, count in Counter(terms).items():
+                self.postings[term][position] = count
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 1
+
+    def __len__(self) -> int:
+        return len(self.passages)
+
+    def score(self, query: str) -> Dict[int, float]:
+        """
+        计算查询与各片段的 BM25 得分
+
+        参数:
+            query: 查询文本
+
+        返回:
+            {片段序号: 得分}，只包含得分大于0的片段
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        total = len(self.passages)
+        for term, query_count in Counter(query_terms(query)).items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, tf in postings.items():
+                length_norm = 1 - self.b + self.b * self.lengths[position] / (self.avg_length or 1)
+                scores[position] += query_count * idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+        return scores
+
+    def select(self, query: str = '', history: Sequence[str] = (), top_k: int = 4,
+               token_budget: int = 1500, history_weight: float = 0.5,
+               pinned: Iterable[int] = (0,)) -> List[str]:
+        """
+        选出与当前对话相关的片段
+
+        参数:
+            query: 玩家最新的消息
+            history: 近期的对话内容（权重低于最新消息）
+            top_k: 最多选出的相关片段数（不含固定片段）
+            token_budget: 选出片段的估算 token 总数上限
+            history_weight: 历史对话得分的权重
+            pinned: 始终包含的片段序号（默认包含开头片段，通常是场景概述）
+
+        返回:
+            按原文顺序排列的片段列表；剧本本身不超过预算时返回全部片段
+        """
+        if self.total_tokens <= token_budget:
+            return list(self.passages)
+
+        scores = self.score(query) if query else {}
+        for text in history:
+            for position, value in self.score(text).items():
+                scores[position] = scores.get(position, 0.0) + history_weight * value
+
+        chosen: List[int] = []
+        used = 0
+
+        def take(position: int) -> bool:
+            nonlocal used
+            if position in chosen or used + self.passage_tokens[position] > token_budget:
+                return False
+            chosen.append(position)
+            used += self.passage_tokens[position]
+            return True
+
+        for position in pinned:
+            if 0 <= position < len(self.passages):
+                take(position)
+
+        ranked: List[Tuple[int, float]] = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        selected = 0
+        for position, _ in ranked:
+            if selected >= top_k:
+                break
+            if take(position):
+                selected += 1
+
+        if not ranked:
+            # 没有可用的查询时按原文顺序填充预算
+            for position in range(len(self.passages)):
+                take(position)
+
+        return [self.passages[position] for position in sorted(chosen)]
+
+    def excerpt(self, query: str = '', history: Sequence[str] = (), top_k: int = 4,
+                token_budget: int = 1500, separator: str = '\n\n……\n\n') -> str:
+        """
+        选出相关片段并拼接为提示词中的剧本内容
+
+        参数同 select()；未选出全部片段时，片段之间以省略号分隔
+        """
+        passages = self.select(query, history, top_k=top_k, token_budget=token_budget)
+        if len(passages) == len(self.passages):
+            return '\n\n'.join(passages)
+        return separator.join(passages)
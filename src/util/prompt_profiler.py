@@ -0,0 +1,148 @@
+"""
+提示词 token 分析
+每次模型调用前按组成部分（基础提示词、场景守则、剧本内容、工具定义、对话历史等）
+估算 token 数，按线程和轮次记录，并汇总各部分的分布，供 /admin/prompt 接口查看。
+一轮对应玩家的一条消息，同一轮中工具调用之后的再次调用计为子调用，不计为新的轮次
+"""
+
+import re
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional
+
+from util.passage_retrieval import estimate_tokens
+
+# 行首的空格/制表符（提示词模板中为了代码对齐而带入的缩进；全角空格属于正文排版，保留）
+_LEADING_INDENT = re.compile(r'^[ \t]+', re.MULTILINE)
+_TRAILING_SPACE = re.compile(r'[ \t]+$', re.MULTILINE)
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    去除提示词模板中的代码缩进和多余空行
+
+    只用于代码中定义的模板常量（会去掉每行行首的空格），不要用于剧本等正文内容。
+
+    参数:
+        prompt: 提示词模板
+
+    返回:
+        规整后的提示词
+    """
+    prompt = _LEADING_INDENT.sub('', prompt)
+    prompt = _TRAILING_SPACE.sub('', prompt)
+    return _BLANK_LINES.sub('\n\n', prompt).strip()
+
+
+def _percentile(sorted_values: List[int], p: float) -> int:
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+class PromptProfiler:
+    """线程安全的提示词 token 记录器"""
+
+    def __init__(self, max_turns_per_thread: int = 200, max_samples: int = 1000):
+        """
+        参数:
+            max_turns_per_thread: 每个线程保留的最近轮次数
+            max_samples: 每个组成部分用于计算分布的最近样本数
+        """
+        self.max_turns_per_thread = max_turns_per_thread
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._threads: Dict[str, deque] = {}
+        self._turn_counts: Dict[str, int] = {}
+        # 线程ID -> 当前轮次的键（玩家最新消息的ID或位置）
+        self._turn_keys: Dict[str, Hashable] = {}
+        self._samples: Dict[str, deque] = {}
+
+    def record(self, thread_id: str, components: Dict[str, str],
+               turn_key: Optional[Hashable] = None) -> Dict[str, Any]:
+        """
+        记录一次模型调用的提示词组成
+
+        参数:
+            thread_id: 记忆线程ID
+            components: 组成部分名称 -> 文本
+            turn_key: 本次调用所属轮次的键（如玩家最新消息的ID），与上一次调用相同时计为同一轮的子调用；
+                      为 None 时每次调用都是新的一轮
+
+        返回:
+            本轮记录（首次调用各部分的估算 token 数及总数，本轮的调用次数和累计 token 数）
+        """
+        tokens = {name: estimate_tokens(text) for name, text in components.items()}
+        total = sum(tokens.values())
+        with self._lock:
+            turns = self._threads.get(thread_id)
+            if turns is None:
+                turns = self._threads[thread_id] = deque(maxlen=self.max_turns_per_thread)
+            if turn_key is not None and turns and self._turn_keys.get(thread_id) == turn_key:
+                # 同一轮的子调用：只累计调用次数和 token 数，分布中每轮只计入首次调用
+                entry = turns[-1]
+                entry['calls'] += 1
+                entry['calls_total'] += total
+                return dict(entry)
+
+            turn = self._turn_counts.get(thread_id, 0) + 1
+            self._turn_counts[thread_id] = turn
+            self._turn_keys[thread_id] = turn_key
+            entry = {
+                'turn': turn,
+                'timestamp': datetime.now().isoformat(),
+                'tokens': tokens,
+                'total': total,
+                'calls': 1,
+                'calls_total': total,
+            }
+            turns.append(entry)
+
+            for name, value in list(tokens.items()) + [('total', entry['total'])]:
+                samples = self._samples.get(name)
+                if samples is None:
+                    samples = self._samples[name] = deque(maxlen=self.max_samples)
+                samples.append(value)
+        return dict(entry)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取各组成部分的 token 分布（按平均值从高到低排序）及每个线程的轮次数"""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+            threads = {
+                thread_id: {'turns': self._turn_counts[thread_id], 'last': dict(turns[-1]) if turns else None}
+                for thread_id, turns in self._threads.items()
+            }
+
+        components = []
+        for name, values in samples.items():
+            components.append({
+                'component': name,
+                'count': len(values),
+                'avg': round(sum(values) / len(values), 1) if values else 0.0,
+                'min': values[0] if values else 0,
+                'p50': _percentile(values, 0.5),
+                'p95': _percentile(values, 0.95),
+                'max': values[-1] if values else 0,
+            })
+        components.sort(key=lambda item: item['avg'], reverse=True)
+        return {'components': components, 'threads': threads}
+
+    def thread_turns(self, thread_id: str) -> List[Dict[str, Any]]:
+        """获取某个线程的逐轮记录（最早的在前）"""
+        with self._lock:
+            return [dict(entry) for entry in self._threads.get(thread_id, ())]
+
+    def reset(self):
+        """清空所有记录"""
+        with self._lock:
+            self._threads.clear()
+            self._turn_counts.clear()
+            self._turn_keys.clear()
+            self._samples.clear()
+
+
+# 全局记录器
+prompt_profiler = PromptProfiler()
@@ -0,0 +1,195 @@
+"""
+数据库查询统计
+按 SQL 模板（字面量替换为 ?）记录耗时直方图、返回行数、错误次数和连接获取耗时，
+超过阈值的查询进入环形慢查询日志，供 /admin/db 接口查看
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List
+
+# 耗时直方图分桶上限（毫秒），最后一个桶收集所有更慢的查询
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def sql_template(sql_query: str) -> str:
+    """将 SQL 中的字符串和数字字面量替换为 ?，得到语句模板"""
+    template = _STRING_LITERAL.sub("?", sql_query)
+    template = _NUMBER_LITERAL.sub("?", template)
+    return _WHITESPACE.sub(" ", template).strip()
+
+
+class LatencyHistogram:
+    """固定分桶的耗时直方图"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, duration_ms: float, rows: int = 0, error: bool = False):
+        self.count += 1
+        self.rows += rows
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        if error:
+            self.errors += 1
+        for i, upper in enumerate(LATENCY_BUCKETS_MS):
+            if duration_ms <= upper:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def percentile(self, p: float) -> float:
+        """按分桶估算百分位耗时（返回所在桶的上限）"""
+        if not self.count:
+            return 0.0
+        target = self.count * p
+        seen = 0
+        for i, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={upper}ms" for upper in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'rows': self.rows,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'histogram': dict(zip(labels, self.buckets)),
+        }
+
+
+class _Measurement:
+    """measure() 上下文中由调用方填写返回行数"""
+    rows = 0
+
+
+class QueryStats:
+    """线程安全的查询统计收集器"""
+
+    def __init__(self, slow_threshold_ms: float = 100.0, slow_log_size: int = 100):
+        """
+        参数:
+            slow_threshold_ms: 慢查询阈值（毫秒）
+            slow_log_size: 慢查询日志保留条数
+        """
+        self.slow_threshold_ms = slow_threshold_ms
+        self.slow_log_size = slow_log_size
+        self._lock = threading.Lock()
+        self._templates: Dict[str, LatencyHistogram] = {}
+        self._acquire = LatencyHistogram()
+        self._slow_log = deque(maxlen=slow_log_size)
+
+    def configure(self, slow_threshold_ms: float, slow_log_size: int):
+        """
+        修改慢查询阈值和日志条数（读取配置后调用，已记录的慢查询保留最新的部分）
+
+        参数:
+            slow_threshold_ms: 慢查询阈值（毫秒）
+            slow_log_size: 慢查询日志保留条数
+        """
+        with self._lock:
+            self.slow_threshold_ms = slow_threshold_ms
+            if slow_log_size != self.slow_log_size:
+                self.slow_log_size = slow_log_size
+                self._slow_log = deque(self._slow_log, maxlen=slow_log_size)
+
+    @contextmanager
+    def measure(self, sql_query: str):
+        """统计一条语句的执行耗时，语句抛出异常时计为错误"""
+        measurement = _Measurement()
+        start = time.perf_counter()
+        error = False
+        try:
+            yield measurement
+        except Exception:
+            error = True
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            self.record(sql_query, duration_ms, measurement.rows, error)
+
+    @contextmanager
+    def measure_acquire(self):
+        """统计获取数据库连接的耗时"""
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._acquire.add(duration_ms, error=error)
+
+    def record(self, sql_query: str, duration_ms: float, rows: int = 0, error: bool = False):
+        """记录一条语句的执行结果"""
+        template = sql_template(sql_query)
+        with self._lock:
+            histogram = self._templates.get(template)
+            if histogram is None:
+                histogram = self._templates[template] = LatencyHistogram()
+            histogram.add(duration_ms, rows, error)
+
+            if duration_ms >= self.slow_threshold_ms:
+                self._slow_log.append({
+                    'timestamp': datetime.now().isoformat(),
+                    'template': template,
+                    'sql': sql_query[:500],
+                    'duration_ms': round(duration_ms, 3),
+                    'rows': rows,
+                    'error': error,
+                })
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取当前统计（按总耗时从高到低排序）"""
+        with self._lock:
+            templates = [
+                {'template': template, **histogram.to_dict()}
+                for template, histogram in self._templates.items()
+            ]
+            acquire = self._acquire.to_dict()
+        templates.sort(key=lambda item: item['total_ms'], reverse=True)
+        return {
+            'slow_threshold_ms': self.slow_threshold_ms,
+            'connection_acquire': acquire,
+            'queries': templates,
+        }
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        """获取慢查询日志（最新的在前）"""
+        with self._lock:
+            return list(reversed(self._slow_log))
+
+    def reset(self):
+        """清空所有统计"""
+        with self._lock:
+            self._templates.clear()
+            self._acquire = LatencyHistogram()
+            self._slow_log.clear()
+
+
+# 全局统计实例（DataContainer 加载 .env 后按 DB_SLOW_QUERY_MS / DB_SLOW_LOG_SIZE 调用 configure）
+query_stats = QueryStats()
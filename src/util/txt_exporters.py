@@ -0,0 +1,170 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sized, TextIO
+
+
+def result_record(result: Any, include_content: bool = True) -> Dict[str, Any]:
+    """
+    将单个搜索结果转换为可序列化的字典
+
+    参数:
+        result: KeywordHit 或结果字典
+        include_content: 是否包含 full_content
+
+    返回:
+        结果字典（speakers 集合转换为列表）
+    """
+    if hasattr(result, 'to_dict'):
+        record = result.to_dict(include_content=include_content)
+    else:
+        record = dict(result)
+        if not include_content:
+            record.pop('full_content', None)
+
+    structure = record.get('structure')
+    if isinstance(structure, dict) and isinstance(structure.get('speakers'), set):
+        record['structure'] = dict(structure, speakers=list(structure['speakers']))
+    return record
+
+
+def export_jsonl(results: Iterable[Any], output_path: str, include_content: bool = False) -> int:
+    """
+    以 JSON Lines 格式逐条写出结果（每行一个 JSON 对象）
+
+    参数:
+        results: 结果迭代器（可以是 iter_hits 等生成器，不会整体保存在内存中）
+        output_path: 输出文件路径
+        include_content: 是否包含每个文件的完整内容
+
+    返回:
+        写出的结果数
+    """
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result_record(result, include_content), ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def export_json_array(results: Iterable[Any], output_path: str, include_content: bool = True,
+                      chunk_size: int = 64, indent: Optional[int] = 2) -> int:
+    """
+    以 JSON 数组格式分块写出结果
+
+    每次只序列化 chunk_size 条结果后写入文件；indent=2 时输出与 json.dump(list, indent=2) 相同。
+
+    参数:
+        results: 结果迭代器
+        output_path: 输出文件路径
+        include_content: 是否包含每个文件的完整内容
+        chunk_size: 每次写入的结果数
+        indent: 缩进空格数，None 表示紧凑格式
+
+    返回:
+        写出的结果数
+    """
+    prefix = ' ' * indent if indent is not None else ''
+    separator = ',\n' if indent is not None else ','
+    count = 0
+    chunk: List[str] = []
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for result in results:
+            text = json.dumps(result_record(result, include_content), ensure_ascii=False, indent=indent)
+            if indent is not None:
+                text = prefix + text.replace('\n', '\n' + prefix)
+            chunk.append(text)
+            count += 1
+            if len(chunk) >= chunk_size:
+                _write_array_chunk(f, chunk, separator, count - len(chunk), indent)
+                chunk = []
+        if chunk:
+            _write_array_chunk(f, chunk, separator, count - len(chunk), indent)
+        if count and indent is not None:
+            f.write('\n')
+        f.write(']')
+    return count
+
+
+def _write_array_chunk(f: TextIO, chunk: List[str], separator: str, written: int, indent: Optional[int]):
+    if written:
+        f.write(separator)
+    elif indent is not None:
+        f.write('\n')
+    f.write(separator.join(chunk))
+
+
+def write_markdown_result(f: TextIO, result: Any):
+    """写出单个结果的 Markdown 段落"""
+    metadata = result['metadata']
+    structure = result['structure']
+    matches = result['matches']
+
+    f.write(f"## {result['file_name']}\n\n")
+    f.write(f"**路径**: `{result['file_path']}`\n\n")
+
+    if metadata.get('title'):
+        f.write(f"**标题**: {metadata['title']}\n\n")
+
+    f.write(f"**包含关键字 '{result['keyword']}' {len(matches)} 处**\n\n")
+
+    for i, match in enumerate(matches, 1):
+        f.write(f"### 匹配 {i} (第 {match['line_number']} 行)\n\n")
+        f.write(f"**内容**: `{match['line_content']}`\n\n")
+        f.write(f"**上下文**:\n\n```\n{match['context']}\n```\n\n")
+
+    f.write(f"**段落内容**:\n\n```\n{matches[0]['paragraph'] if matches else 'N/A'}\n```\n\n")
+
+    f.write(f"**结构分析**:\n\n")
+    f.write(f"- 总行数: {metadata['total_lines']}\n")
+    f.write(f"- 对话行: {structure['dialogue_lines']}\n")
+    f.write(f"- 描述行: {structure['description_lines']}\n")
+    f.write(f"- 指令行: {structure['instruction_lines']}\n")
+
+    if structure['speakers']:
+        f.write(f"- 参与者: {', '.join(structure['speakers'])}\n")
+
+    f.write("\n---\n\n")
+
+
+def export_markdown(results: Iterable[Any], output_path: str, folder_path: str = '',
+                    keyword: Optional[str] = None) -> int:
+    """
+    以 Markdown 报告格式逐条写出结果
+
+    结果为列表等已知长度的集合时在开头写出文件数，否则在报告末尾写出。
+
+    参数:
+        results: 结果迭代器
+        output_path: 输出文件路径
+        folder_path: 搜索的文件夹（写入报告头部）
+        keyword: 搜索关键字，默认取第一个结果的关键字
+
+    返回:
+        写出的结果数
+    """
+    total = len(results) if isinstance(results, Sized) else None
+    iterator = iter(results)
+    first = next(iterator, None)
+    if keyword is None:
+        keyword = first['keyword'] if first is not None else 'N/A'
+
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(f"# 搜索结果报告\n\n")
+        f.write(f"**搜索关键字**: {keyword}\n\n")
+        f.write(f"**搜索文件夹**: {folder_path}\n\n")
+        if total is not None:
+            f.write(f"**找到文件数**: {total}\n\n")
+
+        if first is not None:
+            write_markdown_result(f, first)
+            count += 1
+            for result in iterator:
+                write_markdown_result(f, result)
+                count += 1
+
+        if total is None:
+            f.write(f"**找到文件数**: {count}\n\n")
+    return count
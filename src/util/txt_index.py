@@ -0,0 +1,260 @@
+import math
+import os
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Set, Tuple, Union
+
+
+def text_bigrams(text: str) -> List[str]:
+    """
+    将文本切分为相邻字符二元组（中文无需分词）
+
+    参数:
+        text: 文本
+
+    返回:
+        二元组列表，长度不足2时返回整个文本
+    """
+    if len(text) < 2:
+        return [text] if text else []
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+class IndexedDocument:
+    """
+    已建立索引的文件信息
+    """
+
+    def __init__(self, path: str, mtime: float, size: int, length: int, terms: Set[str]):
+        self.path = path
+        self.mtime = mtime
+        self.size = size
+        # 文档长度（字符数），用于 BM25 长度归一化
+        self.length = length
+        # 文档中出现的二元组，更新/删除文档时用于清理倒排表
+        self.terms = terms
+
+
+class BigramIndex:
+    """
+    txt 文件的字符二元组倒排索引
+
+    倒排表记录每个二元组出现在哪些文件的哪些行（行级 posting），
+    查询时先对关键字的所有二元组求行号交集得到候选行，再在原文中确认，
+    按 BM25 对文件排序。refresh() 只重新索引新增或修改过的文件。
+    """
+
+    def __init__(self, folder_path: str, loader, recursive: bool = True,
+                 k1: float = 1.2, b: float = 0.75):
+        """
+        初始化索引
+
+        参数:
+            folder_path: 索引的文件夹路径
+            loader: TxtContentLoader实例，用于读取文件
+            recursive: 是否包含子文件夹
+            k1, b: BM25 参数
+        """
+        self.folder_path = folder_path
+        self.loader = loader
+        self.recursive = recursive
+        self.k1 = k1
+        self.b = b
+        self.documents: Dict[str, IndexedDocument] = {}
+        # 二元组 -> {文件路径: 行号集合（从0开始）}
+        self.postings: Dict[str, Dict[str, Set[int]]] = defaultdict(dict)
+        self.total_length = 0
+
+    def _list_files(self) -> Dict[str, Tuple[float, int]]:
+        files = {}
+        if not os.path.exists(self.folder_path):
+            return files
+        if self.recursive:
+            paths = (os.path.join(root, name)
+                     for root, dirs, names in os.walk(self.folder_path) for name in names)
+        else:
+            paths = (os.path.join(self.folder_path, name) for name in os.listdir(self.folder_path))
+        for path in paths:
+            if path.endswith('.txt'):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files[path] = (stat.st_mtime, stat.st_size)
+        return files
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        增量更新索引：索引新增和修改的文件，移除已删除的文件
+
+        返回:
+            {'added': 新增数, 'updated': 更新数, 'removed': 移除数}
+        """
+        files = self._list_files()
+        stats = {'added': 0, 'updated': 0, 'removed': 0}
+
+        for path in [path for path in self.documents if path not in files]:
+            self.remove_file(path)
+            stats['removed'] += 1
+
+        for path, (mtime, size) in files.items():
+            document = self.documents.get(path)
+            if document is not None and document.mtime == mtime and document.size == size:
+                continue
+            if self.add_file(path, mtime, size):
+                stats['updated' if document is not None else 'added'] += 1
+
+        return stats
+
+    def add_file(self, path: str, mtime: float = None, size: int = None) -> bool:
+        """
+        索引（或重新索引）单个文件
+
+        返回:
+            是否成功读取并索引
+        """
+        content = self.loader.read_txt_file(path)
+        if content is None:
+            return False
+        if mtime is None or size is None:
+            stat = os.stat(path)
+            mtime, size = stat.st_mtime, stat.st_size
+
+        self.remove_file(path)
+        terms = set()
+        for line_index, line in enumerate(content.split('\n')):
+            for term in text_bigrams(line):
+                self.postings[term].setdefault(path, set()).add(line_index)
+                terms.add(term)
+
+        self.documents[path] = IndexedDocument(path, mtime, size, len(content), terms)
+        self.total_length += len(content)
+        return True
+
+    def remove_file(self, path: str):
+        """从索引中移除文件"""
+        document = self.documents.pop(path, None)
+        if document is None:
+            return
+        self.total_length -= document.length
+        for term in document.terms:
+            term_postings = self.postings.get(term)
+            if term_postings is not None:
+                term_postings.pop(path, None)
+                if not term_postings:
+                    del self.postings[term]
+
+    def candidate_lines(self, keyword: str) -> Dict[str, Optional[Set[int]]]:
+        """
+        根据倒排表找出可能包含关键字的行（尚未在原文中确认）
+
+        返回:
+            {文件路径: 行号集合}，行号集合为 None 表示需要检查整个文件
+        """
+        terms = text_bigrams(keyword)
+        if not terms:
+            return {}
+        if len(keyword) < 2:
+            # 单字关键字没有二元组，退化为所有文件的所有行
+            return {path: None for path in self.documents}
+
+        # 从最稀有的二元组开始求交集
+        term_postings = sorted((self.postings.get(term, {}) for term in set(terms)), key=len)
+        if not term_postings[0]:
+            return {}
+
+        candidates = {path: set(lines) for path, lines in term_postings[0].items()}
+        for postings in term_postings[1:]:
+            for path in list(candidates):
+                lines = postings.get(path)
+                if lines is None:
+                    del candidates[path]
+                    continue
+                candidates[path] &= lines
+                if not candidates[path]:
+                    del candidates[path]
+            if not candidates:
+                break
+        return candidates
+
+    def find_lines(self, keyword: str) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        查找包含关键字的行
+
+        返回:
+            {文件路径: [(行号(从0开始), 该行中出现次数), ...]}
+        """
+        found = {}
+        for path, lines in self.candidate_lines(keyword).items():
+            content = self.loader.read_txt_file(path)
+            if content is None:
+                continue
+            line_index_map = self.loader.line_index(content)
+            line_indexes = sorted(lines) if lines is not None else range(line_index_map.line_count)
+            hits = []
+            for line_index in line_indexes:
+                if line_index < line_index_map.line_count:
+                    count = line_index_map.line(line_index).count(keyword)
+                    if count:
+                        hits.append((line_index, count))
+            if hits:
+                found[path] = hits
+        return found
+
+    def search(self, keywords: Union[str, List[str]], top_k: Optional[int] = None,
+               require_all: bool = False) -> List[Dict[str, Any]]:
+        """
+        多关键字 BM25 排序查询
+
+        参数:
+            keywords: 关键字或关键字列表（字符串按空白拆分）
+            top_k: 只返回得分最高的前 k 个文件
+            require_all: 是否要求文件包含全部关键字
+
+        返回:
+            按得分从高到低排序的结果列表，每项包含 file_path、score 以及每个关键字命中的行号（从1开始）
+        """
+        if isinstance(keywords, str):
+            keywords = keywords.split()
+        keywords = [keyword for keyword in dict.fromkeys(keywords) if keyword]
+        if not keywords or not self.documents:
+            return []
+
+        total_docs = len(self.documents)
+        avg_length = self.total_length / total_docs if total_docs else 1
+        scores: Dict[str, float] = defaultdict(float)
+        hits: Dict[str, Dict[str, List[int]]] = defaultdict(dict)
+
+        for keyword in keywords:
+            found = self.find_lines(keyword)
+            df = len(found)
+            if not df:
+                continue
+            idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+            for path, lines in found.items():
+                tf = sum(count for _, count in lines)
+                length_norm = 1 - self.b + self.b * self.documents[path].length / (avg_length or 1)
+                scores[path] += idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+                hits[path][keyword] = [line_index + 1 for line_index, _ in lines]
+
+        results = []
+        for path, score in scores.items():
+            if require_all and len(hits[path]) < len(keywords):
+                continue
+            results.append({
+                'file_path': path,
+                'file_name': os.path.basename(path),
+                'score': round(score, 6),
+                'keywords': hits[path],
+                'line_numbers': sorted({line for lines in hits[path].values() for line in lines}),
+            })
+
+        results.sort(key=lambda item: (-item['score'], item['file_path']))
+        return results[:top_k] if top_k else results
+
+    def stats(self) -> Dict[str, int]:
+        """索引规模统计"""
+        return {
+            'documents': len(self.documents),
+            'terms': len(self.postings),
+            'total_chars': self.total_length,
+        }
@@ -0,0 +1,132 @@
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import List, Tuple
+
+
+class LineIndex:
+    """
+    文本的行偏移与段落边界索引
+
+    一次性记录每行的起始偏移和所有空行的行号，之后按行号取行、取上下文、
+    取段落都通过 bisect 在 O(log n) 内定位，并直接从原文切片，无需重复 split。
+    """
+
+    __slots__ = ('text', 'line_starts', 'blank_lines')
+
+    def __init__(self, text: str):
+        """
+        建立索引
+
+        参数:
+            text: 文本内容（换行为\\n）
+        """
+        self.text = text
+        line_starts = [0]
+        blank_lines = []
+        position = text.find('\n')
+        while position != -1:
+            line_starts.append(position + 1)
+            position = text.find('\n', position + 1)
+        for line_index, start in enumerate(line_starts):
+            if not text[start:self._end(line_starts, line_index)].strip():
+                blank_lines.append(line_index)
+        # 每行起始偏移（升序）
+        self.line_starts: List[int] = line_starts
+        # 空白行的行号（升序），即段落边界
+        self.blank_lines: List[int] = blank_lines
+
+    def _end(self, line_starts: List[int], line_index: int) -> int:
+        if line_index + 1 < len(line_starts):
+            return line_starts[line_index + 1] - 1
+        return len(self.text)
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_starts)
+
+    def line_of(self, offset: int) -> int:
+        """字符偏移所在的行号（从0开始）"""
+        return bisect_right(self.line_starts, offset) - 1
+
+    def line(self, line_index: int) -> str:
+        """获取单行内容（不含换行符）"""
+        return self.text[self.line_starts[line_index]:self._end(self.line_starts, line_index)]
+
+    def lines_between(self, start_line: int, end_line: int) -> str:
+        """获取 [start_line, end_line) 行的内容，等价于 '\\n'.join(lines[start_line:end_line])"""
+        end_line = min(end_line, self.line_count)
+        if start_line >= end_line:
+            return ''
+        return self.text[self.line_starts[start_line]:self._end(self.line_starts, end_line - 1)]
+
+    def paragraph_range(self, line_index: int) -> Tuple[int, int]:
+        """
+        包含指定行的段落范围（以空行分隔）
+
+        返回:
+            (起始行号, 结束行号)，均包含在段落内
+        """
+        before = bisect_left(self.blank_lines, line_index)
+        start = self.blank_lines[before - 1] + 1 if before > 0 else 0
+        after = bisect_right(self.blank_lines, line_index)
+        end = self.blank_lines[after] - 1 if after < len(self.blank_lines) else self.line_count - 1
+        return start, end
+
+    def paragraph(self, line_index: int) -> str:
+        """包含指定行的段落内容（去除首尾空白）"""
+        start, end = self.paragraph_range(line_index)
+        return self.lines_between(start, end + 1).strip()
+
+    def find_lines(self, keyword: str) -> List[int]:
+        """
+        查找包含关键字的行号（从0开始，每行只出现一次）
+
+        参数:
+            keyword: 关键字（不能跨行）
+        """
+        if not keyword:
+            return list(range(self.line_count))
+        if '\n' in keyword:
+            return []
+
+        lines = []
+        position = self.text.find(keyword)
+        while position != -1:
+            line_index = self.line_of(position)
+            lines.append(line_index)
+            # 同一行只记录一次，直接跳到下一行继续查找
+            next_line = line_index + 1
+            if next_line >= self.line_count:
+                break
+            position = self.text.find(keyword, self.line_starts[next_line])
+        return lines
+
+
+class LineIndexCache:
+    """
+    以文本内容为键的 LineIndex 缓存（同一份缓存文本只建立一次索引）
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, LineIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text: str) -> LineIndex:
+        with self._lock:
+            index = self._entries.get(text)
+            if index is not None:
+                self._entries.move_to_end(text)
+                return index
+
+        index = LineIndex(text)
+        with self._lock:
+            self._entries[text] = index
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,283 @@
+import codecs
+import mmap
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+
+@contextmanager
+def map_file(file_path: str) -> Iterator[Optional[mmap.mmap]]:
+    """
+    以只读方式内存映射文件（空文件返回None）
+
+    参数:
+        file_path: 文件路径
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield None
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mm
+        finally:
+            mm.close()
+
+
+def is_valid_encoding(file_path: str, encoding: str = 'utf-8', chunk_size: int = 1 << 20) -> bool:
+    """
+    检查文件能否按指定编码解码（分块增量解码，不保留解码结果，内存占用与文件大小无关）
+
+    参数:
+        file_path: 文件路径
+        encoding: 编码
+        chunk_size: 每次解码的字节数
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    with map_file(file_path) as mm:
+        if mm is None:
+            return True
+        try:
+            for start in range(0, len(mm), chunk_size):
+                decoder.decode(mm[start:start + chunk_size])
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            return False
+    return True
+
+
+class ByteHit:
+    """
+    一次关键字命中（字节偏移 + 行号）
+
+    行内容、上下文在访问时才重新映射文件并解码对应的字节片段。
+    """
+
+    __slots__ = ('file_path', 'offset', 'line_number', 'encoding')
+
+    def __init__(self, file_path: str, offset: int, line_number: int, encoding: str = 'utf-8'):
+        self.file_path = file_path
+        self.offset = offset
+        # 行号（从1开始）
+        self.line_number = line_number
+        self.encoding = encoding
+
+    @staticmethod
+    def _line_start(mm: mmap.mmap, offset: int) -> int:
+        return mm.rfind(b'\n', 0, offset) + 1
+
+    @staticmethod
+    def _line_end(mm: mmap.mmap, offset: int) -> int:
+        end = mm.find(b'\n', offset)
+        return len(mm) if end == -1 else end
+
+    def _decode(self, data: bytes) -> str:
+        return data.decode(self.encoding, errors='replace').replace('\r', '')
+
+    @property
+    def line_content(self) -> str:
+        """命中所在行的内容"""
+        with map_file(self.file_path) as mm:
+            return self._decode(mm[self._line_start(mm, self.offset):self._line_end(mm, self.offset)])
+
+    def context(self, before: int = 3, after: int = 3) -> str:
+        """
+        获取命中行及其前后若干行
+
+        参数:
+            before: 之前的行数
+            after: 之后的行数
+        """
+        with map_file(self.file_path) as mm:
+            start = self._line_start(mm, self.offset)
+            for _ in range(before):
+                if start == 0:
+                    break
+                start = self._line_start(mm, start - 1)
+
+            end = self._line_end(mm, self.offset)
+            for _ in range(after):
+                if end >= len(mm):
+                    break
+                end = self._line_end(mm, end + 1)
+
+            return self._decode(mm[start:end])
+
+    def match_info(self, before: int = 3, after: int = 3) -> Dict[str, Any]:
+        """
+        一次映射内计算命中行、上下文、所在段落和上下文行号范围
+
+        返回:
+            与 KeywordHit.match() 格式相同的字典（只解码涉及的字节片段）
+        """
+        with map_file(self.file_path) as mm:
+            line_start = self._line_start(mm, self.offset)
+            line_end = self._line_end(mm, self.offset)
+
+            start, taken_before = line_start, 0
+            while taken_before < before and start > 0:
+                start = self._line_start(mm, start - 1)
+                taken_before += 1
+            end, taken_after = line_end, 0
+            while taken_after < after and end < len(mm):
+                end = self._line_end(mm, end + 1)
+                taken_after += 1
+
+            # 段落：向前、向后扩展到空白行为止
+            paragraph_start = line_start
+            while paragraph_start > 0:
+                previous = self._line_start(mm, paragraph_start - 1)
+                if not self._decode(mm[previous:paragraph_start - 1]).strip():
+                    break
+                paragraph_start = previous
+            paragraph_end = line_end
+            while paragraph_end < len(mm):
+                following = self._line_end(mm, paragraph_end + 1)
+                if not self._decode(mm[paragraph_end + 1:following]).strip():
+                    break
+                paragraph_end = following
+
+            line_index = self.line_number - 1
+            return {
+                'line_number': self.line_number,
+                'line_content': self._decode(mm[line_start:line_end]),
+                'context': self._decode(mm[start:end]),
+                'paragraph': self._decode(mm[paragraph_start:paragraph_end]).strip(),
+                'context_range': {
+                    'start_line': line_index - taken_before + 1,
+                    'end_line': line_index + taken_after + 2
+                }
+            }
+
+    def to_dict(self, context_before: int = 3, context_after: int = 3) -> Dict[str, Any]:
+        return {
+            'line_number': self.line_number,
+            'offset': self.offset,
+            'line_content': self.line_content,
+            'context': self.context(context_before, context_after),
+        }
+
+
+class ByteSearchResult:
+    """
+    单个文件的字节级搜索结果
+    """
+
+    def __init__(self, file_path: str, keyword: str, hits: List[ByteHit]):
+        self.file_path = file_path
+        self.file_name = os.path.basename(file_path)
+        self.keyword = keyword
+        self.hits = hits
+
+    def __len__(self) -> int:
+        return len(self.hits)
+
+
+def find_in_file(file_path: str, keyword: str, encoding: str = 'utf-8') -> List[ByteHit]:
+    """
+    在单个文件中查找关键字的所有字节偏移，只为命中位置计算行号
+
+    参数:
+        file_path: 文件路径（需为 encoding 编码，建议先用 normalize_encoding 统一为UTF-8）
+        keyword: 关键字
+        encoding: 文件编码
+
+    返回:
+        ByteHit 列表
+    """
+    needle = keyword.encode(encoding)
+    if not needle:
+        return []
+
+    hits = []
+    with map_file(file_path) as mm:
+        if mm is None:
+            return hits
+        line_number = 1
+        counted_to = 0
+        position = mm.find(needle)
+        while position != -1:
+            # 只统计上一个命中到当前命中之间的换行数
+            line_number += mm[counted_to:position].count(b'\n')
+            counted_to = position
+            hits.append(ByteHit(file_path, position, line_number, encoding))
+            position = mm.find(needle, position + len(needle))
+    return hits
+
+
+class MmapKeywordSearch:
+    """
+    基于内存映射的关键字搜索
+
+    文件不解码为 Python 字符串，直接用 mmap.find 查找关键字的字节序列；
+    内存占用与语料大小无关，多个工作进程共享操作系统页缓存。
+    """
+
+    def __init__(self, folder_path: str, encoding: str = 'utf-8'):
+        """
+        初始化搜索器
+
+        参数:
+            folder_path: 搜索的文件夹路径
+            encoding: 语料文件的编码
+        """
+        self.folder_path = folder_path
+        self.encoding = encoding
+        # 文件路径 -> ((mtime, size), 是否为 encoding 编码)，文件未修改时不重复检查
+        self._encoding_checks: Dict[str, Tuple[Tuple[int, int], bool]] = {}
+
+    def matches_encoding(self, file_path: str) -> bool:
+        """
+        文件是否为搜索器的编码（结果按修改时间和大小缓存；首次发现不匹配时打印提示）
+
+        参数:
+            file_path: 文件路径
+        """
+        stat = os.stat(file_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._encoding_checks.get(file_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        valid = is_valid_encoding(file_path, self.encoding)
+        if not valid:
+            print(f"文件 {file_path} 不是 {self.encoding} 编码，无法按字节查找（可先用 normalize_encoding 转码）")
+        self._encoding_checks[file_path] = (signature, valid)
+        return valid
+
+    def iter_files(self, recursive: bool = True) -> Iterator[str]:
+        """遍历文件夹中的txt文件"""
+        if not os.path.exists(self.folder_path):
+            return
+        if recursive:
+            for root, dirs, files in os.walk(self.folder_path):
+                for file in files:
+                    if file.endswith('.txt'):
+                        yield os.path.join(root, file)
+        else:
+            for file in os.listdir(self.folder_path):
+                if file.endswith('.txt'):
+                    yield os.path.join(self.folder_path, file)
+
+    def search(self, keyword: str, recursive: bool = True) -> List[ByteSearchResult]:
+        """
+        搜索包含关键字的文件
+
+        参数:
+            keyword: 关键字
+            recursive: 是否递归搜索子文件夹
+
+        返回:
+            包含命中的文件结果列表（跳过不是 encoding 编码的文件）
+        """
+        results = []
+        for file_path in self.iter_files(recursive):
+            try:
+                if not self.matches_encoding(file_path):
+                    continue
+                hits = find_in_file(file_path, keyword, self.encoding)
+            except (OSError, ValueError) as e:
+                print(f"映射文件 {file_path} 失败: {e}")
+                continue
+            if hits:
+                results.append(ByteSearchResult(file_path, keyword, hits))
+        return results
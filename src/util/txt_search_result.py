@@ -0,0 +1,213 @@
+import os
+from concurrent.futures import CancelledError
+from typing import Dict, List, Any, Optional, Sequence
+
+
+class KeywordHit:
+    """
+    单个文件的关键字命中结果
+
+    只保存文件路径和命中行号；文件内容、匹配上下文、元数据和结构分析在访问时
+    才通过加载器计算（加载器带有解码缓存和分析缓存，重复访问不会重复读取）。
+    仍支持 result['matches'] 这样的字典式访问，兼容原先返回字典的调用方。
+    """
+
+    __slots__ = ('file_path', 'keyword', 'line_indexes', 'loader',
+                 'context_before', 'context_after', 'byte_hits', 'structure_future', '_matches')
+
+    # 字典式访问可用的键（与原先结果字典的键一致）
+    KEYS = ('file_path', 'file_name', 'file_dir', 'keyword', 'matches',
+            'metadata', 'structure', 'full_content')
+
+    def __init__(self, file_path: str, keyword: str, line_indexes: Sequence[int], loader,
+                 context_before: int = 3, context_after: int = 3, byte_hits: Optional[Sequence] = None):
+        """
+        参数:
+            file_path: 文件路径
+            keyword: 关键字
+            line_indexes: 命中的行号（从0开始，升序）
+            loader: TxtContentLoader实例
+            context_before: 上下文包含的之前行数
+            context_after: 上下文包含的之后行数
+            byte_hits: 与 line_indexes 一一对应的 ByteHit（mmap 后端提供），
+                       提供时匹配信息直接从映射的字节片段计算，不解码整个文件
+        """
+        self.file_path = file_path
+        self.keyword = keyword
+        self.line_indexes = list(line_indexes)
+        self.loader = loader
+        self.context_before = context_before
+        self.context_after = context_after
+        self.byte_hits = list(byte_hits) if byte_hits is not None else None
+        # 并发搜索在进程池中预先计算的结构分析（concurrent.futures.Future），没有时为 None
+        self.structure_future = None
+        self._matches: Optional[List[Dict[str, Any]]] = None
+
+    @classmethod
+    def from_byte_hits(cls, file_path: str, keyword: str, byte_hits: Sequence, loader) -> 'KeywordHit':
+        """
+        由 mmap 查找的 ByteHit 列表创建结果（同一行的多个命中只保留第一个）
+
+        参数:
+            file_path: 文件路径
+            keyword: 关键字
+            byte_hits: find_in_file 的结果（按偏移升序）
+            loader: TxtContentLoader实例（只在访问完整内容、元数据或结构时使用）
+        """
+        first_hits = {}
+        for byte_hit in byte_hits:
+            first_hits.setdefault(byte_hit.line_number - 1, byte_hit)
+        return cls(file_path, keyword, list(first_hits), loader, byte_hits=list(first_hits.values()))
+
+    def __repr__(self) -> str:
+        return f"KeywordHit({self.file_path!r}, {self.keyword!r}, lines={self.line_numbers})"
+
+    @property
+    def file_name(self) -> str:
+        return os.path.basename(self.file_path)
+
+    @property
+    def file_dir(self) -> str:
+        return os.path.dirname(self.file_path)
+
+    @property
+    def line_numbers(self) -> List[int]:
+        """命中的行号（从1开始）"""
+        return [line_index + 1 for line_index in self.line_indexes]
+
+    @property
+    def match_count(self) -> int:
+        return len(self.line_indexes)
+
+    @property
+    def full_content(self) -> str:
+        """文件完整内容（读取失败时为空字符串）"""
+        content = self.loader.read_txt_file(self.file_path)
+        return content if content is not None else ''
+
+    def match(self, position: int) -> Dict[str, Any]:
+        """
+        只计算第 position 个命中的匹配信息
+
+        返回:
+            与 extract_content_by_keyword 的单个结果格式相同的字典
+        """
+        if self._matches is not None:
+            return self._matches[position]
+        if self.byte_hits is not None:
+            return self.byte_hits[position].match_info(self.context_before, self.context_after)
+        index = self.loader.line_index(self.full_content)
+        return self._build_match(index, self.line_indexes[position])
+
+    def _build_match(self, index, line_index: int) -> Dict[str, Any]:
+        start_line = max(0, line_index - self.context_before)
+        end_line = min(index.line_count, line_index + self.context_after + 1)
+        return {
+            'line_number': line_index + 1,
+            'line_content': index.line(line_index),
+            'context': index.lines_between(start_line, end_line),
+            'paragraph': index.paragraph(line_index),
+            'context_range': {
+                'start_line': start_line + 1,
+                'end_line': end_line + 1
+            }
+        }
+
+    @property
+    def matches(self) -> List[Dict[str, Any]]:
+        """所有命中的匹配信息（首次访问时计算）"""
+        if self._matches is None and self.byte_hits is not None:
+            self._matches = [byte_hit.match_info(self.context_before, self.context_after)
+                             for byte_hit in self.byte_hits]
+        if self._matches is None:
+            index = self.loader.line_index(self.full_content)
+            self._matches = [self._build_match(index, line_index)
+                             for line_index in self.line_indexes if line_index < index.line_count]
+        return self._matches
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.loader.extract_metadata(self.full_content)
+
+    @property
+    def structure(self) -> Dict[str, Any]:
+        structure = None
+        if self.structure_future is not None:
+            try:
+                structure = self.structure_future.result()
+            except (CancelledError, Exception):
+                # 分析被取消或子进程失败时在当前进程重新分析
+                structure = None
+        if structure is None:
+            return self.loader.analyze_scene_structure(self.full_content)
+        return dict(structure,
+                    speakers=list(structure['speakers']),
+                    dialogue_patterns=[dict(pattern) for pattern in structure['dialogue_patterns']])
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.KEYS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self.KEYS else default
+
+    def keys(self):
+        return self.KEYS
+
+    def to_dict(self, include_content: bool = True) -> Dict[str, Any]:
+        """
+        转换为原先的结果字典
+
+        参数:
+            include_content: 是否包含 full_content
+        """
+        return {key: getattr(self, key) for key in self.KEYS
+                if include_content or key != 'full_content'}
+
+
+class ConsoleReporter:
+    """
+    将搜索结果摘要打印到终端（传给 TxtKeywordSearch 的 reporter 参数后才会打印）
+    """
+
+    def report(self, result: KeywordHit):
+        """
+        打印结果摘要
+
+        参数:
+            result: 搜索结果
+        """
+        metadata = result.metadata
+        structure = result.structure
+
+        print(f"\n{'='*60}")
+        print(f"文件: {result.file_name}")
+        print(f"路径: {result.file_path}")
+
+        if metadata.get('title'):
+            print(f"标题: {metadata['title']}")
+
+        print(f"包含关键字 '{result.keyword}' {len(result.matches)} 处")
+
+        for i, match in enumerate(result.matches, 1):
+            print(f"\n匹配 {i} (第 {match['line_number']} 行):")
+            print(f"内容: {match['line_content']}")
+            print(f"上下文:")
+            print("-" * 40)
+            print(match['context'])
+            print("-" * 40)
+
+        # 打印结构信息
+        if structure['speakers']:
+            print(f"\n场景对话参与者: {', '.join(structure['speakers'])}")
+
+        print(f"\n统计:")
+        print(f"  总行数: {metadata['total_lines']}")
+        print(f"  对话行: {structure['dialogue_lines']}")
+        print(f"  描述行: {structure['description_lines']}")
+        print(f"  指令行: {structure['instruction_lines']}")
+        print('='*60)
@@ -0,0 +1,40 @@
+"""
+COC 管理接口路由
+提供数据库查询统计与慢查询日志，用于定位对话轮次中的数据库耗时
+"""
+
+from fastapi import APIRouter
+
+from src_test.infrastructure.database.instrumentation import query_stats
+
+router = APIRouter(prefix="/admin", tags=["管理接口"])
+
+
+@router.get('/db/stats')
+def get_db_stats():
+    """获取按 SQL 模板统计的耗时直方图、行数、错误数及连接获取耗时"""
+    return {'success': True, 'data': query_stats.snapshot()}
+
+
+@router.get('/db/slow-queries')
+def get_slow_queries():
+    """获取慢查询日志（最新的在前）"""
+    return {'success': True, 'data': query_stats.slow_queries()}
+
+
+@router.post('/db/reset')
+def reset_db_stats():
+    """清空数据库查询统计"""
+    query_stats.reset()
+    return {'success': True, 'message': '数据库统计已清空'}
+
+
+@router.get('/db/single-flight')
+def get_single_flight_stats():
+    """获取读请求合并统计（实际执行的查询数与被合并的请求数）"""
+    from src_test.infrastructure.database import get_repository
+
+    single_flight = get_repository().single_flight
+    if single_flight is None:
+        return {'success': True, 'data': {'enabled': False}}
+    return {'success': True, 'data': {'enabled': True, **single_flight.stats()}}
@@ -199,6 +199,18 @@ def enter_new_scene(data: NewSceneRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get('/scene/progress')
+def get_scene_progress():
+    """获取当前场景的情节进度"""
+    _, tm, _ = get_agent()
+    progress = tm.current_progress
+    return {
+        'success': True,
+        'current_scene': tm.current_scene,
+        'progress': progress.to_dict() if progress is not None else None
+    }
+
+
 @router.post('/scene/exit')
 def exit_current_scene():
     """退出当前场景（只切换场景，不获取AI描述，让前端通过/send继续对话）"""
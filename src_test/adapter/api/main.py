@@ -5,6 +5,7 @@ COC 跑团游戏后端 API 主入口
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from src_test.adapter.api.admin_router import router as admin_router
 from src_test.adapter.api.auth_router import router as auth_router
 from src_test.adapter.api.chat_router import router as chat_router
 from src_test.adapter.api.player_router import router as player_router
@@ -25,6 +26,26 @@ app.add_middleware(
 app.include_router(player_router)
 app.include_router(chat_router)
 app.include_router(auth_router)
+app.include_router(admin_router)
+
+
+@app.on_event('startup')
+def startup():
+    """服务启动时检查数据库表结构、主键和索引"""
+    from src_test.config import settings
+    from src_test.infrastructure.database import get_repository
+    from src_test.infrastructure.database.schema import startup_check
+    try:
+        startup_check(get_repository().db, auto_migrate=settings.DB_AUTO_MIGRATE)
+    except Exception as e:
+        print(f"[数据库检查] 启动检查失败: {e}")
+
+
+@app.on_event('shutdown')
+def shutdown():
+    """服务关闭时强制写入写回缓冲中的剩余数据"""
+    from src_test.infrastructure.database import close_repository
+    close_repository()
 
 
 @app.get('/health')
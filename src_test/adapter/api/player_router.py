@@ -7,6 +7,15 @@ from fastapi import APIRouter, HTTPException
 
 router = APIRouter(prefix="/api", tags=["玩家数据"])
 
+# /api/player 摘要需要的字段（不读取背景描述、装备等大字段）
+PLAYER_SUMMARY_FIELDS = [
+    'id', 'name', 'age', 'sex',
+    'strength', 'constitution', 'size', 'dexterity', 'appearance',
+    'education', 'intelligence', 'willpower', 'luck',
+    'hit_points', 'magic_points', 'sanity',
+    'damage_bonus', 'build', 'movement', 'occupation_id'
+]
+
 # 延迟加载数据库连接
 _db = None
 
@@ -31,7 +40,7 @@ def get_all_chinese_names():
 def get_player(player_id: str):
     """获取玩家基本信息"""
     try:
-        player = get_db().get_user_card(player_id)
+        player = get_db().get_fields(player_id, PLAYER_SUMMARY_FIELDS)
         if not player or not player.id:
             raise HTTPException(status_code=404, detail='未找到该调查员')
 
@@ -78,27 +87,41 @@ def get_player(player_id: str):
 def get_skills(player_id: str):
     """获取玩家技能信息（数值大于10的技能）"""
     try:
-        skills_data = get_db().get_skill_card(player_id)
-        skills_dict = skills_data.model_dump()
+        skill_vector = get_db().get_skill_vector(player_id)
         chinese_names = get_all_chinese_names()
 
-        filtered_skills = []
-        for key, value in skills_dict.items():
-            if key.startswith('skill_') and value is not None and value > 10:
-                skill_id = key
-                skill_name = chinese_names.get(skill_id, skill_id)
-                filtered_skills.append({
-                    'id': skill_id,
-                    'name': skill_name,
-                    'value': value
-                })
-
-        filtered_skills.sort(key=lambda x: x['value'], reverse=True)
+        filtered_skills = [
+            {
+                'id': skill_id,
+                'name': chinese_names.get(skill_id, skill_id),
+                'value': value
+            }
+            for skill_id, value in skill_vector.filter(10)
+        ]
         return {'success': True, 'data': filtered_skills}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get('/weapons/{player_id}')
+def get_weapons(player_id: str):
+    """获取玩家携带的武器信息"""
+    try:
+        from src_test.domain.weapon_catalog import get_weapon_catalog
+
+        player = get_db().get_fields(player_id, ['weapons'])
+        if not player:
+            raise HTTPException(status_code=404, detail='未找到该调查员')
+
+        catalog = get_weapon_catalog(get_db().get_weapons)
+        weapons = [weapon for weapon in map(catalog.describe, player.weapons or []) if weapon]
+        return {'success': True, 'data': weapons}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get('/chinese_name/{skill_id}')
 def get_chinese_name(skill_id: str):
     """获取单个技能的中文名"""
@@ -0,0 +1,85 @@
+"""
+运行配置
+从 src_test/.env 读取可选的运行开关，未配置时使用默认值
+"""
+
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+# 默认读取 src_test 目录下的 .env 文件
+ENV_PATH = Path(__file__).parent.parent / ".env"
+load_dotenv(ENV_PATH, override=True)
+
+
+def get_bool(name: str, default: bool = False) -> bool:
+    """读取布尔型环境变量（1/true/yes/on 视为开启）"""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def get_int(name: str, default: int) -> int:
+    """读取整型环境变量，格式错误时使用默认值"""
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def get_float(name: str, default: float) -> float:
+    """读取浮点型环境变量，格式错误时使用默认值"""
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# 存储后端：mysql（默认，使用 HOST/USER/MYSQL_PW/DB_NAME/PORT）或 sqlite（嵌入式，无需数据库服务）
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql').strip().lower()
+# SQLite 数据库文件路径，默认为 src_test/data/coc.db
+SQLITE_PATH = os.getenv('SQLITE_PATH') or str(Path(__file__).parent.parent / "data" / "coc.db")
+
+# 技能存储布局：wide（skills 表 108 列）或 sparse（skill_values 表，只存非空技能）
+SKILLS_LAYOUT = os.getenv('SKILLS_LAYOUT', 'wide').strip().lower()
+
+# 合并并发的相同读取（同一玩家、同一张表、同一组列只查询一次）
+DB_SINGLE_FLIGHT = get_bool('DB_SINGLE_FLIGHT', True)
+
+# 启动时自动执行数据库迁移（SQLite 后端总是自动迁移）
+DB_AUTO_MIGRATE = get_bool('DB_AUTO_MIGRATE', False)
+
+# 慢查询阈值（毫秒）及慢查询日志保留条数
+DB_SLOW_QUERY_MS = get_float('DB_SLOW_QUERY_MS', 100.0)
+DB_SLOW_LOG_SIZE = get_int('DB_SLOW_LOG_SIZE', 100)
+
+# 场景目录热加载：轮询 scenes/ 文件变化的间隔（秒），0 表示不监视
+SCENE_RELOAD_INTERVAL = get_float('SCENE_RELOAD_INTERVAL', 2.0)
+# 预编译的场景包路径（python -m src_test.infrastructure.file.scene_bundle build 生成），
+# 设置且与场景文件夹一致时启动直接加载场景包；为空或已过期时读取 scenes/ 文件夹
+SCENE_BUNDLE_PATH = os.getenv('SCENE_BUNDLE_PATH', '').strip()
+# 场景包是否内存映射（多个进程共享只读页面），否则一次读入内存
+SCENE_BUNDLE_MMAP = get_bool('SCENE_BUNDLE_MMAP', True)
+
+# select_scene 给出候选场景后在后台预先准备场景提示词和索引
+SCENE_PREFETCH_ENABLED = get_bool('SCENE_PREFETCH_ENABLED', True)
+# 每个会话缓存的已准备场景数
+SCENE_PREFETCH_CACHE_SIZE = get_int('SCENE_PREFETCH_CACHE_SIZE', 8)
+
+# 场景进度：场景提示词只包含当前情节段落和少量后续段落，关闭时发送完整剧本
+SCENE_BEAT_TRACKING = get_bool('SCENE_BEAT_TRACKING', True)
+# 提示词中附带的后续段落数
+SCENE_BEAT_LOOKAHEAD = get_int('SCENE_BEAT_LOOKAHEAD', 1)
+# 单个情节段落的最大估算 token 数
+SCENE_BEAT_MAX_TOKENS = get_int('SCENE_BEAT_MAX_TOKENS', 200)
+
+# 角色卡写回缓冲（write-behind）
+# 开启后 HP/SAN/MP 等高频更新先在内存中合并，再批量落库
+WRITE_BEHIND_ENABLED = get_bool('WRITE_BEHIND_ENABLED', False)
+# 定时刷新间隔（秒）
+WRITE_BEHIND_INTERVAL = get_float('WRITE_BEHIND_INTERVAL', 2.0)
+# 待写入字段数达到该阈值时立即刷新
+WRITE_BEHIND_MAX_PENDING = get_int('WRITE_BEHIND_MAX_PENDING', 32)
+# 持久化模式：relaxed（合并后批量写入）/ strict（每次更新立即写入）
+WRITE_BEHIND_DURABILITY = os.getenv('WRITE_BEHIND_DURABILITY', 'relaxed').strip().lower()
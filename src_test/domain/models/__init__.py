@@ -2,8 +2,11 @@
 Domain Models - 领域模型
 """
 
-from src_test.domain.models.player import COCPlayerModel, ChineseNameModel, WeaponModel, SexEnum
-from src_test.domain.models.skill import SkillsModel, SkillBase
+from src_test.domain.models.player import (
+    COCPlayerModel, ChineseNameModel, WeaponModel, SexEnum,
+    PlayerFieldsBase, PLAYER_COLUMNS, partial_player_model
+)
+from src_test.domain.models.skill import SkillsModel, SkillBase, SkillVector, SKILL_COLUMNS, SKILL_INDEX
 from src_test.domain.models.scene import SceneInfo
 
 __all__ = [
@@ -11,7 +14,13 @@ __all__ = [
     'ChineseNameModel',
     'WeaponModel',
     'SexEnum',
+    'PlayerFieldsBase',
+    'PLAYER_COLUMNS',
+    'partial_player_model',
     'SkillsModel',
     'SkillBase',
+    'SkillVector',
+    'SKILL_COLUMNS',
+    'SKILL_INDEX',
     'SceneInfo'
 ]
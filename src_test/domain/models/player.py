@@ -4,8 +4,9 @@ COC 玩家角色模型
 """
 
 import json
-from pydantic import BaseModel, Field, ConfigDict, field_validator
-from typing import Optional, List, Dict, Any, Union
+from functools import lru_cache
+from pydantic import BaseModel, Field, ConfigDict, create_model, field_validator
+from typing import Optional, List, Dict, Any, Union, Tuple, Type
 from decimal import Decimal
 from enum import Enum
 
@@ -92,6 +93,47 @@ class COCPlayerModel(BaseModel):
         return v
 
 
+# players 表的全部列名
+PLAYER_COLUMNS: Tuple[str, ...] = tuple(COCPlayerModel.model_fields)
+
+# 以 JSON 字符串存储的列
+PLAYER_JSON_COLUMNS = ('weapons', 'equipments', 'notes', 'skills')
+
+
+class PlayerFieldsBase(BaseModel):
+    """角色卡部分字段模型的基类（按列投影读取时使用，所有字段均可选）"""
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator(*PLAYER_JSON_COLUMNS, mode='before', check_fields=False)
+    @classmethod
+    def decode_json_string(cls, v: Any) -> Any:
+        if isinstance(v, str):
+            try:
+                return json.loads(v)
+            except (json.JSONDecodeError, TypeError):
+                return v
+        return v
+
+
+@lru_cache(maxsize=None)
+def partial_player_model(fields: Tuple[str, ...]) -> Type[PlayerFieldsBase]:
+    """
+    获取只包含指定字段的轻量角色卡模型（按字段组合缓存）
+
+    :param fields: players 表列名元组
+    :return: 动态创建的 Pydantic 模型类
+    """
+    unknown = [field for field in fields if field not in COCPlayerModel.model_fields]
+    if unknown:
+        raise ValueError(f"未知的角色卡字段: {', '.join(unknown)}")
+
+    field_definitions = {
+        field: (Optional[COCPlayerModel.model_fields[field].annotation], None)
+        for field in fields
+    }
+    return create_model('COCPlayerFields', __base__=PlayerFieldsBase, **field_definitions)
+
+
 class ChineseNameModel(BaseModel):
     """技能 ID 与中文名称对应模型"""
     model_config = ConfigDict(from_attributes=True)
@@ -3,9 +3,20 @@ COC 技能模型
 从原 agent/dice/model.py 提取的技能相关模型
 """
 
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
 from pydantic import BaseModel, Field, ConfigDict, create_model
 
 
+# 技能列名 skill_001 ~ skill_108 及其下标（所有 SkillVector 共享）
+SKILL_COLUMNS: Tuple[str, ...] = tuple(f"skill_{i:03d}" for i in range(1, 109))
+SKILL_INDEX: Dict[str, int] = {column: i for i, column in enumerate(SKILL_COLUMNS)}
+
+# int16 中表示“未设置”(NULL) 的哨兵值
+SKILL_MISSING = -32768
+
+
 # 基础模型
 class SkillBase(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -14,8 +25,8 @@ class SkillBase(BaseModel):
 
 # 动态创建技能字段
 skill_fields = {
-    f"skill_{i:03d}": (int | None, Field(default=None, description=f"技能 {i:03d} 数值"))
-    for i in range(1, 109)
+    column: (int | None, Field(default=None, description=f"技能 {column[-3:]} 数值"))
+    for column in SKILL_COLUMNS
 }
 
 # 动态创建技能模型类
@@ -24,3 +35,79 @@ SkillsModel = create_model(
     __base__=SkillBase,
     **skill_fields
 )
+
+
+class SkillVector:
+    """
+    紧凑的技能数值向量
+    用 array('h') 按 SKILL_INDEX 顺序保存 108 个技能值，读写为 O(1)，
+    只在 API 边界通过 to_model() 转换为 SkillsModel
+    """
+
+    __slots__ = ('id', '_values')
+
+    def __init__(self, user_id: str, values: array = None):
+        self.id = user_id
+        self._values = values if values is not None else array('h', [SKILL_MISSING]) * len(SKILL_COLUMNS)
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> 'SkillVector':
+        """从 skills 表的一行数据创建（缺失或 NULL 的列视为未设置）"""
+        values = array('h', (
+            SKILL_MISSING if row.get(column) is None else int(row[column])
+            for column in SKILL_COLUMNS
+        ))
+        return cls(str(row.get('id')), values)
+
+    @classmethod
+    def from_items(cls, user_id: str, items: Iterable[Tuple[str, int]]) -> 'SkillVector':
+        """从 (列名, 数值) 序列创建（稀疏存储读取时使用）"""
+        vector = cls(user_id)
+        for column, value in items:
+            vector.set(column, value)
+        return vector
+
+    def get(self, column: str) -> Optional[int]:
+        """获取技能值，未设置时返回 None"""
+        index = SKILL_INDEX.get(column)
+        if index is None:
+            return None
+        value = self._values[index]
+        return None if value == SKILL_MISSING else value
+
+    def set(self, column: str, value: Optional[int]):
+        """设置技能值，value 为 None 时清除"""
+        self._values[SKILL_INDEX[column]] = SKILL_MISSING if value is None else value
+
+    def __contains__(self, column: str) -> bool:
+        return self.get(column) is not None
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """遍历所有已设置的 (列名, 数值)"""
+        for column, value in zip(SKILL_COLUMNS, self._values):
+            if value != SKILL_MISSING:
+                yield column, value
+
+    def filter(self, min_value: int = 10, sort_desc: bool = True) -> List[Tuple[str, int]]:
+        """
+        筛选数值大于 min_value 的技能
+
+        :param min_value: 下限（不含）
+        :param sort_desc: 是否按数值从高到低排序
+        :return: [(列名, 数值), ...]
+        """
+        selected = [(column, value) for column, value in zip(SKILL_COLUMNS, self._values) if value > min_value]
+        if sort_desc:
+            selected.sort(key=lambda item: item[1], reverse=True)
+        return selected
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为与 SkillsModel.model_dump() 相同结构的字典"""
+        data: Dict[str, Any] = {'id': self.id}
+        for column, value in zip(SKILL_COLUMNS, self._values):
+            data[column] = None if value == SKILL_MISSING else value
+        return data
+
+    def to_model(self) -> SkillsModel:
+        """转换为 Pydantic 模型（数据已是合法整数，跳过重复校验）"""
+        return SkillsModel.model_construct(**self.to_dict())
@@ -0,0 +1,202 @@
+"""
+武器目录
+从原 character/trans.py 的 weapon_map 提取，按规范化名称与别名建立索引，
+供角色卡导入、角色卡接口和战斗逻辑共用（进程内只构建一次）
+
+本模块不依赖 pydantic / 数据库驱动，character/trans.py 可以直接导入
+"""
+
+import threading
+import time
+import unicodedata
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+
+# 内置武器表：武器ID -> 名称（weapons 表不可用时使用）
+DEFAULT_WEAPONS: Dict[str, str] = {
+    "weapon_000": "徒手格斗", "weapon_001": "弓箭", "weapon_002": "指虎", "weapon_003": "长鞭", "weapon_004": "燃烧的火炬",
+    "weapon_005": "电锯", "weapon_006": "包皮铁棍", "weapon_007": "大型棍状物", "weapon_008": "十字弩", "weapon_010": "绞具",
+    "weapon_011": "斧头", "weapon_012": "大型刀具", "weapon_013": "中型刀具", "weapon_014": "小型刀",
+    "weapon_015": "220v通电导线", "weapon_016": "催泪瓦斯", "weapon_018": "抛出的石块", "weapon_019": "苦无",
+    "weapon_020": "矛", "weapon_021": "掷矛", "weapon_022": "大型剑", "weapon_023": "中型剑", "weapon_024": "轻剑",
+    "weapon_025": "电棍", "weapon_026": "泰瑟枪", "weapon_027": "伐木斧", "weapon_029": "燧发枪",
+    "weapon_030": ".22短口自动手枪", "weapon_031": ".25短口手枪(单管)", "weapon_032": ".32自动手枪",
+    "weapon_033": ".32or7.65mm自动手枪", "weapon_034": ".357Magnum左轮手枪", "weapon_035": ".38or9mm左轮手枪",
+    "weapon_037": "贝雷塔M9", "weapon_038": "格洛克179mm自动手枪", "weapon_040": ".41左轮手枪", "weapon_041": ".44马格南左轮手枪",
+    "weapon_042": ".45左轮手枪", "weapon_043": ".45自动手枪", "weapon_045": ".58斯普林菲尔德步枪", "weapon_046": ".22杠杆式步枪",
+    "weapon_047": ".30卡宾枪", "weapon_048": ".45马提尼·亨利步枪", "weapon_050": "加兰德M1、M2步枪", "weapon_051": "SKS半自动步枪",
+    "weapon_052": ".303(7.7mm)李恩菲尔德", "weapon_053": ".30-06(7.62mm)栓式枪机步枪", "weapon_054": ".30-06(7.62mm)半自动步枪",
+    "weapon_055": ".444(莫兰上校气动步枪)", "weapon_056": "猎象枪(双管)", "weapon_058": "16号霰弹枪(双管)", "weapon_059": "12号霰弹枪",
+    "weapon_060": "12号泵动霰弹枪", "weapon_061": "12号半自动霰弹枪", "weapon_062": "削短12号双管霰弹枪", "weapon_063": "10号霰弹枪(双管)",
+    "weapon_064": "12号贝里尼M3(折叠式枪托)", "weapon_065": "12号SPAS(折叠式)", "weapon_066": "AK-47orAKM",
+    "weapon_067": "AK-74", "weapon_068": "巴雷特M82", "weapon_069": "FNFALLightAutomatic",
+    "weapon_070": "GalilAssale", "weapon_071": "M16A2", "weapon_072": "M4", "weapon_073": "SteyrAUG",
+    "weapon_074": "巴雷特M70/90", "weapon_075": "贝格曼MP181/MP2811", "weapon_076": "Heckler & Koch MP5",
+    "weapon_078": "蝎式冲锋枪", "weapon_079": "汤普森冲锋枪", "weapon_080": "乌兹微型", "weapon_081": "M1882加特林机枪",
+    "weapon_082": "M1918式勃朗宁自动步枪", "weapon_083": "M1917A1式勃朗宁重机枪", "weapon_084": "布伦式轻机枪",
+    "weapon_085": "刘易斯式轻机枪", "weapon_086": "Minigun", "weapon_087": "FNMinimi5.56mm轻机枪",
+    "weapon_088": "维克斯MK1式机枪", "weapon_089": "燃烧瓶", "weapon_090": "信号枪", "weapon_091": "M79榴弹发射器",
+    "weapon_092": "土制炸药", "weapon_093": "冲锋枪", "weapon_094": "管状炸弹", "weapon_095": "塑胶炸弹(C4)",
+    "weapon_096": "手榴弹", "weapon_097": "81mm迫击炮", "weapon_098": "75mm野战炮", "weapon_099": "120mm坦克炮(稳定)",
+    "weapon_100": "5英寸舰载炮(稳定)", "weapon_101": "反步兵地雷", "weapon_102": "阔剑地雷", "weapon_103": "火焰喷射器",
+    "weapon_104": "轻型反坦克武器",
+}
+
+# 常见简称 / 写法 -> 武器ID
+WEAPON_ALIASES: Dict[str, str] = {
+    "徒手": "weapon_000", "拳头": "weapon_000", "斗殴": "weapon_000",
+    "弓": "weapon_001", "火炬": "weapon_004", "火把": "weapon_004", "弩": "weapon_008",
+    "绞索": "weapon_010", "斧": "weapon_011", "小刀": "weapon_014", "匕首": "weapon_014",
+    "石块": "weapon_018", "石头": "weapon_018", "长矛": "weapon_020",
+    ".22自动手枪": "weapon_030", ".25手枪": "weapon_031", "7.65mm自动手枪": "weapon_033",
+    ".357左轮": "weapon_034", ".357马格南左轮手枪": "weapon_034",
+    ".38左轮": "weapon_035", ".38左轮手枪": "weapon_035", "9mm左轮手枪": "weapon_035",
+    "M9": "weapon_037", "格洛克17": "weapon_038", "格洛克": "weapon_038",
+    ".41左轮": "weapon_040", ".44左轮": "weapon_041", ".44马格南": "weapon_041", ".45左轮": "weapon_042",
+    ".45自动": "weapon_043", "M1911": "weapon_043", "卡宾枪": "weapon_047", "M1加兰德": "weapon_050",
+    "加兰德步枪": "weapon_050", "李恩菲尔德步枪": "weapon_052", "猎象枪": "weapon_056",
+    "霰弹枪": "weapon_059", "泵动霰弹枪": "weapon_060", "短管霰弹枪": "weapon_062",
+    "AK47": "weapon_066", "AKM": "weapon_066", "FN FAL": "weapon_069", "加利尔": "weapon_070",
+    "M16": "weapon_071", "M4卡宾枪": "weapon_072", "AUG": "weapon_073",
+    "MP5": "weapon_076", "H&K MP5": "weapon_076", "汤普森": "weapon_079", "芝加哥打字机": "weapon_079",
+    "乌兹": "weapon_080", "UZI": "weapon_080", "加特林": "weapon_081", "BAR": "weapon_082",
+    "勃朗宁自动步枪": "weapon_082", "布伦": "weapon_084", "刘易斯机枪": "weapon_085",
+    "米尼岗": "weapon_086", "M249": "weapon_087", "维克斯机枪": "weapon_088",
+    "莫洛托夫鸡尾酒": "weapon_089", "C4": "weapon_095", "手雷": "weapon_096",
+    "迫击炮": "weapon_097", "地雷": "weapon_101", "M72 LAW": "weapon_104",
+}
+
+
+def normalize_weapon_name(name: str) -> str:
+    """
+    规范化武器名称：全角转半角、统一大小写，去掉空白与标点符号
+    例如 "．３８ 左轮" 与 ".38左轮" 得到相同的键
+    """
+    text = unicodedata.normalize('NFKC', name or '').casefold()
+    return ''.join(
+        ch for ch in text
+        if not unicodedata.category(ch).startswith(('P', 'Z', 'S', 'C'))
+    )
+
+
+class WeaponCatalog:
+    """武器目录：按武器ID和规范化名称 O(1) 查找"""
+
+    def __init__(self, weapons: Mapping[str, Any], aliases: Mapping[str, str] = None):
+        """
+        :param weapons: 武器ID -> 武器数据（WeaponModel、字典或名称字符串）
+        :param aliases: 别名 -> 武器ID，指向不存在的武器的别名会被忽略
+        """
+        self._weapons: Dict[str, Any] = dict(weapons)
+        self._index: Dict[str, str] = {}
+        # 是否包含伤害、射程等数值（内置武器表只有名称）
+        self.has_stats = any(not isinstance(weapon, str) for weapon in self._weapons.values())
+
+        for weapon_id, weapon in self._weapons.items():
+            self._add_key(_weapon_name(weapon), weapon_id)
+        for alias, weapon_id in (aliases or {}).items():
+            if weapon_id in self._weapons:
+                self._add_key(alias, weapon_id)
+
+    def _add_key(self, name: str, weapon_id: str):
+        key = normalize_weapon_name(name)
+        # 名称冲突时保留先登记的（正式名称优先于别名）
+        if key and key not in self._index:
+            self._index[key] = weapon_id
+
+    def lookup_id(self, name: str) -> Optional[str]:
+        """按名称或别名查找武器ID，未找到返回 None"""
+        return self._index.get(normalize_weapon_name(name))
+
+    def get(self, weapon_id: str) -> Optional[Any]:
+        """按武器ID获取武器数据"""
+        return self._weapons.get(weapon_id)
+
+    def find(self, name: str) -> Optional[Any]:
+        """按名称或别名获取武器数据"""
+        weapon_id = self.lookup_id(name)
+        return self._weapons.get(weapon_id) if weapon_id else None
+
+    def name_of(self, weapon_id: str) -> Optional[str]:
+        """获取武器的正式名称"""
+        weapon = self._weapons.get(weapon_id)
+        return _weapon_name(weapon) if weapon is not None else None
+
+    def describe(self, weapon_id: str) -> Optional[Dict[str, Any]]:
+        """获取可直接返回给前端的武器信息字典"""
+        weapon = self._weapons.get(weapon_id)
+        if weapon is None:
+            return None
+        if hasattr(weapon, 'model_dump'):
+            return weapon.model_dump()
+        if isinstance(weapon, Mapping):
+            return dict(weapon)
+        return {'id': weapon_id, 'name': weapon}
+
+    def resolve_ids(self, names: Iterable[str]) -> List[str]:
+        """将一组武器名称转换为武器ID，跳过无法识别的名称"""
+        return [weapon_id for weapon_id in map(self.lookup_id, names) if weapon_id]
+
+    def __contains__(self, weapon_id: str) -> bool:
+        return weapon_id in self._weapons
+
+    def __len__(self) -> int:
+        return len(self._weapons)
+
+
+def _weapon_name(weapon: Any) -> str:
+    if isinstance(weapon, str):
+        return weapon
+    if isinstance(weapon, Mapping):
+        return weapon.get('name', '')
+    return getattr(weapon, 'name', '')
+
+
+# 使用内置武器表后，间隔多少秒再次尝试从 weapons 表加载
+FALLBACK_RETRY_SECONDS = 30.0
+
+_catalog: Optional[WeaponCatalog] = None
+# 当前目录为内置武器表时，下次允许重新加载的时间（time.monotonic）
+_retry_at = 0.0
+_catalog_lock = threading.Lock()
+
+
+def _usable(catalog: Optional[WeaponCatalog], loader: Optional[Callable]) -> bool:
+    """缓存的目录是否可以直接使用：来自 weapons 表，或没有加载函数，或尚未到重试时间"""
+    return catalog is not None and (catalog.has_stats or loader is None or time.monotonic() < _retry_at)
+
+
+def get_weapon_catalog(loader: Callable[[], Iterable[Any]] = None) -> WeaponCatalog:
+    """
+    获取进程内共享的武器目录（首次调用时构建）
+
+    :param loader: 返回 WeaponModel 列表的函数（如 PlayerRepository.get_weapons），
+                   未提供、出错或返回空时使用内置武器表（只有名称）；
+                   内置武器表不会永久缓存，FALLBACK_RETRY_SECONDS 秒后的调用会再次尝试加载
+    """
+    global _catalog, _retry_at
+    catalog = _catalog
+    if _usable(catalog, loader):
+        return catalog
+    with _catalog_lock:
+        if _usable(_catalog, loader):
+            return _catalog
+        weapons: Dict[str, Any] = {}
+        if loader is not None:
+            try:
+                weapons = {weapon.id: weapon for weapon in loader()}
+            except Exception as e:
+                print(f"加载武器表失败，使用内置武器表（{FALLBACK_RETRY_SECONDS:g} 秒后重试）: {e}")
+        if weapons:
+            _catalog = WeaponCatalog(weapons, WEAPON_ALIASES)
+        else:
+            _catalog = WeaponCatalog(DEFAULT_WEAPONS, WEAPON_ALIASES)
+            _retry_at = time.monotonic() + FALLBACK_RETRY_SECONDS
+        return _catalog
+
+
+def reset_weapon_catalog():
+    """清除缓存的武器目录（weapons 表更新后调用）"""
+    global _catalog, _retry_at
+    with _catalog_lock:
+        _catalog = None
+        _retry_at = 0.0
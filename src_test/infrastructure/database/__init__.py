@@ -2,11 +2,24 @@
 Infrastructure Database - 数据库基础设施
 """
 
-from src_test.infrastructure.database.connection import DatabaseConnection
-from src_test.infrastructure.database.repository import PlayerRepository, get_repository
+from src_test.infrastructure.database.connection import DatabaseConnection, create_connection
+from src_test.infrastructure.database.sqlite_connection import SQLiteConnection
+from src_test.infrastructure.database.repository import PlayerRepository, get_repository, close_repository
+from src_test.infrastructure.database.write_behind import WriteBehindBuffer
+from src_test.infrastructure.database.single_flight import SingleFlight
+from src_test.infrastructure.database.instrumentation import QueryStats, query_stats
+from src_test.infrastructure.database.skill_layout import migrate_wide_to_sparse
 
 __all__ = [
     'DatabaseConnection',
+    'SQLiteConnection',
+    'create_connection',
     'PlayerRepository',
-    'get_repository'
+    'get_repository',
+    'close_repository',
+    'WriteBehindBuffer',
+    'SingleFlight',
+    'QueryStats',
+    'query_stats',
+    'migrate_wide_to_sparse'
 ]
@@ -9,10 +9,14 @@ from typing import List, Dict, Any
 from dotenv import load_dotenv
 from pathlib import Path
 
+from src_test.infrastructure.database.instrumentation import query_stats
+
 
 class DatabaseConnection:
     """数据库连接管理类"""
 
+    dialect = "mysql"
+
     def __init__(self, env_path: str = None):
         """
         初始化数据库连接
@@ -36,15 +40,16 @@ class DatabaseConnection:
 
     def get_connection(self):
         """获取数据库连接"""
-        return pymysql.connect(
-            host=self.host,
-            user=self.user,
-            password=self.mysql_pw,
-            db=self.db,
-            port=int(self.port),
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        with query_stats.measure_acquire():
+            return pymysql.connect(
+                host=self.host,
+                user=self.user,
+                password=self.mysql_pw,
+                db=self.db,
+                port=int(self.port),
+                charset='utf8mb4',
+                cursorclass=pymysql.cursors.DictCursor
+            )
 
     def execute_query(self, sql_query: str) -> List[Dict[str, Any]]:
         """执行 SQL 查询并返回字典列表"""
@@ -52,8 +57,11 @@ class DatabaseConnection:
             connection = self.get_connection()
             try:
                 with connection.cursor() as cursor:
-                    cursor.execute(sql_query)
-                    return cursor.fetchall()
+                    with query_stats.measure(sql_query) as measurement:
+                        cursor.execute(sql_query)
+                        rows = cursor.fetchall()
+                        measurement.rows = len(rows)
+                    return rows
             finally:
                 connection.close()
         except Exception as e:
@@ -66,7 +74,8 @@ class DatabaseConnection:
             connection = self.get_connection()
             try:
                 with connection.cursor() as cursor:
-                    cursor.execute(sql_query)
+                    with query_stats.measure(sql_query) as measurement:
+                        measurement.rows = cursor.execute(sql_query)
                 connection.commit()
                 return True
             except Exception as e:
@@ -78,3 +87,40 @@ class DatabaseConnection:
         except Exception as e:
             print(f"数据库连接错误: {e}")
             return False
+
+    def execute_transaction(self, sql_statements: List[str]) -> bool:
+        """在同一个事务中执行多条 SQL 更新语句，全部成功才提交"""
+        try:
+            connection = self.get_connection()
+            try:
+                with connection.cursor() as cursor:
+                    for sql_query in sql_statements:
+                        with query_stats.measure(sql_query) as measurement:
+                            measurement.rows = cursor.execute(sql_query)
+                connection.commit()
+                return True
+            except Exception as e:
+                connection.rollback()
+                print(f"数据库事务错误: {e}")
+                return False
+            finally:
+                connection.close()
+        except Exception as e:
+            print(f"数据库连接错误: {e}")
+            return False
+
+
+def create_connection():
+    """
+    根据配置创建数据库连接
+
+    DB_BACKEND=sqlite 时使用嵌入式 SQLite（SQLITE_PATH），否则使用 MySQL
+    """
+    from src_test.config import settings
+
+    if settings.DB_BACKEND == "sqlite":
+        from src_test.infrastructure.database.sqlite_connection import SQLiteConnection
+        return SQLiteConnection(settings.SQLITE_PATH)
+    if settings.DB_BACKEND != "mysql":
+        raise ValueError(f"未知的存储后端: {settings.DB_BACKEND}")
+    return DatabaseConnection()
@@ -3,39 +3,200 @@
 从原 agent/dice/model.py 提取的数据访问逻辑
 """
 
+import asyncio
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
-from src_test.infrastructure.database.connection import DatabaseConnection
-from src_test.domain.models import COCPlayerModel, SkillsModel
+from src_test.config import settings
+from src_test.infrastructure.database.connection import DatabaseConnection, create_connection
+from src_test.infrastructure.database.write_behind import WriteBehindBuffer
+from src_test.infrastructure.database.single_flight import SingleFlight
+from src_test.infrastructure.database.skill_layout import (
+    SKILLS_LAYOUT_SPARSE, SKILLS_LAYOUTS, select_sparse_sql, skill_column,
+    sparse_update_statements, wide_update_statements
+)
+from src_test.domain.models import (
+    COCPlayerModel, SkillsModel, SkillVector, SKILL_INDEX, PLAYER_COLUMNS, PlayerFieldsBase, WeaponModel,
+    partial_player_model
+)
 
 
 class PlayerRepository:
     """玩家数据仓储"""
 
-    def __init__(self, db_connection: DatabaseConnection = None):
+    def __init__(self, db_connection: DatabaseConnection = None, skills_layout: str = None,
+                 single_flight: bool = None):
         """
         初始化仓储
 
-        :param db_connection: 数据库连接实例
+        :param db_connection: 数据库连接实例（DatabaseConnection 或 SQLiteConnection），默认按配置创建
+        :param skills_layout: 技能存储布局，wide 或 sparse，默认按配置
+        :param single_flight: 是否合并并发的相同读取，默认按配置
         """
-        self.db = db_connection or DatabaseConnection()
+        self.db = db_connection or create_connection()
+        self.skills_layout = skills_layout or settings.SKILLS_LAYOUT
+        if self.skills_layout not in SKILLS_LAYOUTS:
+            raise ValueError(f"不支持的技能存储布局: {self.skills_layout}")
+        if single_flight is None:
+            single_flight = settings.DB_SINGLE_FLIGHT
+        # 读请求合并，记录被合并的请求数
+        self.single_flight: Optional[SingleFlight] = SingleFlight() if single_flight else None
+        # 写回缓冲，调用 enable_write_behind 后启用
+        self.write_buffer: WriteBehindBuffer = None
 
-    def get_user_card(self, user_id: str) -> COCPlayerModel:
-        """获取玩家卡片信息"""
-        sql_query = f"SELECT * FROM players WHERE id = '{user_id}'"
-        results = self.db.execute_query(sql_query)
+    def enable_write_behind(self, interval: float = 2.0, max_pending: int = 32,
+                            durability: str = "relaxed") -> WriteBehindBuffer:
+        """
+        启用角色卡写回缓冲
+
+        :param interval: 定时刷新间隔（秒）
+        :param max_pending: 待写入字段数阈值
+        :param durability: 持久化模式，relaxed 或 strict
+        :return: 写回缓冲实例
+        """
+        if self.write_buffer is None:
+            self.write_buffer = WriteBehindBuffer(
+                self._flush_pending,
+                interval=interval,
+                max_pending=max_pending,
+                durability=durability,
+                columns=PLAYER_COLUMNS,
+                flush_one=self._flush_user
+            )
+            self.write_buffer.start()
+        return self.write_buffer
+
+    def flush_pending(self) -> bool:
+        """立即写入写回缓冲中的全部数据（场景退出时调用）"""
+        if self.write_buffer is None:
+            return True
+        return self.write_buffer.flush()
 
+    def close(self) -> bool:
+        """停止写回缓冲并强制写入剩余数据（服务关闭时调用）"""
+        if self.write_buffer is None:
+            return True
+        return self.write_buffer.close()
+
+    def _read(self, key: Tuple, sql_query: str) -> List[Dict[str, Any]]:
+        """执行读取，启用请求合并时与相同 key 的并发读取共享一次查询"""
+        if self.single_flight is None:
+            return self.db.execute_query(sql_query)
+        return self.single_flight.do(key, lambda: self.db.execute_query(sql_query))
+
+    async def _read_async(self, key: Tuple, sql_query: str) -> List[Dict[str, Any]]:
+        """_read 的 asyncio 版本，查询在线程池中执行"""
+        if self.single_flight is None:
+            return await asyncio.to_thread(self.db.execute_query, sql_query)
+        return await self.single_flight.do_async(key, lambda: self.db.execute_query(sql_query))
+
+    def _forget_reads(self, user_id: str):
+        """写入后不再让新读取合并到写入前发起的查询"""
+        if self.single_flight is not None:
+            self.single_flight.forget(lambda key: key[1] == user_id)
+
+    def _user_card_query(self, user_id: str) -> Tuple[Tuple, str]:
+        return ('players', user_id, '*'), f"SELECT * FROM players WHERE id = '{user_id}'"
+
+    def _to_user_card(self, user_id: str, results: List[Dict[str, Any]]) -> Optional[COCPlayerModel]:
         if results:
-            return COCPlayerModel.model_validate(results[0])
+            row = results[0]
+            if self.write_buffer is not None:
+                # 覆盖尚未落库的新值
+                row = {**row, **self.write_buffer.pending_for(user_id)}
+            return COCPlayerModel.model_validate(row)
 
         return None
 
+    def get_user_card(self, user_id: str) -> COCPlayerModel:
+        """获取玩家卡片信息"""
+        key, sql_query = self._user_card_query(user_id)
+        return self._to_user_card(user_id, self._read(key, sql_query))
+
+    async def get_user_card_async(self, user_id: str) -> COCPlayerModel:
+        """获取玩家卡片信息（asyncio 版本）"""
+        key, sql_query = self._user_card_query(user_id)
+        return self._to_user_card(user_id, await self._read_async(key, sql_query))
+
+    def _fields_query(self, user_id: str, fields: List[str]) -> Tuple[Tuple, str]:
+        columns = tuple(dict.fromkeys(fields))
+        column_sql = ', '.join(f"`{column}`" for column in columns)
+        return ('players', user_id, columns), f"SELECT {column_sql} FROM players WHERE id = '{user_id}'"
+
+    def _to_fields(self, user_id: str, columns: Tuple[str, ...],
+                   results: List[Dict[str, Any]]) -> Optional[PlayerFieldsBase]:
+        if not results:
+            return None
+
+        row = results[0]
+        if self.write_buffer is not None:
+            pending = self.write_buffer.pending_for(user_id)
+            row = {**row, **{column: pending[column] for column in columns if column in pending}}
+        return partial_player_model(columns).model_validate(row)
+
+    def get_fields(self, user_id: str, fields: List[str]) -> Optional[PlayerFieldsBase]:
+        """
+        只读取玩家卡片的指定字段
+
+        例如 get_fields(user_id, ["sanity"]) 只查询 sanity 一列，
+        避免读取背景描述、装备等大字段并运行完整的模型校验。
+
+        :param user_id: 玩家ID
+        :param fields: players 表列名列表
+        :return: 只包含指定字段的轻量模型，未找到玩家时返回 None
+        """
+        key, sql_query = self._fields_query(user_id, fields)
+        # 先校验字段名，未知字段不发起查询
+        partial_player_model(key[2])
+        return self._to_fields(user_id, key[2], self._read(key, sql_query))
+
+    async def get_fields_async(self, user_id: str, fields: List[str]) -> Optional[PlayerFieldsBase]:
+        """只读取玩家卡片的指定字段（asyncio 版本）"""
+        key, sql_query = self._fields_query(user_id, fields)
+        partial_player_model(key[2])
+        return self._to_fields(user_id, key[2], await self._read_async(key, sql_query))
+
     def set_user_card(self, user_id: str, update_data: dict) -> bool:
-        """动态更新玩家卡片信息"""
+        """
+        动态更新玩家卡片信息（启用写回缓冲时先暂存，稍后批量写入）
+
+        :raises ValueError: update_data 中包含 players 表没有的字段
+        """
         if not update_data:
             return False
 
+        if self.write_buffer is not None:
+            return self.write_buffer.stage(user_id, update_data)
+
+        unknown = [column for column in update_data if column not in PLAYER_COLUMNS]
+        if unknown:
+            raise ValueError(f"未知的角色卡字段: {', '.join(map(str, unknown))}")
+
+        success = self.db.execute_update(self._build_update_sql(user_id, update_data))
+        self._forget_reads(user_id)
+        return success
+
+    def _flush_pending(self, pending: Dict[str, Dict[str, Any]]) -> bool:
+        """将写回缓冲中的数据在一个事务中写入"""
+        sql_statements = [
+            self._build_update_sql(user_id, update_data)
+            for user_id, update_data in pending.items()
+            if update_data
+        ]
+        success = self.db.execute_transaction(sql_statements)
+        for user_id in pending:
+            self._forget_reads(user_id)
+        return success
+
+    def _flush_user(self, user_id: str, update_data: Dict[str, Any]) -> bool:
+        """写入单个玩家的暂存数据（批量写入失败后逐个重试时使用）"""
+        success = self.db.execute_update(self._build_update_sql(user_id, update_data))
+        self._forget_reads(user_id)
+        return success
+
+    @staticmethod
+    def _build_update_sql(user_id: str, update_data: dict) -> str:
+        """生成 players 表的 UPDATE 语句"""
         set_clauses = []
 
         for key, value in update_data.items():
@@ -51,18 +212,62 @@ class PlayerRepository:
 
             set_clauses.append(f"`{key}` = {formatted_value}")
 
-        sql_query = f"UPDATE players SET {', '.join(set_clauses)} WHERE id = '{user_id}'"
-        return self.db.execute_update(sql_query)
+        return f"UPDATE players SET {', '.join(set_clauses)} WHERE id = '{user_id}'"
+
+    def _skill_query(self, user_id: str) -> Tuple[Tuple, str]:
+        if self.skills_layout == SKILLS_LAYOUT_SPARSE:
+            return ('skill_values', user_id, '*'), select_sparse_sql(user_id)
+        return ('skills', user_id, '*'), f"SELECT * FROM skills WHERE id = '{user_id}'"
+
+    def _to_skill_vector(self, user_id: str, results: List[Dict[str, Any]]) -> SkillVector:
+        if self.skills_layout == SKILLS_LAYOUT_SPARSE:
+            return SkillVector.from_items(
+                user_id, ((skill_column(row['skill_id']), row['value']) for row in results)
+            )
+
+        if results:
+            return SkillVector.from_row(results[0])
+
+        return SkillVector(user_id)
+
+    def get_skill_vector(self, user_id: str) -> SkillVector:
+        """获取玩家技能数值向量（检定、筛选等内部逻辑使用）"""
+        key, sql_query = self._skill_query(user_id)
+        return self._to_skill_vector(user_id, self._read(key, sql_query))
+
+    async def get_skill_vector_async(self, user_id: str) -> SkillVector:
+        """获取玩家技能数值向量（asyncio 版本）"""
+        key, sql_query = self._skill_query(user_id)
+        return self._to_skill_vector(user_id, await self._read_async(key, sql_query))
 
     def get_skill_card(self, user_id: str) -> SkillsModel:
         """获取玩家技能卡片信息"""
-        sql_query = f"SELECT * FROM skills WHERE id = '{user_id}'"
-        results = self.db.execute_query(sql_query)
+        return self.get_skill_vector(user_id).to_model()
 
-        if results:
-            return SkillsModel.model_validate(results[0])
+    def set_skill_values(self, user_id: str, values: Dict[str, Optional[int]]) -> bool:
+        """
+        更新玩家技能值（按当前布局写入 skills 或 skill_values）
+
+        :param values: {技能列名: 数值}，数值为 None 表示清除
+        """
+        if not values:
+            return False
+        unknown = [column for column in values if column not in SKILL_INDEX]
+        if unknown:
+            raise ValueError(f"未知的技能字段: {unknown}")
+
+        if self.skills_layout == SKILLS_LAYOUT_SPARSE:
+            statements = sparse_update_statements(self.db.dialect, user_id, values)
+        else:
+            statements = wide_update_statements(user_id, values)
+        success = self.db.execute_transaction(statements)
+        self._forget_reads(user_id)
+        return success
 
-        return SkillsModel(id=user_id)
+    def get_weapons(self) -> List[WeaponModel]:
+        """获取 weapons 表中的全部武器（用于构建武器目录）"""
+        results = self.db.execute_query("SELECT * FROM weapons")
+        return [WeaponModel.model_validate(row) for row in results]
 
     def get_id(self, attribute_name: str) -> str:
         """根据中文名获取属性/技能的 ID"""
@@ -84,4 +289,17 @@ def get_repository() -> PlayerRepository:
     global _default_repository
     if _default_repository is None:
         _default_repository = PlayerRepository()
+        if settings.WRITE_BEHIND_ENABLED:
+            _default_repository.enable_write_behind(
+                interval=settings.WRITE_BEHIND_INTERVAL,
+                max_pending=settings.WRITE_BEHIND_MAX_PENDING,
+                durability=settings.WRITE_BEHIND_DURABILITY
+            )
     return _default_repository
+
+
+def close_repository() -> bool:
+    """关闭默认仓储，强制写入写回缓冲中的剩余数据"""
+    if _default_repository is None:
+        return True
+    return _default_repository.close()
@@ -0,0 +1,314 @@
+"""
+数据库结构与索引管理
+按版本执行迁移，创建 character/trans.py 写入的 players / skills / chinese_name 表，
+保证主键与 chinese_name.name 唯一索引，并用 EXPLAIN 检查仓储的热点查询是否走索引
+
+用法：python -m src_test.infrastructure.database.schema [migrate|verify|check]
+"""
+
+import sys
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from src_test.domain.models import SKILL_COLUMNS
+
+# 列类型：类型名 -> (MySQL, SQLite)
+COLUMN_TYPES: Dict[str, Tuple[str, str]] = {
+    'key': ('VARCHAR(64)', 'TEXT'),
+    'int': ('INT', 'INTEGER'),
+    'short': ('VARCHAR(255)', 'TEXT'),
+    'text': ('TEXT', 'TEXT'),
+    'money': ('DECIMAL(12, 2)', 'NUMERIC'),
+}
+
+# players 表列定义，与 COCPlayerModel 及 trans.py 生成的 INSERT 对应
+PLAYER_COLUMN_TYPES: List[Tuple[str, str]] = [
+    ('id', 'key'), ('year', 'int'), ('max_skill', 'int'), ('max_hobby_skill', 'int'),
+    ('name', 'short'), ('age', 'int'), ('sex', 'short'), ('language', 'short'),
+    ('birth_place', 'short'), ('live_place', 'short'),
+    ('strength', 'int'), ('constitution', 'int'), ('size', 'int'), ('dexterity', 'int'),
+    ('appearance', 'int'), ('education', 'int'), ('intelligence', 'int'), ('willpower', 'int'),
+    ('luck', 'int'), ('damage_bonus', 'int'), ('build', 'int'), ('movement', 'int'),
+    ('hit_points', 'int'), ('magic_points', 'int'), ('sanity', 'int'), ('occupation_id', 'int'),
+    ('cash_amount', 'money'), ('assets_amount', 'money'), ('credit_rating_spend', 'money'),
+    ('skills', 'text'), ('weapons', 'text'), ('equipments', 'text'), ('notes', 'text'),
+    ('personal_description', 'text'), ('beliefs', 'text'), ('traits', 'text'),
+    ('significant_people', 'text'), ('meaningful_locations', 'text'),
+    ('treasured_possessions', 'text'), ('injuries', 'text'), ('phobias', 'text'),
+    ('encounters', 'text'), ('mythos', 'text'), ('relationships', 'text'),
+    ('face_image_path', 'short'),
+]
+
+SKILL_COLUMN_TYPES: List[Tuple[str, str]] = [('id', 'key')] + [(column, 'int') for column in SKILL_COLUMNS]
+
+CHINESE_NAME_COLUMN_TYPES: List[Tuple[str, str]] = [('id', 'key'), ('name', 'key')]
+
+# 稀疏技能表：只保存非空技能，主键 (player_id, skill_id) 同时作为按玩家读取的覆盖索引
+SKILL_VALUE_COLUMN_TYPES: List[Tuple[str, str]] = [('player_id', 'key'), ('skill_id', 'int'), ('value', 'int')]
+
+# 每张表要求的主键
+REQUIRED_PRIMARY_KEYS: Dict[str, Tuple[str, ...]] = {
+    'players': ('id',),
+    'skills': ('id',),
+    'chinese_name': ('id',),
+    'skill_values': ('player_id', 'skill_id'),
+}
+
+# 每张表要求的唯一索引：表 -> [(索引名, 列)]
+REQUIRED_UNIQUE_INDEXES: Dict[str, List[Tuple[str, Tuple[str, ...]]]] = {
+    'chinese_name': [('idx_chinese_name_name', ('name',))],
+}
+
+# 仓储中的热点查询（与 PlayerRepository 生成的 SQL 形式一致）
+HOT_QUERIES: Dict[str, str] = {
+    'get_user_card': "SELECT * FROM players WHERE id = '00000001'",
+    'get_fields': "SELECT `sanity` FROM players WHERE id = '00000001'",
+    'get_skill_vector': "SELECT * FROM skills WHERE id = '00000001'",
+    'get_skill_vector(sparse)': "SELECT skill_id, value FROM skill_values WHERE player_id = '00000001'",
+    'get_id': "SELECT id FROM chinese_name WHERE name = '理智' LIMIT 1",
+}
+
+
+def _column_type(dialect: str, type_name: str) -> str:
+    mysql_type, sqlite_type = COLUMN_TYPES[type_name]
+    return sqlite_type if dialect == "sqlite" else mysql_type
+
+
+def create_table_sql(dialect: str, table: str, columns: List[Tuple[str, str]],
+                     primary_key: Tuple[str, ...] = ('id',), clustered: bool = False) -> str:
+    """
+    生成建表语句（表已存在则跳过）
+
+    :param clustered: 按主键聚簇存储（InnoDB 默认如此，SQLite 使用 WITHOUT ROWID）
+    """
+    column_sql = [f"`{name}` {_column_type(dialect, type_name)}" for name, type_name in columns]
+    column_sql.append(f"PRIMARY KEY ({', '.join(f'`{column}`' for column in primary_key)})")
+    sql = f"CREATE TABLE IF NOT EXISTS `{table}` ({', '.join(column_sql)})"
+    if dialect != "sqlite":
+        sql += " ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+    elif clustered:
+        sql += " WITHOUT ROWID"
+    return sql
+
+
+def index_exists(db, table: str, index_name: str) -> bool:
+    """判断索引是否存在"""
+    if db.dialect == "sqlite":
+        sql = f"SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = '{table}' AND name = '{index_name}'"
+    else:
+        sql = (
+            "SELECT INDEX_NAME FROM information_schema.STATISTICS "
+            f"WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = '{table}' AND INDEX_NAME = '{index_name}' LIMIT 1"
+        )
+    return bool(db.execute_query(sql))
+
+
+def ensure_index(db, table: str, index_name: str, columns: Tuple[str, ...], unique: bool = False) -> bool:
+    """索引不存在时创建"""
+    if index_exists(db, table, index_name):
+        return True
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    column_sql = ', '.join(f"`{column}`" for column in columns)
+    return db.execute_update(f"CREATE {kind} `{index_name}` ON `{table}` ({column_sql})")
+
+
+def primary_key_columns(db, table: str) -> Tuple[str, ...]:
+    """获取表的主键列"""
+    if db.dialect == "sqlite":
+        rows = db.execute_query(f"PRAGMA table_info('{table}')")
+        return tuple(row['name'] for row in sorted(rows, key=lambda row: row['pk']) if row['pk'])
+    rows = db.execute_query(
+        "SELECT COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE "
+        f"WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = '{table}' AND CONSTRAINT_NAME = 'PRIMARY' "
+        "ORDER BY ORDINAL_POSITION"
+    )
+    return tuple(row['COLUMN_NAME'] for row in rows)
+
+
+def unique_index_columns(db, table: str) -> List[Tuple[str, ...]]:
+    """获取表上所有唯一索引（含主键）的列组合"""
+    if db.dialect == "sqlite":
+        result = []
+        for index in db.execute_query(f"PRAGMA index_list('{table}')"):
+            if index['unique']:
+                info = db.execute_query(f"PRAGMA index_info('{index['name']}')")
+                result.append(tuple(row['name'] for row in sorted(info, key=lambda row: row['seqno'])))
+        return result
+
+    rows = db.execute_query(
+        "SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS "
+        f"WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = '{table}' AND NON_UNIQUE = 0 "
+        "ORDER BY INDEX_NAME, SEQ_IN_INDEX"
+    )
+    indexes: Dict[str, List[str]] = {}
+    for row in rows:
+        indexes.setdefault(row['INDEX_NAME'], []).append(row['COLUMN_NAME'])
+    return [tuple(columns) for columns in indexes.values()]
+
+
+# ---------------------------------------------------------------- 迁移
+
+def _migration_001(db) -> bool:
+    """创建 players / skills / chinese_name 表及 chinese_name.name 唯一索引"""
+    statements = [
+        create_table_sql(db.dialect, 'players', PLAYER_COLUMN_TYPES),
+        create_table_sql(db.dialect, 'skills', SKILL_COLUMN_TYPES),
+        create_table_sql(db.dialect, 'chinese_name', CHINESE_NAME_COLUMN_TYPES),
+    ]
+    if not all(db.execute_update(sql) for sql in statements):
+        return False
+    return all(
+        ensure_index(db, table, index_name, columns, unique=True)
+        for table, indexes in REQUIRED_UNIQUE_INDEXES.items()
+        for index_name, columns in indexes
+    )
+
+
+def _migration_002(db) -> bool:
+    """创建稀疏技能表 skill_values"""
+    return db.execute_update(create_table_sql(
+        db.dialect, 'skill_values', SKILL_VALUE_COLUMN_TYPES,
+        primary_key=('player_id', 'skill_id'), clustered=True
+    ))
+
+
+# 版本号 -> (说明, 迁移函数)，按版本号顺序执行
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "创建 players / skills / chinese_name 表及索引", _migration_001),
+    (2, "创建稀疏技能表 skill_values", _migration_002),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _ensure_version_table(db) -> bool:
+    return db.execute_update(create_table_sql(
+        db.dialect, 'schema_version',
+        [('version', 'int'), ('description', 'short'), ('applied_at', 'short')],
+        primary_key=('version',)
+    ))
+
+
+def current_version(db) -> int:
+    """获取已执行的最新迁移版本，未迁移时返回 0"""
+    rows = db.execute_query("SELECT MAX(version) AS version FROM schema_version")
+    if rows and rows[0]['version'] is not None:
+        return int(rows[0]['version'])
+    return 0
+
+
+def migrate(db) -> int:
+    """
+    执行所有未执行的迁移
+
+    :param db: 数据库连接（DatabaseConnection 或 SQLiteConnection）
+    :return: 迁移后的版本号
+    """
+    _ensure_version_table(db)
+    version = current_version(db)
+
+    for target, description, migration in MIGRATIONS:
+        if target <= version:
+            continue
+        if not migration(db):
+            raise RuntimeError(f"数据库迁移失败: v{target} {description}")
+        safe_description = description.replace("'", "''")
+        db.execute_update(
+            "INSERT INTO schema_version (version, description, applied_at) "
+            f"VALUES ({target}, '{safe_description}', '{datetime.now().isoformat()}')"
+        )
+        print(f"[数据库迁移] 已执行 v{target}: {description}")
+        version = target
+
+    return version
+
+
+def verify(db) -> List[str]:
+    """
+    检查数据库版本、主键和唯一索引
+
+    :return: 问题列表，为空表示检查通过
+    """
+    problems = []
+
+    version = current_version(db)
+    if version < LATEST_VERSION:
+        problems.append(f"数据库版本 v{version} 低于最新版本 v{LATEST_VERSION}，请执行 migrate")
+
+    for table, expected in REQUIRED_PRIMARY_KEYS.items():
+        actual = primary_key_columns(db, table)
+        if actual != expected:
+            problems.append(f"表 {table} 主键应为 {expected}，实际为 {actual or '无'}")
+
+    for table, indexes in REQUIRED_UNIQUE_INDEXES.items():
+        unique_columns = unique_index_columns(db, table)
+        for index_name, columns in indexes:
+            if columns not in unique_columns:
+                problems.append(f"表 {table} 缺少 {columns} 上的唯一索引 {index_name}")
+
+    return problems
+
+
+def explain(db, sql_query: str) -> Tuple[bool, List[Dict]]:
+    """
+    获取查询计划
+
+    :return: (是否存在全表扫描, 查询计划行)
+    """
+    if db.dialect == "sqlite":
+        plan = db.execute_query(f"EXPLAIN QUERY PLAN {sql_query}")
+        full_scan = any(str(row.get('detail', '')).startswith('SCAN') for row in plan)
+    else:
+        plan = db.execute_query(f"EXPLAIN {sql_query}")
+        full_scan = any(row.get('type') in ('ALL', 'index') for row in plan)
+    return full_scan, plan
+
+
+def check_hot_queries(db) -> List[str]:
+    """对仓储热点查询执行 EXPLAIN，返回发生全表扫描或无法分析的查询"""
+    problems = []
+    for name, sql_query in HOT_QUERIES.items():
+        full_scan, plan = explain(db, sql_query)
+        if not plan:
+            problems.append(f"{name}: 无法获取查询计划 ({sql_query})")
+        elif full_scan:
+            problems.append(f"{name}: 全表扫描 ({sql_query}) -> {plan}")
+    return problems
+
+
+def startup_check(db, auto_migrate: bool = False) -> List[str]:
+    """服务启动时检查数据库结构，auto_migrate 为 True 时先执行迁移"""
+    if auto_migrate:
+        migrate(db)
+    problems = verify(db)
+    for problem in problems:
+        print(f"[数据库检查] {problem}")
+    return problems
+
+
+def main():
+    from src_test.infrastructure.database.connection import create_connection
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    db = create_connection()
+
+    if command == "migrate":
+        print(f"当前数据库版本: v{migrate(db)}")
+        return
+
+    problems = verify(db)
+    if command == "check":
+        problems += check_hot_queries(db)
+    elif command != "verify":
+        print("Usage: python -m src_test.infrastructure.database.schema [migrate|verify|check]")
+        sys.exit(2)
+
+    for problem in problems:
+        print(f"[失败] {problem}")
+    if problems:
+        sys.exit(1)
+    print("数据库检查通过")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+读请求合并（single-flight）
+同一时刻对同一键（表、主键、投影列）的多个读取只执行一次查询，其余调用等待并共享结果。
+线程与 asyncio 任务共用同一组进行中的请求，因此前端接口线程和 Agent 工具可以互相合并
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """按键合并并发的相同读取"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """加入进行中的请求，没有时登记一个新请求；返回 (Future, 是否由本调用执行)"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._calls[key] = Future()
+            # 标记为运行中后 Future 不能再被取消：某个等待方被取消（如客户端断开）不会影响其他合并的调用
+            future.set_running_or_notify_cancel()
+            self.executed += 1
+            return future, True
+
+    def _run(self, key: Hashable, future: Future, fn: Callable[[], Any]):
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future)
+            future.set_exception(e)
+        else:
+            self._finish(key, future)
+            future.set_result(result)
+
+    def _finish(self, key: Hashable, future: Future):
+        # 先移除再写结果，保证结果发布后到达的调用会发起新查询
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        执行或加入对 key 的读取（同步调用）
+
+        :param key: 请求键，相同键的并发调用共享结果
+        :param fn: 实际执行查询的函数
+        :return: 查询结果（所有合并的调用拿到同一个对象，调用方不应修改）
+        """
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, fn)
+        return future.result()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        执行或加入对 key 的读取（asyncio 调用，查询在默认线程池中执行，不阻塞事件循环）
+
+        取消某个等待的任务只会让该任务收到 CancelledError，共享的查询和其他调用不受影响
+        """
+        future, leader = self._join(key)
+        if leader:
+            asyncio.get_running_loop().run_in_executor(None, self._run, key, future, fn)
+        return await asyncio.wrap_future(future)
+
+    def forget(self, predicate: Callable[[Hashable], bool]):
+        """
+        让匹配的进行中请求不再接受新的合并（写入后调用，避免新读取拿到写入前的结果）
+        已在等待的调用仍会收到原查询的结果
+        """
+        with self._lock:
+            for key in [key for key in self._calls if predicate(key)]:
+                del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        """获取执行次数、被合并的请求数和当前进行中的请求数"""
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls),
+            }
+
+    def reset(self):
+        """清空计数"""
+        with self._lock:
+            self.executed = 0
+            self.coalesced = 0
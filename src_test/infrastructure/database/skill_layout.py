@@ -0,0 +1,209 @@
+"""
+技能存储布局
+wide：skills 表每个技能一列（skill_001 ~ skill_108），与 character/trans.py 写入的结构一致；
+sparse：skill_values 表每个非空技能一行 (player_id, skill_id, value)，主键即覆盖索引，
+读写只涉及玩家实际拥有的技能
+
+角色卡导入器（character/trans.py 的单文件/批量/同步模式、sqlite_loader）始终写入 skills 宽表，
+SKILLS_LAYOUT=sparse 时同时重写对应玩家的 skill_values 行
+
+用法：
+    python -m src_test.infrastructure.database.skill_layout migrate [批大小]
+    python -m src_test.infrastructure.database.skill_layout bench [迭代次数]
+"""
+
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from src_test.domain.models import SKILL_COLUMNS, SKILL_INDEX
+
+SKILLS_LAYOUT_WIDE = "wide"
+SKILLS_LAYOUT_SPARSE = "sparse"
+SKILLS_LAYOUTS = (SKILLS_LAYOUT_WIDE, SKILLS_LAYOUT_SPARSE)
+
+
+def skill_number(column: str) -> int:
+    """技能列名 -> skill_values.skill_id（skill_001 -> 1）"""
+    return SKILL_INDEX[column] + 1
+
+
+def skill_column(number: int) -> str:
+    """skill_values.skill_id -> 技能列名（1 -> skill_001）"""
+    return SKILL_COLUMNS[int(number) - 1]
+
+
+def _quote(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def select_sparse_sql(user_id: str) -> str:
+    """按玩家读取稀疏技能的 SQL（只访问主键索引）"""
+    return f"SELECT skill_id, value FROM skill_values WHERE player_id = {_quote(user_id)}"
+
+
+def sparse_rows(row: Mapping[str, Any]) -> List[Tuple[int, int]]:
+    """将 skills 表的一行转换为 [(skill_id, value), ...]，跳过 NULL"""
+    return [
+        (skill_number(column), int(row[column]))
+        for column in SKILL_COLUMNS
+        if row.get(column) is not None
+    ]
+
+
+def _insert_sparse_sql(rows: Iterable[Tuple[str, int, int]]) -> Optional[str]:
+    values = ', '.join(f"({_quote(player_id)}, {skill_id}, {value})" for player_id, skill_id, value in rows)
+    if not values:
+        return None
+    return f"INSERT INTO skill_values (player_id, skill_id, value) VALUES {values}"
+
+
+def sparse_update_statements(dialect: str, user_id: str, values: Dict[str, Optional[int]]) -> List[str]:
+    """
+    生成稀疏布局下更新技能值的语句（存在则覆盖，value 为 None 时删除）
+
+    :param dialect: 数据库方言，mysql 或 sqlite
+    :param values: {技能列名: 数值}
+    """
+    statements = []
+    deleted = [str(skill_number(column)) for column, value in values.items() if value is None]
+    if deleted:
+        statements.append(
+            f"DELETE FROM skill_values WHERE player_id = {_quote(user_id)} "
+            f"AND skill_id IN ({', '.join(deleted)})"
+        )
+
+    insert_sql = _insert_sparse_sql(
+        (user_id, skill_number(column), int(value))
+        for column, value in values.items()
+        if value is not None
+    )
+    if insert_sql:
+        if dialect == "sqlite":
+            insert_sql += " ON CONFLICT (player_id, skill_id) DO UPDATE SET value = excluded.value"
+        else:
+            insert_sql += " ON DUPLICATE KEY UPDATE value = VALUES(value)"
+        statements.append(insert_sql)
+    return statements
+
+
+def wide_update_statements(user_id: str, values: Dict[str, Optional[int]]) -> List[str]:
+    """生成宽表布局下更新技能值的语句"""
+    set_clauses = ', '.join(
+        f"`{column}` = {'NULL' if value is None else int(value)}"
+        for column, value in values.items()
+    )
+    return [f"UPDATE skills SET {set_clauses} WHERE id = {_quote(user_id)}"]
+
+
+def migrate_wide_to_sparse(db, batch_size: int = 200) -> int:
+    """
+    将 skills 宽表中的数据复制到 skill_values（可重复执行，每批玩家先删除旧数据再写入）
+
+    :param db: 数据库连接（DatabaseConnection 或 SQLiteConnection）
+    :param batch_size: 每个事务处理的玩家数
+    :return: 迁移的玩家数
+    """
+    migrated = 0
+    last_id = ''
+    while True:
+        rows = db.execute_query(
+            f"SELECT * FROM skills WHERE id > {_quote(last_id)} ORDER BY id LIMIT {int(batch_size)}"
+        )
+        if not rows:
+            break
+
+        player_ids = [str(row['id']) for row in rows]
+        statements = [
+            f"DELETE FROM skill_values WHERE player_id IN ({', '.join(_quote(pid) for pid in player_ids)})"
+        ]
+        insert_sql = _insert_sparse_sql(
+            (str(row['id']), skill_id, value)
+            for row in rows
+            for skill_id, value in sparse_rows(row)
+        )
+        if insert_sql:
+            statements.append(insert_sql)
+
+        if not db.execute_transaction(statements):
+            raise RuntimeError(f"技能数据迁移失败，批次起始玩家: {player_ids[0]}")
+
+        migrated += len(rows)
+        last_id = player_ids[-1]
+        print(f"[技能迁移] 已迁移 {migrated} 名玩家")
+
+    return migrated
+
+
+def _summary(durations: List[float]) -> Dict[str, float]:
+    if not durations:
+        return {'count': 0, 'avg_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0}
+    ordered = sorted(durations)
+    return {
+        'count': len(ordered),
+        'avg_ms': round(sum(ordered) / len(ordered), 4),
+        'p50_ms': round(ordered[len(ordered) // 2], 4),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+    }
+
+
+def benchmark(db, iterations: int = 200, sample_size: int = 20) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    对比两种布局的技能读取与更新耗时
+
+    更新操作将读到的技能值原样写回，不改变数据；sparse 布局需先执行 migrate_wide_to_sparse。
+
+    :return: {布局: {'read': 统计, 'update': 统计}}
+    """
+    from src_test.infrastructure.database.repository import PlayerRepository
+
+    player_ids = [
+        str(row['id'])
+        for row in db.execute_query(f"SELECT id FROM skills ORDER BY id LIMIT {int(sample_size)}")
+    ]
+    if not player_ids:
+        raise RuntimeError("skills 表为空，无法进行基准测试")
+
+    results = {}
+    for layout in SKILLS_LAYOUTS:
+        repository = PlayerRepository(db, skills_layout=layout)
+        reads, updates = [], []
+        for i in range(iterations):
+            user_id = player_ids[i % len(player_ids)]
+
+            start = time.perf_counter()
+            vector = repository.get_skill_vector(user_id)
+            reads.append((time.perf_counter() - start) * 1000)
+
+            skills = vector.filter(min_value=0)[:3]
+            if skills:
+                start = time.perf_counter()
+                repository.set_skill_values(user_id, dict(skills))
+                updates.append((time.perf_counter() - start) * 1000)
+
+        results[layout] = {'read': _summary(reads), 'update': _summary(updates)}
+    return results
+
+
+def main():
+    from src_test.infrastructure.database.connection import create_connection
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "bench"
+    db = create_connection()
+
+    if command == "migrate":
+        batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+        print(f"共迁移 {migrate_wide_to_sparse(db, batch_size)} 名玩家")
+    elif command == "bench":
+        iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+        for layout, stats in benchmark(db, iterations).items():
+            for operation, summary in stats.items():
+                print(f"{layout:<7} {operation:<7} n={summary['count']:<5} avg={summary['avg_ms']:.4f}ms "
+                      f"p50={summary['p50_ms']:.4f}ms p95={summary['p95_ms']:.4f}ms")
+    else:
+        print("Usage: python -m src_test.infrastructure.database.skill_layout [migrate|bench] [参数]")
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
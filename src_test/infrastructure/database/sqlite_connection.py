@@ -0,0 +1,76 @@
+"""
+嵌入式 SQLite 数据库连接
+与 DatabaseConnection 提供相同的 execute_* 接口，供单机部署和压测使用，无需 MySQL 服务
+"""
+
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Any
+
+from src_test.infrastructure.database.instrumentation import query_stats
+from src_test.infrastructure.database.schema import migrate
+
+
+class SQLiteConnection:
+    """SQLite 数据库连接管理类（WAL 模式，每个线程复用一个连接）"""
+
+    dialect = "sqlite"
+
+    def __init__(self, db_path: str):
+        """
+        初始化数据库连接并建表
+
+        :param db_path: SQLite 数据库文件路径
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        self.ensure_schema()
+
+    def get_connection(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            with query_stats.measure_acquire():
+                connection = sqlite3.connect(self.db_path)
+                connection.row_factory = sqlite3.Row
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def ensure_schema(self):
+        """执行数据库迁移，创建 players / skills / chinese_name 表（已存在则跳过）"""
+        migrate(self)
+
+    def execute_query(self, sql_query: str) -> List[Dict[str, Any]]:
+        """执行 SQL 查询并返回字典列表"""
+        try:
+            connection = self.get_connection()
+            with query_stats.measure(sql_query) as measurement:
+                rows = [dict(row) for row in connection.execute(sql_query).fetchall()]
+                measurement.rows = len(rows)
+            return rows
+        except Exception as e:
+            print(f"数据库查询错误: {e}")
+            return []
+
+    def execute_update(self, sql_query: str) -> bool:
+        """执行 SQL 更新操作"""
+        return self.execute_transaction([sql_query])
+
+    def execute_transaction(self, sql_statements: List[str]) -> bool:
+        """在同一个事务中执行多条 SQL 更新语句，全部成功才提交"""
+        connection = self.get_connection()
+        try:
+            with connection:
+                for sql_query in sql_statements:
+                    with query_stats.measure(sql_query) as measurement:
+                        measurement.rows = connection.execute(sql_query).rowcount
+            return True
+        except Exception as e:
+            print(f"数据库更新错误: {e}")
+            return False
@@ -0,0 +1,102 @@
+"""
+SQLite 角色卡导入器
+复用 character/trans.py 的扁平化逻辑，将 character/player/*.json 导入嵌入式 SQLite 数据库
+
+用法：python -m src_test.infrastructure.database.sqlite_loader [角色卡目录] [数据库路径]
+"""
+
+import json
+import os
+import sys
+from typing import Dict
+
+from src_test.infrastructure.database.sqlite_connection import SQLiteConnection
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+CHARACTER_DIR = os.path.join(PROJECT_ROOT, "character")
+DEFAULT_PLAYER_DIR = os.path.join(CHARACTER_DIR, "player")
+
+# 复用 trans.py 中的 flatten_json_data / INSERT 生成逻辑
+sys.path.insert(0, CHARACTER_DIR)
+import trans  # noqa: E402
+
+# 属性中文名 -> players 表列名
+ATTRIBUTE_NAMES: Dict[str, str] = {
+    '力量': 'strength', '体质': 'constitution', '体型': 'size', '敏捷': 'dexterity',
+    '外貌': 'appearance', '教育': 'education', '智力': 'intelligence', '意志': 'willpower',
+    '幸运': 'luck', '生命': 'hit_points', '魔法': 'magic_points', '理智': 'sanity',
+}
+
+
+def _upsert(sql: str) -> str:
+    """将 trans.py 生成的 INSERT 语句改为覆盖写入，便于重复导入"""
+    return sql.replace("INSERT INTO", "INSERT OR REPLACE INTO", 1)
+
+
+def load_chinese_names(connection: SQLiteConnection) -> bool:
+    """写入属性/技能中文名与列名的对应关系"""
+    names = dict(ATTRIBUTE_NAMES)
+    names.update(trans.SKILL_MAP)
+    statements = [
+        _upsert(f"INSERT INTO `chinese_name` (`id`, `name`) VALUES "
+                f"({trans.to_sql_value(column)}, {trans.to_sql_value(name)})")
+        for name, column in names.items()
+    ]
+    return connection.execute_transaction(statements)
+
+
+def load_player_file(connection: SQLiteConnection, json_file: str,
+                     skills_layout: str = trans.DEFAULT_SKILLS_LAYOUT) -> bool:
+    """
+    导入单个角色卡 JSON 文件
+
+    :param skills_layout: 技能存储布局，sparse 时同时重写该角色的 skill_values 行
+    """
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    flat_data = trans.flatten_json_data(data)
+    statements = [
+        _upsert(trans.generate_players_insert(flat_data)),
+        _upsert(trans.generate_skills_insert(flat_data)),
+    ]
+    if skills_layout == 'sparse':
+        statements.extend(trans.generate_skill_values_sql(flat_data))
+    return connection.execute_transaction(statements)
+
+
+def load_player_dir(connection: SQLiteConnection, player_dir: str = DEFAULT_PLAYER_DIR,
+                    skills_layout: str = trans.DEFAULT_SKILLS_LAYOUT) -> int:
+    """
+    导入目录下的所有角色卡 JSON 文件
+
+    :param skills_layout: 技能存储布局，sparse 时同时写入 skill_values 表
+    :return: 成功导入的文件数
+    """
+    loaded = 0
+    for file in sorted(os.listdir(player_dir)):
+        if not file.endswith('.json'):
+            continue
+        json_file = os.path.join(player_dir, file)
+        try:
+            if load_player_file(connection, json_file, skills_layout):
+                loaded += 1
+        except Exception as e:
+            print(f"导入角色卡 {json_file} 失败: {e}")
+    return loaded
+
+
+def main():
+    from src_test.config import settings
+
+    player_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PLAYER_DIR
+    db_path = sys.argv[2] if len(sys.argv) > 2 else settings.SQLITE_PATH
+
+    connection = SQLiteConnection(db_path)
+    load_chinese_names(connection)
+    loaded = load_player_dir(connection, player_dir, settings.SKILLS_LAYOUT)
+    print(f"已导入 {loaded} 张角色卡到 {db_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+角色卡写回缓冲（write-behind）
+战斗、理智检定等场景会在短时间内对同一玩家产生大量小更新，
+这里按 玩家 -> 字段 合并待写入的值，并按间隔、数量阈值或场景退出时批量落库
+"""
+
+import atexit
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# 持久化模式
+DURABILITY_RELAXED = "relaxed"  # 合并后按间隔/阈值/场景退出批量写入
+DURABILITY_STRICT = "strict"    # 每次更新立即写入（缓冲只用于读合并）
+
+DURABILITY_MODES = (DURABILITY_RELAXED, DURABILITY_STRICT)
+
+
+class WriteBehindBuffer:
+    """按玩家和字段合并待写入数据的缓冲区"""
+
+    def __init__(self, flush_fn: Callable[[Dict[str, Dict[str, Any]]], bool],
+                 interval: float = 2.0, max_pending: int = 32,
+                 durability: str = DURABILITY_RELAXED,
+                 columns: Optional[Iterable[str]] = None,
+                 flush_one: Optional[Callable[[str, Dict[str, Any]], bool]] = None,
+                 max_retries: int = 3):
+        """
+        初始化缓冲区
+
+        :param flush_fn: 批量写入函数，参数为 {user_id: {字段: 值}}，成功返回 True
+        :param interval: 定时刷新间隔（秒），小于等于 0 时不启动定时刷新
+        :param max_pending: 待写入字段数达到该值时立即刷新
+        :param durability: 持久化模式，relaxed 或 strict
+        :param columns: 允许暂存的字段名，暂存未知字段时抛出 ValueError；None 表示不检查
+        :param flush_one: 单个玩家的写入函数，批量写入失败时逐个重试，只有仍然失败的玩家回到队列
+        :param max_retries: 同一玩家连续写入失败的次数上限，超过后丢弃其数据并打印日志
+        """
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"未知的持久化模式: {durability}")
+
+        self.interval = interval
+        self.max_pending = max_pending
+        self.durability = durability
+        self.columns = frozenset(columns) if columns is not None else None
+        self.max_retries = max_retries
+        self._flush_fn = flush_fn
+        self._flush_one = flush_one
+        # 玩家ID -> 连续写入失败次数
+        self._failures: Dict[str, int] = {}
+        # 尚未写入的数据
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # 正在写入的数据（写入完成前读操作仍需看到）
+        self._inflight: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        # 保证同一时间只有一个刷新在执行
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def pending_count(self) -> int:
+        """待写入的字段总数"""
+        with self._lock:
+            return sum(len(columns) for columns in self._pending.values())
+
+    def start(self):
+        """启动定时刷新线程，并注册进程退出时的强制刷新"""
+        if self._thread is not None:
+            return
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        """定时刷新循环"""
+        while not self._stop_event.wait(self.interval):
+            self.flush()
+
+    def stage(self, user_id: str, update_data: Dict[str, Any]) -> bool:
+        """
+        暂存一次更新，同一玩家同一字段只保留最新值
+
+        :param user_id: 玩家ID
+        :param update_data: 需要更新的键值对
+        :return: strict 模式或触发阈值刷新时返回写入结果，否则返回 True
+        :raises ValueError: 包含未知字段（不会暂存任何数据）
+        """
+        if self.columns is not None:
+            unknown = [column for column in update_data if column not in self.columns]
+            if unknown:
+                raise ValueError(f"未知的角色卡字段: {', '.join(map(str, unknown))}")
+
+        with self._lock:
+            self._pending.setdefault(user_id, {}).update(update_data)
+            count = sum(len(columns) for columns in self._pending.values())
+
+        if self.durability == DURABILITY_STRICT or count >= self.max_pending:
+            return self.flush()
+        return True
+
+    def pending_for(self, user_id: str) -> Dict[str, Any]:
+        """获取某个玩家尚未落库的字段（读操作用于覆盖数据库中的旧值）"""
+        with self._lock:
+            merged = dict(self._inflight.get(user_id, {}))
+            merged.update(self._pending.get(user_id, {}))
+            return merged
+
+    def flush(self) -> bool:
+        """
+        将所有待写入数据批量写入数据库
+
+        批量写入失败时逐个玩家重试（提供 flush_one 时），仍然失败的数据回到待写入队列；
+        同一玩家连续失败 max_retries 次后丢弃其数据，避免一行坏数据阻塞所有玩家的写入
+
+        :return: 写入是否全部成功
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return True
+                batch = self._pending
+                self._pending = {}
+                self._inflight = batch
+
+            failed = batch
+            if self._call(self._flush_fn, batch):
+                failed = {}
+            elif self._flush_one is not None and len(batch) > 1:
+                failed = {
+                    user_id: columns for user_id, columns in batch.items()
+                    if not self._call(self._flush_one, user_id, columns)
+                }
+
+            with self._lock:
+                self._inflight = {}
+                for user_id in batch:
+                    if user_id not in failed:
+                        self._failures.pop(user_id, None)
+                for user_id, columns in failed.items():
+                    attempts = self._failures.get(user_id, 0) + 1
+                    if attempts >= self.max_retries:
+                        self._failures.pop(user_id, None)
+                        print(f"写回缓冲丢弃玩家 {user_id} 的更新（连续 {attempts} 次写入失败）: {columns}")
+                        continue
+                    self._failures[user_id] = attempts
+                    # 失败的数据放回队列，刷新期间产生的新值优先
+                    merged = dict(columns)
+                    merged.update(self._pending.get(user_id, {}))
+                    self._pending[user_id] = merged
+            return not failed
+
+    @staticmethod
+    def _call(fn: Callable[..., bool], *args) -> bool:
+        try:
+            return bool(fn(*args))
+        except Exception as e:
+            print(f"写回缓冲刷新错误: {e}")
+            return False
+
+    def close(self) -> bool:
+        """停止定时刷新并强制写入剩余数据"""
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=max(self.interval, 1.0))
+        return self.flush()
@@ -3,5 +3,7 @@ Infrastructure File - 文件基础设施
 """
 
 from src_test.infrastructure.file.txt_loader import TxtContentLoader, TxtKeywordSearch
+from src_test.infrastructure.file.scene_catalog import SceneCatalog
+from src_test.infrastructure.file.scene_bundle import SceneBundle, build_bundle
 
-__all__ = ['TxtContentLoader', 'TxtKeywordSearch']
+__all__ = ['TxtContentLoader', 'TxtKeywordSearch', 'SceneCatalog', 'SceneBundle', 'build_bundle']
@@ -0,0 +1,381 @@
+"""
+场景包
+将剧本文件夹（scenes/*.txt、scenes.txt、开始-连接-结尾.txt）编译为单个带版本号的文件：
+解码后的文本、场景名索引、进入次数限制、切分好的情节段落以及拼接好的提示词。
+运行时一次读取（或内存映射）即可加载，多个进程映射同一文件时共享只读页面
+
+文件格式：
+    8 字节魔数 | uint32 格式版本 | uint32 头部长度 | 头部 JSON（UTF-8） | 文本区（UTF-8 字符串依次拼接）
+头部中的文本以 [偏移, 字节长度] 引用文本区，访问时才解码；
+头部还记录源文件的大小、修改时间、内容摘要以及提示词模板摘要，剧本或模板变化后场景包视为过期
+
+用法：
+    python -m src_test.infrastructure.file.scene_bundle build <场景文件夹> <输出文件>
+    python -m src_test.infrastructure.file.scene_bundle info <场景包>
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from src_test.infrastructure.file.scene_catalog import SceneCatalog, SceneSnapshot
+from src_test.infrastructure.file.script_segments import split_beats
+
+BUNDLE_MAGIC = b'COCSCNB\x00'
+BUNDLE_FORMAT_VERSION = 3
+_PREAMBLE = struct.Struct('<8sII')
+# 计算模板摘要时代入提示词函数的固定样例
+_TEMPLATE_SAMPLE_SCENE = ('\x00场景', '\x00场景内容')
+_TEMPLATE_SAMPLE_MAIN = '\x00主线剧本'
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _scan_sources(scenes_dir: str) -> Dict[str, Tuple[str, os.stat_result]]:
+    """相对路径 -> (完整路径, stat) ，只包含 txt 文件"""
+    scenes_dir = os.path.normpath(scenes_dir)
+    sources = {}
+    for root, dirs, names in os.walk(scenes_dir):
+        for name in names:
+            if name.endswith('.txt'):
+                path = os.path.join(root, name)
+                try:
+                    sources[os.path.relpath(path, scenes_dir)] = (path, os.stat(path))
+                except OSError:
+                    continue
+    return sources
+
+
+def source_files(scenes_dir: str) -> Dict[str, Dict[str, Any]]:
+    """
+    记录场景文件夹中所有 txt 文件的大小、修改时间和内容摘要
+
+    :param scenes_dir: 场景文件夹
+    :return: 相对路径 -> {'size', 'mtime_ns', 'digest'}
+    """
+    files = {}
+    for relpath, (path, stat) in _scan_sources(scenes_dir).items():
+        try:
+            digest = _file_digest(path)
+        except OSError:
+            continue
+        files[relpath] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest}
+    return files
+
+
+def template_digest(scene_prompt: Optional[Callable[[str, str], str]] = None,
+                    main_prompt: Optional[Callable[[Optional[str]], str]] = None) -> Optional[str]:
+    """
+    计算提示词模板的摘要：将固定样例代入提示词函数，模板内容变化时摘要随之变化
+
+    :return: 摘要，两个函数都未提供时返回 None
+    """
+    if scene_prompt is None and main_prompt is None:
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    if scene_prompt is not None:
+        digest.update(b'scene\x00' + scene_prompt(*_TEMPLATE_SAMPLE_SCENE).encode('utf-8'))
+    if main_prompt is not None:
+        for main_script in (None, _TEMPLATE_SAMPLE_MAIN):
+            digest.update(b'main\x00' + main_prompt(main_script).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class _BlobWriter:
+    """文本区写入器，相同文本只写入一次"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self._refs: Dict[str, List[int]] = {}
+
+    def add(self, text: str) -> List[int]:
+        ref = self._refs.get(text)
+        if ref is None:
+            data = text.encode('utf-8')
+            ref = self._refs[text] = [self.size, len(data)]
+            self.chunks.append(data)
+            self.size += len(data)
+        return ref
+
+
+def build_bundle(scenes_dir: str, output_path: str,
+                 scene_prompt: Optional[Callable[[str, str], str]] = None,
+                 main_prompt: Optional[Callable[[Optional[str]], str]] = None,
+                 beat_max_tokens: Optional[int] = None) -> Dict[str, Any]:
+    """
+    编译场景包
+
+    :param scenes_dir: 场景文件夹
+    :param output_path: 输出文件路径
+    :param scene_prompt: (场景名, 场景内容) -> 场景提示词，提供时预先拼接每个场景的提示词
+    :param main_prompt: 主线剧本（可能为 None） -> 主线程提示词
+    :param beat_max_tokens: 情节段落的最大估算 token 数，提供时预先切分每个场景的情节段落
+    :return: 头部信息
+    """
+    # 复用场景目录的读取和场景名匹配规则
+    catalog = SceneCatalog(scenes_dir, poll_interval=0)
+    snapshot = catalog.snapshot
+    blob = _BlobWriter()
+
+    scenes = {}
+    for scene, content in snapshot.contents.items():
+        entry = {'content': blob.add(content)}
+        if scene_prompt is not None:
+            entry['prompt'] = blob.add(scene_prompt(scene, content))
+        if beat_max_tokens is not None:
+            entry['beats'] = [blob.add(beat) for beat in split_beats(content, beat_max_tokens)]
+        scenes[scene] = entry
+
+    main = {'script': blob.add(snapshot.main_script) if snapshot.main_script is not None else None}
+    if main_prompt is not None:
+        main['prompt'] = blob.add(main_prompt(snapshot.main_script))
+
+    header = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'built_at': datetime.now().isoformat(),
+        'source_dir': os.path.abspath(catalog.scenes_dir),
+        'files': source_files(catalog.scenes_dir),
+        'templates': template_digest(scene_prompt, main_prompt),
+        'beat_max_tokens': beat_max_tokens,
+        'limits': snapshot.limits,
+        'scenes': scenes,
+        'main': main,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(BUNDLE_MAGIC, BUNDLE_FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for chunk in blob.chunks:
+            f.write(chunk)
+    os.replace(tmp_path, output_path)
+    return header
+
+
+class _BundleTexts(Mapping):
+    """场景名 -> 场景内容 的只读映射，访问时才从文本区解码"""
+
+    def __init__(self, bundle: 'SceneBundle'):
+        self._bundle = bundle
+
+    def __getitem__(self, scene: str) -> str:
+        entry = self._bundle.header['scenes'][scene]
+        return self._bundle.text(entry['content'])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._bundle.header['scenes'])
+
+    def __len__(self) -> int:
+        return len(self._bundle.header['scenes'])
+
+
+class SceneBundle:
+    """
+    已编译的场景包（只读）
+
+    提供与 SceneCatalog 相同的 limits / main_script / snapshot / get_content 接口，
+    另外提供预先拼接的提示词
+    """
+
+    def __init__(self, path: str, use_mmap: bool = True):
+        """
+        :param path: 场景包路径
+        :param use_mmap: 是否内存映射文件（否则一次读入内存）
+        :raises ValueError: 文件不是场景包或格式版本不兼容
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            preamble = f.read(_PREAMBLE.size)
+            if len(preamble) < _PREAMBLE.size:
+                raise ValueError(f"不是有效的场景包: {path}")
+            magic, version, header_length = _PREAMBLE.unpack(preamble)
+            if magic != BUNDLE_MAGIC:
+                raise ValueError(f"不是有效的场景包: {path}")
+            if version != BUNDLE_FORMAT_VERSION:
+                raise ValueError(f"场景包格式版本 {version} 不受支持（当前为 {BUNDLE_FORMAT_VERSION}）")
+
+            if use_mmap:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                f.seek(0)
+                self._data = f.read()
+
+        header_start = _PREAMBLE.size
+        self._blob_start = header_start + header_length
+        self.header: Dict[str, Any] = json.loads(bytes(self._data[header_start:self._blob_start]).decode('utf-8'))
+        self._texts: Dict[Tuple[int, int], str] = {}
+        self._lock = threading.Lock()
+        self.scenes_dir = self.header['source_dir']
+        self._snapshot = SceneSnapshot(
+            version=1,
+            contents=_BundleTexts(self),
+            limits=self.header['limits'],
+            main_script=self.main_script,
+            # 场景包不会重新扫描文件夹，无需记录文件签名
+            files={},
+            texts={},
+        )
+
+    @classmethod
+    def open(cls, path: str, use_mmap: bool = True) -> Optional['SceneBundle']:
+        """打开场景包，失败时打印原因并返回 None"""
+        try:
+            return cls(path, use_mmap)
+        except (OSError, ValueError) as e:
+            print(f"[场景包] 加载失败: {e}")
+            return None
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def text(self, ref: Optional[List[int]]) -> Optional[str]:
+        """按 [偏移, 字节长度] 读取文本区中的字符串（解码结果会缓存）"""
+        if ref is None:
+            return None
+        key = (ref[0], ref[1])
+        text = self._texts.get(key)
+        if text is None:
+            start = self._blob_start + ref[0]
+            text = bytes(self._data[start:start + ref[1]]).decode('utf-8')
+            with self._lock:
+                self._texts[key] = text
+        return text
+
+    @property
+    def snapshot(self) -> SceneSnapshot:
+        return self._snapshot
+
+    @property
+    def limits(self) -> Dict[str, int]:
+        return self.header['limits']
+
+    @property
+    def main_script(self) -> Optional[str]:
+        return self.text(self.header['main']['script'])
+
+    @property
+    def main_prompt(self) -> Optional[str]:
+        """预先拼接的主线程提示词（编译时未提供时为 None）"""
+        return self.text(self.header['main'].get('prompt'))
+
+    def get_content(self, scene: str) -> Optional[str]:
+        """获取场景内容，未找到返回 None"""
+        entry = self.header['scenes'].get(scene)
+        return self.text(entry['content']) if entry else None
+
+    def scene_prompt(self, scene: str) -> Optional[str]:
+        """预先拼接的场景提示词，未找到或编译时未提供时返回 None"""
+        entry = self.header['scenes'].get(scene)
+        return self.text(entry.get('prompt')) if entry else None
+
+    def scene_beats(self, scene: str, max_tokens: int) -> Optional[List[str]]:
+        """
+        预先切分的情节段落
+
+        :param scene: 场景名
+        :param max_tokens: 当前配置的情节段落最大 token 数
+        :return: 情节段落，未找到、编译时未切分或切分预算与当前配置不同时返回 None
+        """
+        entry = self.header['scenes'].get(scene)
+        if entry is None or 'beats' not in entry or self.header.get('beat_max_tokens') != max_tokens:
+            return None
+        return [self.text(ref) for ref in entry['beats']]
+
+    def is_stale(self, scenes_dir: str,
+                 scene_prompt: Optional[Callable[[str, str], str]] = None,
+                 main_prompt: Optional[Callable[[Optional[str]], str]] = None) -> bool:
+        """
+        场景包是否与当前的场景文件夹或提示词模板不一致
+
+        :param scenes_dir: 场景文件夹，不存在时（只部署了场景包）跳过文件检查；
+                           文件的大小和修改时间与编译时相同时不读取文件，只有修改时间变化（如重新检出或复制）
+                           的文件才比较内容摘要
+        :param scene_prompt: 当前的场景提示词函数，与编译时的模板不同则视为过期
+        :param main_prompt: 当前的主线程提示词函数
+        :return: 文件内容（新增、删除或修改）或模板是否与编译时不同
+        """
+        built_templates = self.header.get('templates')
+        if built_templates is not None and (scene_prompt is not None or main_prompt is not None):
+            if template_digest(scene_prompt, main_prompt) != built_templates:
+                return True
+        if not os.path.isdir(scenes_dir):
+            return False
+        built = self.header['files']
+        current = _scan_sources(scenes_dir)
+        if current.keys() != built.keys():
+            return True
+        for relpath, (path, stat) in current.items():
+            entry = built[relpath]
+            if stat.st_size != entry['size']:
+                return True
+            if stat.st_mtime_ns == entry['mtime_ns']:
+                continue
+            try:
+                if _file_digest(path) != entry['digest']:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def start_watching(self):
+        """场景包只读，无需监视"""
+
+    def stop_watching(self):
+        """场景包只读，无需监视"""
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="编译或查看场景包")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help="将场景文件夹编译为场景包")
+    build_parser.add_argument('scenes_dir', help="场景文件夹")
+    build_parser.add_argument('output', help="输出文件")
+    info_parser = subparsers.add_parser('info', help="查看场景包信息")
+    info_parser.add_argument('bundle', help="场景包文件")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        # 提示词模板和配置定义在服务层，仅在命令行编译时导入
+        from src_test.config import settings
+        from src_test.service.scene_service import build_main_prompt, build_scene_prompt
+
+        start = time.perf_counter()
+        header = build_bundle(args.scenes_dir, args.output, build_scene_prompt, build_main_prompt,
+                              beat_max_tokens=settings.SCENE_BEAT_MAX_TOKENS)
+        elapsed = time.perf_counter() - start
+        print(f"已编译 {len(header['scenes'])} 个场景名、{len(header['files'])} 个文件 -> {args.output} "
+              f"({os.path.getsize(args.output)} 字节，{elapsed:.2f}s)")
+        return
+
+    start = time.perf_counter()
+    bundle = SceneBundle.open(args.bundle)
+    if bundle is None:
+        return
+    elapsed = time.perf_counter() - start
+    print(f"格式版本: {bundle.header['format_version']}")
+    print(f"编译时间: {bundle.header['built_at']}")
+    print(f"来源目录: {bundle.scenes_dir}")
+    print(f"场景: {', '.join(bundle.header['scenes'])}")
+    print(f"进入次数限制: {bundle.limits}")
+    print(f"加载耗时: {elapsed * 1000:.2f}ms")
+    bundle.close()
+
+
+if __name__ == '__main__':
+    main()
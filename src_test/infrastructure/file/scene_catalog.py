@@ -0,0 +1,171 @@
+"""
+场景目录
+启动时一次性读取 scenes/ 下的所有场景文件，建立 场景名 -> 解码后内容 的索引，
+同时加载 scenes.txt 中的进入次数限制和主线剧本；后台按 mtime 轮询目录，
+文件变化时重建索引并整体替换，编辑剧本无需重启服务
+"""
+
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+from src_test.infrastructure.file.txt_loader import TxtContentLoader
+
+MAIN_SCRIPT_FILE = "开始-连接-结尾.txt"
+LIMITS_FILE = "scenes.txt"
+
+# 场景文件名中的场景名，如 "scene3（图书馆中调查） .txt" -> "图书馆中调查"
+_SCENE_NAME_PATTERN = re.compile(r"[（(]\s*(.+?)\s*[）)]")
+
+
+class SceneSnapshot:
+    """某一时刻的场景目录（只读，刷新时整体替换）"""
+
+    def __init__(self, version: int, contents: Dict[str, str], limits: Dict[str, int],
+                 main_script: Optional[str], files: Dict[str, Tuple[float, int]],
+                 texts: Dict[str, Optional[str]]):
+        self.version = version
+        self.contents = contents
+        self.limits = limits
+        self.main_script = main_script
+        # 文件路径 -> (mtime, size)，用于检测变化
+        self.files = files
+        # 文件路径 -> 解码后的文本，刷新时复用未变化的文件
+        self.texts = texts
+
+
+class SceneCatalog:
+    """场景目录，按场景名 O(1) 获取场景内容"""
+
+    def __init__(self, scenes_dir: str, loader: TxtContentLoader = None, poll_interval: float = 2.0):
+        """
+        :param scenes_dir: 场景文件夹
+        :param loader: 文本加载器（负责多编码解码）
+        :param poll_interval: 轮询间隔（秒），<= 0 时不启动后台监视
+        """
+        self.scenes_dir = os.path.normpath(scenes_dir)
+        self.loader = loader or TxtContentLoader()
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot = self._build(version=1, previous=None)
+
+    @property
+    def snapshot(self) -> SceneSnapshot:
+        return self._snapshot
+
+    @property
+    def limits(self) -> Dict[str, int]:
+        return self._snapshot.limits
+
+    @property
+    def main_script(self) -> Optional[str]:
+        return self._snapshot.main_script
+
+    def get_content(self, scene: str) -> Optional[str]:
+        """获取场景内容，未找到返回 None"""
+        return self._snapshot.contents.get(scene)
+
+    def _scan(self) -> Dict[str, Tuple[float, int]]:
+        files = {}
+        for root, dirs, names in os.walk(self.scenes_dir):
+            dirs.sort()
+            for name in sorted(names):
+                if name.endswith('.txt'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files[path] = (stat.st_mtime, stat.st_size)
+        return files
+
+    def _build(self, version: int, previous: Optional[SceneSnapshot],
+               files: Dict[str, Tuple[float, int]] = None) -> SceneSnapshot:
+        """读取目录并构建新快照，未变化的文件复用上一快照中的内容"""
+        files = files if files is not None else self._scan()
+        texts: Dict[str, Optional[str]] = {}
+        for path, signature in files.items():
+            if previous is not None and previous.files.get(path) == signature:
+                texts[path] = previous.texts[path]
+            else:
+                texts[path] = self.loader.read_txt_file(path)
+
+        main_script = None
+        limits: Dict[str, int] = {}
+        scene_files = []
+        for path, text in texts.items():
+            name = os.path.basename(path)
+            if os.path.dirname(path) == self.scenes_dir and name == MAIN_SCRIPT_FILE:
+                main_script = text
+            elif os.path.dirname(path) == self.scenes_dir and name == LIMITS_FILE:
+                limits = self._parse_limits(text or "")
+            elif text:
+                scene_files.append((name, text))
+
+        contents: Dict[str, str] = {}
+        # scenes.txt 中的场景名：取文件名包含该场景名的第一个文件（与原先的查找规则一致）
+        for scene in limits:
+            for name, text in scene_files:
+                if scene in name:
+                    contents[scene] = text
+                    break
+        # 其余文件按括号中的场景名登记
+        for name, text in scene_files:
+            match = _SCENE_NAME_PATTERN.search(name)
+            if match:
+                contents.setdefault(match.group(1), text)
+
+        return SceneSnapshot(version, contents, limits, main_script, files, texts)
+
+    @staticmethod
+    def _parse_limits(text: str) -> Dict[str, int]:
+        """解析 scenes.txt（每行 场景名:可进入次数）"""
+        limits = {}
+        for line in text.splitlines():
+            line = line.strip()
+            if ':' in line:
+                scene, limit = line.split(':', 1)
+                try:
+                    limits[scene.strip()] = int(limit.strip())
+                except ValueError:
+                    print(f"scenes.txt 中的次数格式错误: {line}")
+        return limits
+
+    def refresh(self) -> bool:
+        """
+        检查文件变化，有变化时重建并替换快照
+
+        :return: 是否发生了重新加载
+        """
+        with self._lock:
+            files = self._scan()
+            current = self._snapshot
+            if files == current.files:
+                return False
+            self._snapshot = self._build(current.version + 1, current, files)
+        print(f"[场景目录] 检测到场景文件变化，已重新加载 (v{self._snapshot.version})")
+        return True
+
+    def start_watching(self):
+        """启动后台轮询线程"""
+        if self.poll_interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._watch, name="scene-catalog-watcher", daemon=True)
+        self._thread.start()
+
+    def stop_watching(self):
+        """停止后台轮询线程"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[场景目录] 重新加载失败: {e}")
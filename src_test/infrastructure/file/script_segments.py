@@ -0,0 +1,178 @@
+"""
+剧本切分
+将剧本切分为按顺序推进的情节段落：先合并排版时硬换行的行，再按小节标题、段落和句末标点切分，
+情节段落的边界不会落在句子中间；另外提供情节段落匹配使用的二元组切分
+src_test 与 src 两套代码互不依赖，token 估算和二元组切分在此独立实现
+"""
+
+import math
+import re
+import unicodedata
+from typing import List
+
+# 中日韩字符（大致每个字符一个 token）
+_CJK_PATTERN = re.compile(r'[　-〿㐀-䶿一-鿿豈-﫿＀-￯]')
+# 句末：句号、感叹号、问号（及紧随的省略号、引号、括号）
+_SENTENCE_END = re.compile(r'[。！？!?]+[…”’」』）)]*')
+# 硬换行的行在行尾没有句末或停顿标点
+_LINE_TERMINATORS = '。！？!?；;：:…”’」』）)'
+# 查询中去除的标点和空白
+_QUERY_NOISE = re.compile(r'[\s\W_]+')
+# 小节标题行：Markdown 标题或单独成行的【标题】
+_HEADING_LINE = re.compile(r'^[ \t　]*(?:#{1,6}[ \t].*|【[^】\n]+】[ \t　]*)$')
+# 达到排版行宽的该比例时才视为硬换行（短行是列表项或标题）
+_WRAP_WIDTH_RATIO = 0.8
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中日韩字符每字1个，其余每4个字符1个"""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def text_bigrams(text: str) -> List[str]:
+    """将文本切分为相邻字符二元组，长度不足2时返回整个文本"""
+    if len(text) < 2:
+        return [text] if text else []
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+def query_terms(text: str) -> List[str]:
+    """将文本切分为二元组（按标点和空白分段，避免跨标点的二元组）"""
+    terms = []
+    for segment in _QUERY_NOISE.split(text):
+        terms.extend(text_bigrams(segment))
+    return terms
+
+
+def _display_width(line: str) -> int:
+    return sum(2 if unicodedata.east_asian_width(char) in 'WF' else 1 for char in line)
+
+
+def unwrap_lines(text: str) -> List[str]:
+    """
+    合并排版时硬换行的行，得到按原文顺序排列的段落（空行、标题各自成段，空行不保留）
+
+    原文中一行排满后在句子中间换行，换行前的行没有行尾空白、不以标点结束，且接近排版行宽；
+    行尾带空白、以句末标点结束或明显较短的行视为段落结束
+
+    :param text: 剧本文本
+    :return: 段落列表
+    """
+    lines = text.split('\n')
+    widths = sorted(_display_width(line.rstrip()) for line in lines if line.strip())
+    # 排版行宽取较长的行（第 75 百分位）
+    wrap_width = widths[len(widths) * 3 // 4] * _WRAP_WIDTH_RATIO if widths else 0
+
+    paragraphs = []
+    current = ''
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or _HEADING_LINE.match(line):
+            if current:
+                paragraphs.append(current)
+            if stripped:
+                paragraphs.append(stripped)
+            current = ''
+            continue
+        if current and current[-1].isascii() and stripped[0].isascii():
+            # 英文单词间的换行换成空格
+            current += ' '
+        current += stripped
+        soft_wrap = (line == line.rstrip() and stripped[-1] not in _LINE_TERMINATORS
+                     and _display_width(stripped) >= wrap_width)
+        if not soft_wrap:
+            paragraphs.append(current)
+            current = ''
+    if current:
+        paragraphs.append(current)
+    return paragraphs
+
+
+def split_sentences(paragraph: str) -> List[str]:
+    """按句末标点切分段落（句末标点和紧随的引号、括号留在句子末尾）"""
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END.finditer(paragraph):
+        sentences.append(paragraph[start:match.end()])
+        start = match.end()
+    if start < len(paragraph):
+        sentences.append(paragraph[start:])
+    return [sentence for sentence in sentences if sentence.strip()]
+
+
+def _beat_units(paragraphs: List[str]) -> List[str]:
+    """不以句末或停顿标点结束的段落（小标题、列表项、在句子中间换行的行）与后面的段落合为一个整体"""
+    units = []
+    pending: List[str] = []
+    for paragraph in paragraphs:
+        if _HEADING_LINE.match(paragraph):
+            units.extend(pending)
+            units.append(paragraph)
+            pending = []
+            continue
+        pending.append(paragraph)
+        if paragraph[-1] in _LINE_TERMINATORS:
+            units.append('\n'.join(pending))
+            pending = []
+    if pending:
+        units.append('\n'.join(pending))
+    return units
+
+
+def split_beats(text: str, max_tokens: int = 200) -> List[str]:
+    """
+    将剧本切分为按顺序推进的情节段落
+
+    先合并硬换行的行，小节标题开始新的情节段落；段落依次累积，超出预算时在段落之间切开，
+    单个段落超出预算时在句末切开（单句超出预算时整句保留，不在句子中间切开）；
+    小标题和列表项与后面的段落留在同一个情节段落中
+
+    :param text: 剧本文本
+    :param max_tokens: 单个情节段落的最大估算 token 数
+    :return: 情节段落（段落之间以换行分隔）
+    """
+    beats = []
+    current: List[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            beats.append('\n'.join(current))
+        current, current_tokens = [], 0
+
+    for paragraph in _beat_units(unwrap_lines(text)):
+        if _HEADING_LINE.match(paragraph):
+            flush()
+            current, current_tokens = [paragraph], estimate_tokens(paragraph)
+            continue
+        tokens = estimate_tokens(paragraph)
+        if current_tokens + tokens <= max_tokens:
+            current.append(paragraph)
+            current_tokens += tokens
+            continue
+        # 只有标题时标题与后面的内容留在同一段
+        if len(current) > 1 or (current and not _HEADING_LINE.match(current[0])):
+            flush()
+        if tokens <= max_tokens:
+            current.append(paragraph)
+            current_tokens += tokens
+            continue
+
+        # 超长段落按句累积
+        pieces: List[str] = []
+        for sentence in split_sentences(paragraph):
+            sentence_tokens = estimate_tokens(sentence)
+            if pieces and current_tokens + sentence_tokens > max_tokens:
+                current.append(''.join(pieces))
+                flush()
+                pieces = []
+            pieces.append(sentence)
+            current_tokens += sentence_tokens
+        if pieces:
+            current.append(''.join(pieces))
+    flush()
+    return beats
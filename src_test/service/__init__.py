@@ -4,5 +4,7 @@ Service Layer - 服务层
 
 from src_test.service.dice_service import DiceService
 from src_test.service.scene_service import ThreadManager, McpService
+from src_test.service.scene_prefetcher import ScenePrefetcher, PreparedScene
+from src_test.service.scene_progress import SceneProgress
 
-__all__ = ['DiceService', 'ThreadManager', 'McpService']
+__all__ = ['DiceService', 'ThreadManager', 'McpService', 'ScenePrefetcher', 'PreparedScene', 'SceneProgress']
@@ -11,6 +11,7 @@ from langchain.agents import create_agent
 from langchain.tools import tool
 from pydantic import BaseModel, Field
 from langchain.agents.middleware import dynamic_prompt, ModelRequest
+from langchain.messages import AIMessage
 from langgraph.checkpoint.memory import InMemorySaver
 
 from src_test.service.scene_service import ThreadManager, McpService
@@ -21,8 +22,8 @@ load_dotenv(override=True)
 
 # 初始化服务
 thread_manager = ThreadManager()
-mcp_service = McpService(thread_manager)
 dice_service = DiceService()
+mcp_service = McpService(thread_manager, repository=dice_service.repository)
 checkpointer = InMemorySaver()
 
 # AI返回的场景选择列表（用于存储AI通过select_scene工具返回的场景）
@@ -46,6 +47,10 @@ class SanityCheckInput(BaseModel):
     failure_penalty: str = Field(description="检定失败时理智惩罚的骰子表达式, 例如 '1d6'")
 
 
+class FindWeaponInput(BaseModel):
+    weapon_name: str = Field(description="武器名称或简称，例如 '.38左轮', '汤普森', '小刀'")
+
+
 # 定义工具函数
 @tool(args_schema=RollDiceInput)
 def roll_dice_tool(expression: str, is_hidden: bool = False) -> str:
@@ -93,6 +98,20 @@ def roll_sanity_check_tool(user_id: str, success_penalty: str, failure_penalty:
     return json.dumps(result, ensure_ascii=False)
 
 
+@tool(args_schema=FindWeaponInput)
+def find_weapon_tool(weapon_name: str) -> str:
+    """
+    查询武器的伤害、射程、使用技能、装弹量和故障值等数据。
+
+    例如，战斗中调查员用"左轮手枪"射击，需要知道伤害骰和对应技能时，LLM应调用此函数。
+
+    :param weapon_name: 武器名称或简称（不区分大小写、全半角和标点）。
+    :return: 武器数据，找不到时返回错误信息；stats_available 为 false 时只有名称，没有数值。
+    """
+    result = dice_service.find_weapon(weapon_name)
+    return json.dumps(result, ensure_ascii=False, default=str)
+
+
 @tool
 def select_scene(scenes: str) -> str:
     """
@@ -138,14 +157,34 @@ def exit_scene() -> str:
     return mcp_service.exit_scene()
 
 
+@tool
+def advance_scene(steps: int = 1) -> str:
+    """
+    推进当前场景的剧情进度。
+
+    当提示词中"当前段落"的剧情已经推进完成、需要进入"后续段落"时调用此函数。
+
+    :param steps: 推进的段落数，默认为1
+    :return: 推进后的进度
+    """
+    return mcp_service.advance_scene(steps)
+
+
 # 工具列表
-tools = [roll_dice_tool, roll_attribute_check_tool, roll_sanity_check_tool, select_scene]
+tools = [roll_dice_tool, roll_attribute_check_tool, roll_sanity_check_tool, find_weapon_tool, select_scene,
+         advance_scene]
 
 
 # 动态提示词中间件
 @dynamic_prompt
 def dynamic_system_prompt(request: ModelRequest) -> str:
-    """根据当前状态动态返回系统提示词"""
+    """根据当前状态动态返回系统提示词（主持人的新回复进入后续段落时自动推进场景进度）"""
+    for message in reversed(request.messages):
+        if isinstance(message, AIMessage):
+            if isinstance(message.content, str):
+                # 同一轮中的多次模型调用（如工具调用后）看到的是同一条回复，只观察一次
+                thread_manager.observe_narration(message.content, message.id)
+            break
     return thread_manager.get_current_prompt()
 
 
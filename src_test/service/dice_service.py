@@ -3,9 +3,11 @@
 从原 agent/dice/dice_mcp.py 提取
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from src_test.domain.dice import roll
+from src_test.domain.models import PLAYER_COLUMNS
+from src_test.domain.weapon_catalog import WeaponCatalog, get_weapon_catalog
 from src_test.infrastructure.database import get_repository
 
 
@@ -30,17 +32,20 @@ class DiceService:
 
     def roll_attribute_check(self, user_id: str, attribute_name: str) -> Dict[str, Any]:
         """属性或技能检定"""
-        player_obj = self.repository.get_user_card(user_id)
-        skill_obj = self.repository.get_skill_card(user_id)
-        card_data = player_obj.model_dump()
-        skill_data = skill_obj.model_dump()
         attribute_id = self.repository.get_id(attribute_name)
 
-        target_value = 0
-        if attribute_id in card_data and card_data[attribute_id] is not None:
-            target_value = card_data[attribute_id]
-        elif attribute_id in skill_data and skill_data[attribute_id] is not None:
-            target_value = skill_data[attribute_id]
+        target_value = None
+        if attribute_id in PLAYER_COLUMNS:
+            # 属性只查询对应的一列
+            player_fields = self.repository.get_fields(user_id, [attribute_id])
+            if player_fields is not None:
+                target_value = getattr(player_fields, attribute_id)
+        if target_value is None:
+            # 不是属性列或属性为空时查询技能
+            skill_vector = self.repository.get_skill_vector(user_id)
+            target_value = skill_vector.get(attribute_id)
+        if target_value is None:
+            target_value = 0
 
         messages, roll_result = roll("1d100")
 
@@ -65,12 +70,13 @@ class DiceService:
 
     def roll_sanity_check(self, user_id: str, success_penalty: str, failure_penalty: str) -> Dict[str, Any]:
         """理智检定"""
-        player_obj = self.repository.get_user_card(user_id)
-        card_data = player_obj.model_dump()
         san_id = self.repository.get_id("理智")
-        if san_id is None:
+        if san_id is None or san_id not in PLAYER_COLUMNS:
             return {"success": False, "error": "角色卡中未找到理智属性"}
-        current_san = card_data[san_id]
+        player_fields = self.repository.get_fields(user_id, [san_id])
+        if player_fields is None or getattr(player_fields, san_id) is None:
+            return {"success": False, "error": "未找到该用户的角色卡。"}
+        current_san = getattr(player_fields, san_id)
 
         messages, roll_result = roll("1d100")
         is_success = roll_result <= current_san
@@ -99,7 +105,20 @@ class DiceService:
         :param attributes: 包含属性名和属性值的字典, 例如 {"力量": 50, "敏捷": 60}。
         :return: 操作结果的确认信息。
         """
-        self.repository.set_user_card(user_id, attributes)
+        update_data = {}
+        unknown = []
+        for name, value in attributes.items():
+            # 既接受 players 表列名，也接受中文属性名
+            column = name if name in PLAYER_COLUMNS else self.repository.get_id(name)
+            if column in PLAYER_COLUMNS:
+                update_data[column] = value
+            else:
+                unknown.append(name)
+        if unknown:
+            return {"success": False, "error": f"角色卡中没有这些属性: {', '.join(unknown)}"}
+
+        if not self.repository.set_user_card(user_id, update_data):
+            return {"success": False, "error": "角色卡更新失败。"}
         return {"success": True, "message": "角色卡已更新。"}
 
     def get_character_sheet(self, user_id: str) -> Dict[str, Any]:
@@ -112,7 +131,33 @@ class DiceService:
         card_data = self.repository.get_user_card(user_id)
         if not card_data:
             return {"success": False, "error": "未找到该用户的角色卡。"}
-        return {"success": True, "data": card_data}
+        return {"success": True, "data": card_data, "weapons": self.describe_weapons(card_data.weapons or [])}
+
+    @property
+    def weapon_catalog(self) -> WeaponCatalog:
+        """共享的武器目录（首次访问时从 weapons 表加载）"""
+        return get_weapon_catalog(self.repository.get_weapons)
+
+    def describe_weapons(self, weapon_ids: List[str]) -> List[Dict[str, Any]]:
+        """将角色卡中的武器ID列表转换为武器信息，跳过未知ID"""
+        catalog = self.weapon_catalog
+        return [weapon for weapon in map(catalog.describe, weapon_ids) if weapon]
+
+    def find_weapon(self, weapon_name: str) -> Dict[str, Any]:
+        """
+        按名称或别名查找武器（大小写、全半角、标点不敏感），供战斗逻辑使用。
+
+        :param weapon_name: 武器名称，例如 ".38左轮"。
+        :return: 武器信息，找不到时返回错误信息；weapons 表不可用时只有ID和名称，并附带 warning 说明。
+        """
+        catalog = self.weapon_catalog
+        weapon_id = catalog.lookup_id(weapon_name)
+        if weapon_id is None:
+            return {"success": False, "error": f"未找到武器: {weapon_name}"}
+        result = {"success": True, "data": catalog.describe(weapon_id), "stats_available": catalog.has_stats}
+        if not catalog.has_stats:
+            result["warning"] = "武器数据表暂时不可用，只查到了武器名称，没有伤害、射程等数值，请勿编造这些数据。"
+        return result
 
     def generate_coc_character_sheet(self, count: int = 1) -> Dict[str, Any]:
         """
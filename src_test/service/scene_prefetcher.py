@@ -0,0 +1,101 @@
+"""
+场景预取
+select_scene 给出候选场景后，在后台线程中为每个候选场景准备好场景内容、提示词和情节段落，
+放入会话级的小缓存；随后 new_scene 直接取用，不再读取文件或切分剧本
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+
+class PreparedScene:
+    """已准备好的场景"""
+
+    def __init__(self, scene: str, content: str, prompt: str, version: Hashable,
+                 beats: Optional[List[str]] = None):
+        self.scene = scene
+        self.content = content
+        self.prompt = prompt
+        # 按顺序推进的情节段落
+        self.beats = beats or []
+        # 准备时的场景目录版本，目录重新加载后缓存失效
+        self.version = version
+
+
+class ScenePrefetcher:
+    """按场景名缓存后台准备结果（最近使用的 max_entries 个）"""
+
+    def __init__(self, prepare: Callable[[str], PreparedScene],
+                 version: Callable[[], Hashable] = lambda: None,
+                 max_entries: int = 8, max_workers: int = 2):
+        """
+        :param prepare: 准备单个场景的函数
+        :param version: 返回当前场景目录版本的函数
+        :param max_entries: 缓存的场景数上限
+        :param max_workers: 后台线程数
+        """
+        self.prepare = prepare
+        self.version = version
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scene-prefetch")
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Future]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def prefetch(self, scenes: Iterable[str]):
+        """在后台准备尚未缓存的场景（已在准备中的场景不会重复提交）"""
+        with self._lock:
+            for scene in scenes:
+                if scene in self._entries:
+                    self._entries.move_to_end(scene)
+                    continue
+                self._entries[scene] = self._executor.submit(self.prepare, scene)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def get(self, scene: str) -> PreparedScene:
+        """
+        获取场景的准备结果：已预取时直接返回（仍在准备中则等待其完成），否则当场准备
+
+        :param scene: 场景名
+        :return: PreparedScene
+        """
+        with self._lock:
+            future = self._entries.get(scene)
+        if future is not None:
+            try:
+                prepared = future.result()
+            except Exception as e:
+                print(f"[场景预取] 准备场景 {scene} 失败: {e}")
+                prepared = None
+            if prepared is not None and prepared.version == self.version():
+                with self._lock:
+                    self.hits += 1
+                return prepared
+
+        with self._lock:
+            self.misses += 1
+        prepared = self.prepare(scene)
+        with self._lock:
+            done = Future()
+            done.set_result(prepared)
+            self._entries[scene] = done
+            self._entries.move_to_end(scene)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return prepared
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """命中次数、未命中次数和当前缓存的场景数"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'cached': len(self._entries)}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,91 @@
+"""
+场景进度
+将场景剧本切分为按顺序推进的情节段落，为每个场景线程维护一个进度游标；
+提示词只包含当前段落和少量后续段落，已完成的段落不再发送给模型。
+游标由 advance_scene 工具推进，或在主持人的叙述明显进入后续段落时自动推进
+"""
+
+from typing import Any, Dict, List
+
+from src_test.infrastructure.file.script_segments import query_terms
+
+
+class SceneProgress:
+    """单个场景线程的情节进度"""
+
+    def __init__(self, beats: List[str], lookahead: int = 1, advance_threshold: float = 0.3):
+        """
+        :param beats: 按顺序排列的情节段落
+        :param lookahead: 提示词中附带的后续段落数
+        :param advance_threshold: 自动推进阈值：后续段落的二元组出现在主持人叙述中的比例
+        """
+        self.beats = beats
+        self.lookahead = lookahead
+        self.advance_threshold = advance_threshold
+        self.cursor = 0
+        self._beat_terms = [set(query_terms(beat)) for beat in beats]
+
+    @property
+    def total(self) -> int:
+        return len(self.beats)
+
+    @property
+    def finished(self) -> bool:
+        """是否已推进到最后一段"""
+        return self.cursor >= len(self.beats) - 1
+
+    def advance(self, steps: int = 1) -> int:
+        """
+        向后推进游标（不会超过最后一段，也不会后退）
+
+        :param steps: 推进的段落数
+        :return: 推进后的游标
+        """
+        if self.beats:
+            self.cursor = min(len(self.beats) - 1, self.cursor + max(steps, 0))
+        return self.cursor
+
+    def observe(self, narration: str) -> bool:
+        """
+        根据主持人最新的叙述自动推进：叙述覆盖了某个后续段落的大部分内容时，游标移到该段落
+
+        :param narration: 主持人（模型）最新的回复
+        :return: 游标是否发生了移动
+        """
+        if not narration or self.finished:
+            return False
+        narration_terms = set(query_terms(narration))
+        if not narration_terms:
+            return False
+
+        target = None
+        last = min(len(self.beats) - 1, self.cursor + self.lookahead)
+        for position in range(self.cursor + 1, last + 1):
+            terms = self._beat_terms[position]
+            if terms and len(terms & narration_terms) / len(terms) >= self.advance_threshold:
+                target = position
+        if target is None:
+            return False
+        self.cursor = target
+        return True
+
+    def render(self) -> str:
+        """生成提示词中的剧本部分：进度说明、当前段落和后续段落"""
+        if not self.beats:
+            return ""
+        parts = [f"（剧本进度：第 {self.cursor + 1}/{len(self.beats)} 段，已完成的段落已省略，不要重复已经推进过的剧情）"]
+        parts.append(f"【当前段落】\n{self.beats[self.cursor]}")
+        upcoming = self.beats[self.cursor + 1:self.cursor + 1 + self.lookahead]
+        if upcoming:
+            parts.append("【后续段落（尚未发生，只在玩家推进到这里时使用）】\n" + "\n\n".join(upcoming))
+        else:
+            parts.append("（这是本场景的最后一段，剧情推进完成后可以退出场景）")
+        return "\n\n".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'cursor': self.cursor,
+            'total': len(self.beats),
+            'finished': self.finished,
+            'current_beat': self.beats[self.cursor] if self.beats else "",
+        }
@@ -7,8 +7,12 @@ import uuid
 import os
 from typing import Optional
 
+from src_test.config import settings
 from src_test.domain.models import SceneInfo
-from src_test.infrastructure.file import TxtKeywordSearch
+from src_test.infrastructure.file import TxtKeywordSearch, SceneCatalog, SceneBundle
+from src_test.infrastructure.file.script_segments import split_beats
+from src_test.service.scene_prefetcher import ScenePrefetcher, PreparedScene
+from src_test.service.scene_progress import SceneProgress
 
 
 # 获取项目根目录下的scenes文件夹
@@ -52,6 +56,18 @@ SCENE_GUIDANCE = """
 SCENE_PROMPT = BASE_PROMPT + EXIT_SCENE_TOOL + SCENE_GUIDANCE
 
 
+def build_main_prompt(main_script: Optional[str]) -> str:
+    """主线程提示词（没有主线剧本时使用完整场景提示词）"""
+    if main_script is None:
+        return SCENE_PROMPT
+    return BASE_PROMPT + SCENE_GUIDANCE + f"\n【主线剧本内容】\n{main_script}"
+
+
+def build_scene_prompt(scene: str, scene_content: str) -> str:
+    """场景提示词"""
+    return SCENE_PROMPT + f"\n当前场景：{scene}\n{scene_content}"
+
+
 class ThreadManager:
     """线程管理器"""
 
@@ -63,35 +79,59 @@ class ThreadManager:
         self.scene_stack: list[SceneInfo] = []
         self.scenes_dir = scenes_dir
         self.txt_search = TxtKeywordSearch(scenes_dir)
-        self.main_prompt = self._load_main_prompt()
-        # 场景进入次数限制
-        self.scene_limits: dict[str, int] = {}
+        # 预编译的场景包（提供预先拼接的提示词和切分好的情节段落），未配置或已过期时为 None
+        self.bundle = self._open_bundle(scenes_dir)
+        # 场景目录：启动时一次性加载场景内容、进入次数限制和主线剧本，文件变化时自动重新加载
+        if self.bundle is not None:
+            self.catalog = self.bundle
+        else:
+            self.catalog = SceneCatalog(scenes_dir, self.txt_search.loader, settings.SCENE_RELOAD_INTERVAL)
+            self.catalog.start_watching()
         self.entered_count: dict[str, int] = {}
-        self._load_scene_limits()
-
-    def _load_main_prompt(self) -> str:
-        """加载主线程提示词"""
-        main_prompt_file = os.path.join(self.scenes_dir, "开始-连接-结尾.txt")
-        try:
-            with open(main_prompt_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            return BASE_PROMPT + SCENE_GUIDANCE + f"\n【主线剧本内容】\n{content}"
-        except FileNotFoundError:
-            return SCENE_PROMPT
-
-    def _load_scene_limits(self):
-        """从 scenes.txt 加载场景进入次数限制"""
-        scenes_file = os.path.join(self.scenes_dir, "scenes.txt")
-        self.scene_limits = {}
-        try:
-            with open(scenes_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if ':' in line:
-                        scene, limit = line.split(':', 1)
-                        self.scene_limits[scene.strip()] = int(limit.strip())
-        except FileNotFoundError:
-            pass  # 如果文件不存在，使用空字典
+        self._main_prompt_cache: tuple[int, str] = (0, "")
+        # 本会话的场景预取缓存
+        self.prefetcher = ScenePrefetcher(
+            self._prepare_scene,
+            version=lambda: self.catalog.snapshot.version,
+            max_entries=settings.SCENE_PREFETCH_CACHE_SIZE,
+        )
+        # 场景线程ID -> 情节进度
+        self.scene_progress: dict[str, SceneProgress] = {}
+        # 场景线程ID -> 最近一条已用于推进进度的回复（每次模型调用都会生成提示词，同一条回复只观察一次）
+        self._observed_messages: dict[str, str] = {}
+
+    @staticmethod
+    def _open_bundle(scenes_dir: str) -> Optional[SceneBundle]:
+        """加载配置的场景包，与场景文件夹或提示词模板不一致时放弃并读取文件夹"""
+        path = settings.SCENE_BUNDLE_PATH
+        if not path or not os.path.exists(path):
+            return None
+        bundle = SceneBundle.open(path, use_mmap=settings.SCENE_BUNDLE_MMAP)
+        if bundle is None:
+            return None
+        if bundle.is_stale(scenes_dir, build_scene_prompt, build_main_prompt):
+            print(f"[场景包] {path} 与场景文件夹或提示词模板不一致，请重新编译；本次读取场景文件夹")
+            bundle.close()
+            return None
+        print(f"[场景包] 已加载 {path}（{bundle.header['built_at']}）")
+        return bundle
+
+    @property
+    def scene_limits(self) -> dict[str, int]:
+        """场景进入次数限制（来自 scenes.txt）"""
+        return self.catalog.limits
+
+    @property
+    def main_prompt(self) -> str:
+        """主线程提示词（主线剧本变化后重新拼接；使用场景包时直接取预先拼接的提示词）"""
+        if self.bundle is not None and self.bundle.main_prompt is not None:
+            return self.bundle.main_prompt
+        snapshot = self.catalog.snapshot
+        version, prompt = self._main_prompt_cache
+        if version != snapshot.version:
+            prompt = build_main_prompt(snapshot.main_script)
+            self._main_prompt_cache = (snapshot.version, prompt)
+        return prompt
 
     @property
     def in_scene(self) -> bool:
@@ -127,21 +167,75 @@ class ThreadManager:
                     available.append(scene)
         return available
 
+    def prefetch_scenes(self, candidates: list[str]) -> list[str]:
+        """
+        在后台准备候选场景（只准备仍可进入的场景）
+
+        :param candidates: select_scene 给出的场景列表
+        :return: 提交预取的场景
+        """
+        scenes = self.get_available_scenes(candidates)
+        if settings.SCENE_PREFETCH_ENABLED and scenes:
+            self.prefetcher.prefetch(scenes)
+        return scenes
+
+    def _prepare_scene(self, scene: str) -> PreparedScene:
+        """读取场景内容，拼接提示词并切分情节段落"""
+        version = self.catalog.snapshot.version
+        scene_content = self._load_scene_content(scene)
+        prompt = self.bundle.scene_prompt(scene) if self.bundle is not None else None
+        if prompt is None:
+            prompt = build_scene_prompt(scene, scene_content)
+        beats = self.bundle.scene_beats(scene, settings.SCENE_BEAT_MAX_TOKENS) if self.bundle is not None else None
+        if beats is None:
+            beats = split_beats(scene_content, settings.SCENE_BEAT_MAX_TOKENS)
+        return PreparedScene(scene, scene_content, prompt, version, beats)
+
+    @property
+    def current_progress(self) -> Optional[SceneProgress]:
+        """当前场景的情节进度（不在场景中或未启用进度时为 None）"""
+        if not self.scene_stack:
+            return None
+        return self.scene_progress.get(self.scene_stack[-1].thread_id)
+
+    def advance_beat(self, steps: int = 1) -> Optional[SceneProgress]:
+        """将当前场景推进到后续情节段落"""
+        progress = self.current_progress
+        if progress is not None:
+            progress.advance(steps)
+        return progress
+
+    def observe_narration(self, narration: str, message_id: Optional[str] = None) -> bool:
+        """
+        根据主持人最新的叙述自动推进当前场景的进度
+
+        :param narration: 模型最新的回复
+        :param message_id: 回复的消息ID（没有时使用回复内容），已观察过的回复直接跳过
+        :return: 进度是否发生了变化
+        """
+        progress = self.current_progress
+        if progress is None:
+            return False
+        thread_id = self.scene_stack[-1].thread_id
+        key = message_id or narration
+        if self._observed_messages.get(thread_id) == key:
+            return False
+        self._observed_messages[thread_id] = key
+        return progress.observe(narration)
+
     def reset_progress(self):
         """重置场景进度（重置记忆时调用）"""
         self.scene_stack.clear()
         self.entered_count.clear()
+        self.scene_progress.clear()
+        self._observed_messages.clear()
         self.current_thread_id = self.main_thread_id
 
     def _load_scene_content(self, scene: str) -> str:
-        """从txt文件加载场景内容"""
-        for root, dirs, files in os.walk(self.scenes_dir):
-            for file in files:
-                if file.endswith('.txt') and scene in file:
-                    file_path = os.path.join(root, file)
-                    content = self.txt_search.loader.read_txt_file(file_path)
-                    if content:
-                        return content
+        """从场景目录获取场景内容"""
+        content = self.catalog.get_content(scene)
+        if content:
+            return content
         return f"（未找到场景文件 '{scene}'）"
 
     def enter_scene(self, scene: str) -> tuple[str, str]:
@@ -160,9 +254,14 @@ class ThreadManager:
 
         # 原有逻辑：进入场景
         new_thread_id = str(uuid.uuid4())
-        scene_content = self._load_scene_content(scene)
-        new_prompt = SCENE_PROMPT + f"\n当前场景：{scene}\n{scene_content}"
-        scene_info = SceneInfo(scene, new_thread_id, new_prompt)
+        # 已被 select_scene 预取的场景直接取用准备好的内容和提示词
+        prepared = self.prefetcher.get(scene)
+        scene_content = prepared.content
+        scene_info = SceneInfo(scene, new_thread_id, prepared.prompt)
+        # 剧本足够长时按情节段落推进，否则始终发送完整剧本
+        lookahead = settings.SCENE_BEAT_LOOKAHEAD
+        if settings.SCENE_BEAT_TRACKING and len(prepared.beats) > lookahead + 1:
+            self.scene_progress[new_thread_id] = SceneProgress(prepared.beats, lookahead)
         self.scene_stack.append(scene_info)
         self.current_thread_id = new_thread_id
         return new_thread_id, scene_content
@@ -172,6 +271,8 @@ class ThreadManager:
         if not self.scene_stack:
             return ("", "主线程", self.main_thread_id)
         exited_scene = self.scene_stack.pop()
+        self.scene_progress.pop(exited_scene.thread_id, None)
+        self._observed_messages.pop(exited_scene.thread_id, None)
         if self.scene_stack:
             parent = self.scene_stack[-1]
             self.current_thread_id = parent.thread_id
@@ -180,15 +281,23 @@ class ThreadManager:
         return (exited_scene.scene_name, "主线程", self.main_thread_id)
 
     def get_current_prompt(self) -> str:
-        """获取当前提示词"""
-        return self.scene_stack[-1].prompt if self.scene_stack else self.main_prompt
+        """获取当前提示词（启用场景进度时只包含当前情节段落和后续段落）"""
+        if not self.scene_stack:
+            return self.main_prompt
+        scene_info = self.scene_stack[-1]
+        progress = self.scene_progress.get(scene_info.thread_id)
+        if progress is None:
+            return scene_info.prompt
+        return build_scene_prompt(scene_info.scene_name, progress.render())
 
 
 class McpService:
     """MCP服务"""
 
-    def __init__(self, thread_manager: ThreadManager = None):
+    def __init__(self, thread_manager: ThreadManager = None, repository=None):
         self.thread_manager = thread_manager
+        # 玩家数据仓储，场景退出时写入写回缓冲中的数据
+        self.repository = repository
 
     def new_scene(self, scene: str) -> str:
         if self.thread_manager is None:
@@ -202,10 +311,26 @@ class McpService:
         if not self.thread_manager.in_scene:
             return "当前不在任何场景中"
         exited, return_to, _ = self.thread_manager.exit_scene()
+        if self.repository is not None:
+            self.repository.flush_pending()
         return f"已退出：{exited}，返回：{return_to}"
+
+    def advance_scene(self, steps: int = 1) -> str:
+        if self.thread_manager is None:
+            return "线程管理器未初始化"
+        progress = self.thread_manager.advance_beat(steps)
+        if progress is None:
+            return "当前场景没有分段进度"
+        if progress.finished:
+            return f"已推进到最后一段（{progress.cursor + 1}/{progress.total}）"
+        return f"已推进到第 {progress.cursor + 1}/{progress.total} 段"
     
     def select_scene(self, scenes: str) -> list[str]:
         """将场景字符串以空格分隔符拆分成列表"""
         if not scenes or not scenes.strip():
             return []
-        return scenes.strip().split() 
\ No newline at end of file
+        candidates = scenes.strip().split()
+        # 玩家接下来可能进入这些场景，提前在后台准备
+        if self.thread_manager is not None:
+            self.thread_manager.prefetch_scenes(candidates)
+        return candidates 
\ No newline at end of file